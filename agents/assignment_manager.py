@@ -16,6 +16,18 @@ from utils.constants import AgentType, REDIS_HOST, REDIS_PORT, TaskStatus
 from utils.structured_logger import get_logger
 
 
+# Agent queues reported by get_queue_status, with their Redis keys built once
+QUEUE_AGENT_TYPES: Tuple[str, ...] = (
+    AgentType.BACKEND,
+    AgentType.FRONTEND,
+    AgentType.DATABASE,
+    AgentType.DEVOPS,
+    AgentType.QA,
+)
+QUEUE_KEYS: Dict[str, str] = {
+    agent_type: f"queue:agent:{agent_type}" for agent_type in QUEUE_AGENT_TYPES
+}
+
 # Mapping from issue labels to agent types
 LABEL_TO_AGENT: Dict[str, str] = {
     # Backend signals
@@ -231,7 +243,7 @@ class AssignmentManager:
         }
 
         # Queue task in Redis for the appropriate agent
-        queue_key = f"queue:agent:{agent_type}"
+        queue_key = QUEUE_KEYS.get(agent_type) or f"queue:agent:{agent_type}"
         task_json = json.dumps(task)
 
         # Use sorted set with priority (lower score = higher priority)
@@ -355,7 +367,7 @@ class AssignmentManager:
         Returns:
             List of pending task dictionaries
         """
-        queue_key = f"queue:agent:{agent_type}"
+        queue_key = QUEUE_KEYS.get(agent_type) or f"queue:agent:{agent_type}"
         task_jsons = self.redis.zrange(queue_key, 0, count - 1)
 
         tasks = []
@@ -378,29 +390,46 @@ class AssignmentManager:
         Returns:
             Task dictionary or None if queue is empty
         """
-        queue_key = f"queue:agent:{agent_type}"
+        tasks = self.claim_next_tasks(agent_type, 1)
+        return tasks[0] if tasks else None
 
-        # Get and remove the highest priority task (lowest score)
-        tasks = self.redis.zpopmin(queue_key, 1)
+    def claim_next_tasks(self, agent_type: str, count: int) -> List[Dict]:
+        """
+        Atomically claim up to `count` highest-priority tasks in one ZPOPMIN,
+        marking them in progress with a single pipelined round trip.
 
-        if not tasks:
-            return None
+        Args:
+            agent_type: Agent type claiming the tasks
+            count: Maximum number of tasks to claim
 
-        task_json, _priority = tasks[0]
+        Returns:
+            Claimed task dictionaries, highest priority first (may be empty)
+        """
+        queue_key = QUEUE_KEYS.get(agent_type) or f"queue:agent:{agent_type}"
 
-        try:
-            task = json.loads(task_json)
+        # Get and remove the highest priority tasks (lowest scores)
+        popped = self.redis.zpopmin(queue_key, count)
 
+        tasks = []
+        for task_json, _priority in popped or []:
+            try:
+                tasks.append(json.loads(task_json))
+            except json.JSONDecodeError:
+                continue
+
+        if tasks:
             # Update tracking
-            tracking_key = f"assignment:{task.get('repo_name')}:{task.get('issue_number')}"
-            self.redis.hset(tracking_key, mapping={
-                "status": TaskStatus.IN_PROGRESS,
-                "claimed_at": datetime.now().isoformat(),
-            })
+            claimed_at = datetime.now().isoformat()
+            pipe = self.redis.pipeline(transaction=False)
+            for task in tasks:
+                tracking_key = f"assignment:{task.get('repo_name')}:{task.get('issue_number')}"
+                pipe.hset(tracking_key, mapping={
+                    "status": TaskStatus.IN_PROGRESS,
+                    "claimed_at": claimed_at,
+                })
+            pipe.execute()
 
-            return task
-        except json.JSONDecodeError:
-            return None
+        return tasks
 
     def complete_task(self, repo_name: str, issue_number: int, result: Dict):
         """
@@ -438,27 +467,23 @@ class AssignmentManager:
         """
         Get status of all agent queues.
 
+        All queue sizes are fetched in one pipelined round trip.
+
         Returns:
             Dictionary with queue sizes per agent
         """
-        status = {}
-        agent_types = [
-            AgentType.BACKEND,
-            AgentType.FRONTEND,
-            AgentType.DATABASE,
-            AgentType.DEVOPS,
-            AgentType.QA,
-        ]
+        pipe = self.redis.pipeline(transaction=False)
+        for queue_key in QUEUE_KEYS.values():
+            pipe.zcard(queue_key)
+        counts = pipe.execute()
 
-        for agent_type in agent_types:
-            queue_key = f"queue:agent:{agent_type}"
-            count = self.redis.zcard(queue_key)
-            status[agent_type] = {
+        return {
+            agent_type: {
                 "pending_tasks": count,
                 "queue_key": queue_key,
             }
-
-        return status
+            for (agent_type, queue_key), count in zip(QUEUE_KEYS.items(), counts)
+        }
 
     async def assign_pr_review(
         self,
@@ -492,7 +517,7 @@ class AssignmentManager:
             "assigned_agent": AgentType.QA,
         }
 
-        queue_key = f"queue:agent:{AgentType.QA}"
+        queue_key = QUEUE_KEYS[AgentType.QA]
         task_json = json.dumps(task)
         # Use pr_number as priority so lower PR numbers are reviewed first
         self.redis.zadd(queue_key, {task_json: float(pr_number)})
@@ -0,0 +1,184 @@
+"""
+Persistent Claude Worker Pool for AI Development Pipeline
+
+Keeps up to `size` long-lived Claude worker processes speaking an
+id-framed JSON-lines protocol on stdin/stdout:
+
+    request:  {"id": ..., "prompt": ..., "cwd": ..., "tools": [...]}
+    reply:    {"id": ..., "stdout": ..., "stderr": ..., "return_code": ...}
+
+Each worker multiplexes many in-flight requests (replies are routed by
+id), and new requests go to the least-loaded worker. Extra workers are
+only spawned while every live one is busy, so an idle pipeline keeps a
+single process warm.
+"""
+
+import asyncio
+import json
+import os
+import shlex
+import uuid
+from typing import Dict, List, Optional
+
+from utils.structured_logger import get_logger
+
+logger = get_logger("claude_worker_pool", agent_type="master")
+
+# Workers kept warm by default (each is a full Claude runtime)
+DEFAULT_POOL_SIZE = min(4, os.cpu_count() or 1)
+
+
+class _ClaudeWorker:
+    """One worker process, its reply reader and its in-flight requests."""
+
+    def __init__(self, proc: asyncio.subprocess.Process):
+        self.proc = proc
+        self.pending: Dict[str, asyncio.Future] = {}
+        self.write_lock = asyncio.Lock()
+        self.retired = False
+        self.reader = asyncio.create_task(self._read_replies())
+
+    def alive(self) -> bool:
+        return not self.retired and not self.reader.done()
+
+    def retire(self):
+        """Take the worker out of rotation and kill it; its reader fails what is left."""
+        self.retired = True
+        if self.proc.returncode is None:
+            self.proc.kill()
+
+    async def _read_replies(self):
+        """
+        Resolve pending futures from reply frames. When the worker exits,
+        every in-flight request is failed so its caller can fall back.
+        """
+        try:
+            while True:
+                line = await self.proc.stdout.readline()
+                if not line:
+                    break
+                try:
+                    frame = json.loads(line)
+                except ValueError:
+                    continue
+                future = self.pending.pop(frame.get("id"), None)
+                if future and not future.done():
+                    future.set_result(frame)
+        finally:
+            # If we stopped reading for any other reason than EOF, the worker
+            # would block on a full stdout pipe and never drain our writes.
+            if self.proc.returncode is None:
+                self.proc.kill()
+            for future in self.pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("Claude worker exited"))
+            self.pending.clear()
+            await self.proc.wait()
+
+    async def send(self, frame: Dict, timeout: float) -> Dict:
+        future = asyncio.get_running_loop().create_future()
+        self.pending[frame["id"]] = future
+        try:
+            # One writer at a time: a frame must hit the pipe and drain before
+            # the next caller writes, so large prompts never wait on each
+            # other's back-pressure mid-frame.
+            async with self.write_lock:
+                self.proc.stdin.write((json.dumps(frame) + "\n").encode("utf-8"))
+                await self.proc.stdin.drain()
+            return await asyncio.wait_for(future, timeout=timeout)
+        except asyncio.TimeoutError:
+            # The protocol has no cancel frame, so the worker would keep
+            # running the abandoned prompt while looking idle to
+            # _least_loaded. Retire it; the pool spawns a fresh one.
+            logger.warning(f"⏱️ Claude worker (pid {self.proc.pid}) timed out — retiring it")
+            self.retire()
+            raise
+        finally:
+            self.pending.pop(frame["id"], None)
+
+
+class ClaudeWorkerPool:
+    """Least-loaded dispatch over up to `size` persistent Claude workers."""
+
+    def __init__(self, command: str, cwd: str, size: int = DEFAULT_POOL_SIZE, limit: int = 2 ** 16):
+        self.command = command
+        self.cwd = cwd
+        self.size = max(1, size)
+        self.limit = limit
+        self.workers: List[_ClaudeWorker] = []
+        self._spawn_lock = asyncio.Lock()
+
+    async def start(self):
+        """Pre-warm the pool by spawning every worker up front."""
+        async with self._spawn_lock:
+            self._reap()
+            while len(self.workers) < self.size:
+                if await self._spawn() is None:
+                    break
+
+    async def submit(
+        self,
+        prompt: str,
+        cwd: str,
+        allowed_tools: Optional[List[str]],
+        timeout: float,
+    ) -> Optional[Dict]:
+        """
+        Send one request and return the reply frame, or None when no worker
+        can be started. Raises asyncio.TimeoutError, or ConnectionError /
+        OSError if the worker dies mid-request.
+        """
+        worker = await self._acquire()
+        if worker is None:
+            return None
+        frame = {"id": uuid.uuid4().hex, "prompt": prompt, "cwd": cwd, "tools": allowed_tools or []}
+        return await worker.send(frame, timeout)
+
+    def in_flight(self) -> int:
+        return sum(len(w.pending) for w in self.workers)
+
+    async def close(self):
+        for worker in self.workers:
+            if worker.proc.returncode is None:
+                worker.proc.kill()
+                await worker.proc.wait()
+            worker.reader.cancel()
+        self.workers.clear()
+
+    async def _acquire(self) -> Optional[_ClaudeWorker]:
+        idle = self._least_loaded()
+        if idle is not None and not idle.pending:
+            return idle
+
+        async with self._spawn_lock:
+            self._reap()
+            # Another caller may have spawned a worker while we waited
+            idle = self._least_loaded()
+            if idle is not None and (not idle.pending or len(self.workers) >= self.size):
+                return idle
+            return await self._spawn() or idle
+
+    def _least_loaded(self) -> Optional[_ClaudeWorker]:
+        live = [w for w in self.workers if w.alive()]
+        return min(live, key=lambda w: len(w.pending)) if live else None
+
+    def _reap(self):
+        self.workers = [w for w in self.workers if w.alive()]
+
+    async def _spawn(self) -> Optional[_ClaudeWorker]:
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *shlex.split(self.command),
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+                cwd=self.cwd,
+                limit=self.limit,
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ Could not start persistent Claude worker: {e}")
+            return None
+        worker = _ClaudeWorker(proc)
+        self.workers.append(worker)
+        logger.info(f"🔌 Persistent Claude worker started (pid {proc.pid}, {len(self.workers)}/{self.size})")
+        return worker
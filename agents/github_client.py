@@ -5,7 +5,7 @@ Comprehensive GitHub integration for repository, issue, PR, and branch managemen
 
 import requests
 import asyncio
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime
 import base64
 import json
@@ -40,6 +40,10 @@ class GitHubClient:
             "Authorization": f"token {token}",
             "Accept": "application/vnd.github.v3+json"
         }
+        
+        # (url, branch) → (ETag, workflow runs) from the last full response;
+        # polls send If-None-Match and reuse the runs on 304 Not Modified
+        self._runs_cache: Dict[Tuple[str, Optional[str]], Tuple[str, List[Dict]]] = {}
     
     # ==========================================
     # REPOSITORY OPERATIONS
@@ -855,10 +859,22 @@ class GitHubClient:
         if branch:
             params["branch"] = branch
 
-        response = requests.get(url, headers=self.headers, params=params)
+        # Conditional request: an unchanged list comes back as an empty 304,
+        # which GitHub doesn't count against the rate limit
+        cache_key = (url, branch)
+        cached = self._runs_cache.get(cache_key)
+        headers = {**self.headers, "If-None-Match": cached[0]} if cached else self.headers
+
+        response = requests.get(url, headers=headers, params=params)
+        if response.status_code == 304 and cached:
+            return cached[1]
         response.raise_for_status()
 
-        return response.json().get("workflow_runs", [])
+        runs = response.json().get("workflow_runs", [])
+        etag = response.headers.get("ETag")
+        if etag:
+            self._runs_cache[cache_key] = (etag, runs)
+        return runs
 
     async def get_workflow_run_logs(self, repo_name: str, run_id: int) -> str:
         """
@@ -6,14 +6,38 @@ Phase 5: Multi-project management + Cloudflare Tunnel deployment
 """
 
 import asyncio
-import json
+import bisect
+import contextlib
+import copy
+import hashlib
+import itertools
 import os
-from typing import Dict, List, Optional
+import pickle
+import re
+import signal
+import string
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple, Union
 from datetime import datetime
 from pathlib import Path
 
 import chromadb
-import redis
+import msgspec
+import numpy as np
+try:
+    import orjson
+except ImportError:  # no orjson wheel for this platform: ujson, else stdlib json
+    orjson = None
+    try:
+        import ujson as _fallback_json
+    except ImportError:
+        import json as _fallback_json
+from redis.asyncio import ConnectionPool, Redis
+from chromadb.utils import embedding_functions
 
 from agents.product_manager_agent import ProductManagerAgent
 from agents.project_manager_agent import ProjectManagerAgent
@@ -24,7 +48,631 @@ from agents.devops_agent import DevOpsAgent
 from agents.qa_agent import QAAgent
 from agents.assignment_manager import AssignmentManager
 from agents.worker_daemon import AgentWorkerDaemon
-from agents.github_client import create_github_client
+from agents.github_client import GitHubClient, create_github_client
+from agents.pipeline_monitor import PipelineMonitor
+from agents.claude_worker_pool import DEFAULT_POOL_SIZE, ClaudeWorkerPool
+from agents.vector_memory import open_sqlite_vec_memory
+from utils.event_loop import install_uvloop
+from utils.structured_logger import get_logger
+
+# Records are formatted and written by a background thread (see get_logger)
+logger = get_logger("master_agent", agent_type="master", queued=True)
+
+# Optional pool of long-lived Claude workers speaking an id-framed JSON-lines
+# protocol on stdin/stdout. Unset → every call spawns a fresh `claude -p`.
+CLAUDE_WORKER_CMD = os.getenv("CLAUDE_WORKER_CMD", "")
+CLAUDE_WORKER_POOL_SIZE = int(os.getenv("CLAUDE_WORKER_POOL_SIZE", DEFAULT_POOL_SIZE))
+CLAUDE_CALL_TIMEOUT = 300
+# Seconds a timed-out `claude -p` process group gets to exit after SIGTERM
+CLAUDE_KILL_GRACE = 2.0
+# Output kept per stream from a spawned `claude -p`; beyond it the run is killed
+CLAUDE_MAX_OUTPUT = 4 * 1024 * 1024
+CLAUDE_READ_CHUNK = 64 * 1024
+# Spawned `claude -p` runs allowed at once (the rest wait for a slot)
+CLAUDE_MAX_CONCURRENCY = int(os.getenv("CLAUDE_MAX_CONCURRENCY", "4"))
+# Seconds a failed Claude run is replayed to identical retries instead of respawning
+CLAUDE_FAILURE_TTL = 5.0
+# Largest single reply frame accepted from the persistent worker
+CLAUDE_WORKER_MAX_FRAME = 16 * 1024 * 1024
+
+# Local status overview (git + file listing) reused for bursts of status checks
+STATUS_CACHE_TTL = 2.0
+STATUS_GIT_TIMEOUT = 10.0
+STATUS_MAX_FILES = 15
+# Status requests that want Claude's reading of the code, not just git state
+_STATUS_DETAIL_RE = re.compile(r"\b(?:summar\w*|analy[sz]\w*|explain|review|errors?|logs?|why)\b", re.I)
+
+# Shared async Redis pool size (one pool per MasterAgent process)
+REDIS_MAX_CONNECTIONS = 32
+
+# Intent classification cache (see analyze_intent)
+INTENT_CACHE_SIZE = 512
+INTENT_CACHE_MAX_DISTANCE = 0.15   # cosine distance
+# Only read-only intents may be taken from a semantic neighbour; a close
+# paraphrase can still mean the opposite ("don't deploy yet"), so anything
+# with side effects is confirmed by Claude
+SEMANTIC_SAFE_INTENTS = frozenset({"status_check", "general_query"})
+
+# Project statuses whose next step uses the specialist agents
+PREWARM_STATUSES = frozenset({"ready_for_development", "pipeline_complete"})
+
+# Redis hash of project name → {"repo", "handled_runs"} for running monitors
+MONITORS_KEY = "master:monitors"
+
+# Redis sorted set of project name → last memory write time; the hottest
+# MEMORY_WARM_PROJECTS are queried at startup to reheat the vector index
+MEMORY_HOT_PROJECTS_KEY = "master:memory:hot_projects"
+MEMORY_WARM_PROJECTS = 50
+
+# Pipeline progress events are published to f"{PIPELINE_EVENTS_PREFIX}{repo_name}"
+PIPELINE_EVENTS_PREFIX = "pipeline:events:"
+
+# On-disk layout, resolved once at import
+PIPELINE_HOME = Path.home() / "ai-dev-pipeline"
+DEFAULT_WORKSPACE = PIPELINE_HOME / "projects"
+MEMORY_DIR = PIPELINE_HOME / "memory"
+LOG_DIR = PIPELINE_HOME / "logs"
+
+# Vector memory backend: "chroma" (default) or "sqlite-vec" (int8 vec0 index)
+MEMORY_BACKEND = os.getenv("MEMORY_BACKEND", "chroma").lower()
+
+# Embedding LRU (sha256(text) → vector), persisted across restarts
+EMBED_CACHE_SIZE = int(os.getenv("EMBED_CACHE_SIZE", "1024"))
+EMBED_CACHE_PATH = PIPELINE_HOME / "embed_cache.pkl"
+
+# Semantic query cache in front of retrieve_memory
+QUERY_CACHE_SIZE = 256
+QUERY_CACHE_THRESHOLD = 0.95
+# Concurrent retrieve_memory misses within this window share one query
+QUERY_BATCH_WINDOW = 0.01
+
+# Marker files used by _detect_stack
+_PYTHON_MARKERS = frozenset({"requirements.txt", "pyproject.toml", "setup.py"})
+_NODE_MARKERS = frozenset({"package.json", "node_modules"})
+
+
+# JSON codec: orjson when installed, else ujson, else the stdlib. Every
+# variant reads str or bytes and writes UTF-8 bytes.
+if orjson is not None:
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+
+    def _json_dumps_pretty(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+else:
+    _json_loads = _fallback_json.loads
+
+    def _json_dumps(obj) -> bytes:
+        return _fallback_json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+    def _json_dumps_pretty(obj) -> bytes:
+        return _fallback_json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+
+# The C encoders hold the GIL for a whole dumps call; the stdlib's indented
+# encoder is pure Python, so a dict it serializes off-loop must be a snapshot
+_JSON_DUMPS_ATOMIC = orjson is not None or _fallback_json.__name__ == "ujson"
+
+
+def _scan_stack(path: str) -> str:
+    """Classify a project directory by its marker files (one scandir pass)."""
+    try:
+        with os.scandir(path) as entries:
+            names = {entry.name for entry in entries}
+    except OSError:
+        return "unknown"
+    has_python = not _PYTHON_MARKERS.isdisjoint(names)
+    has_node = not _NODE_MARKERS.isdisjoint(names)
+    if has_python and has_node:
+        return "fullstack"
+    elif has_python:
+        return "python"
+    elif has_node:
+        return "node"
+    return "unknown"
+
+
+# Memory writes are coalesced into one collection add per batch, which
+# runs (with its embedding) in a worker thread off the event loop
+MEMORY_BATCH_SIZE = 32
+MEMORY_FLUSH_INTERVAL = 0.05
+# Recently stored (category, project, content digest) keys; repeats are dropped
+MEMORY_SEEN_SIZE = 4096
+
+# Claude Code interaction log: records are buffered and written in batches
+# by a background flusher, on a short timer or once a batch fills up
+LOG_FLUSH_EVERY = 32
+LOG_FLUSH_BYTES = 64 * 1024
+LOG_FLUSH_INTERVAL = 0.1
+
+# Discord notifications queued within this window go out as one message
+NOTIFY_COALESCE_WINDOW = 0.5
+DISCORD_MESSAGE_LIMIT = 2000
+
+# Exact (normalized) messages that need no classification at all
+_INTENT_KEYWORDS = {
+    "status": "status_check",
+    "project status": "status_check",
+    "deploy": "deploy",
+    "pipeline": "run_pipeline",
+    "run pipeline": "run_pipeline",
+    "run the pipeline": "run_pipeline",
+    "assign issues": "assign_issues",
+    "test": "run_tests",
+    "tests": "run_tests",
+    "run tests": "run_tests",
+    "workers": "workers",
+    "start workers": "workers",
+    "stop workers": "workers",
+    "worker status": "workers",
+}
+
+# Leading command words routed without any model call. An explicit "!"
+# command may trigger side effects; without it only read-only intents
+# match, since a sentence opening with "deploy ..." can still be a question.
+_FAST_INTENT_RE = re.compile(
+    r"^!(?P<command>deploy|status|run\s+(?:the\s+)?pipeline|pipeline|assign\s+issues"
+    r"|run\s+tests|tests?|(?:start\s+|stop\s+)?workers|worker\s+status|new\s+project)\b"
+    r"|^(?P<query>status|project\s+status)\b"
+)
+_FAST_INTENTS = {
+    **_INTENT_KEYWORDS,
+    "new project": "new_project",
+}
+
+# Seed phrases for the semantic intent cache, a few per intent
+_CANONICAL_INTENT_PHRASES = {
+    "new_project": [
+        "create a new web app",
+        "build me a todo application",
+        "start a new project for an online store",
+        "i want to make a blog platform",
+    ],
+    "code_task": [
+        "add a login page",
+        "fix the bug in the signup form",
+        "implement password reset",
+        "refactor the api handlers",
+    ],
+    "status_check": [
+        "what's the status of the project",
+        "how is the project going",
+        "show me the current progress",
+    ],
+    "update_project": [
+        "change the project requirements",
+        "update the prd with a new feature",
+    ],
+    "deploy": [
+        "deploy the app",
+        "ship it to production",
+        "put the project online",
+    ],
+    "run_pipeline": [
+        "run the full pipeline",
+        "kick off the development pipeline",
+    ],
+    "assign_issues": [
+        "assign the github issues to agents",
+        "distribute the open issues",
+    ],
+    "run_tests": [
+        "run the test suite",
+        "check test coverage",
+        "run qa checks",
+    ],
+    "workers": [
+        "start the worker agents",
+        "stop all workers",
+        "are the workers running",
+    ],
+    "general_query": [
+        "hello",
+        "what can you do",
+        "thanks",
+    ],
+}
+
+
+def _normalize_intent_text(message: str) -> str:
+    """Lower-case, collapse whitespace and drop trailing punctuation."""
+    return " ".join(message.lower().split()).strip(" .!?")
+
+
+class _ProjectRegistry(dict):
+    """
+    name → project dict, plus a (created_at, name) index kept sorted with
+    bisect on every insert/removal, so listings never re-sort the projects.
+    The index reflects created_at as of the last assignment of that name.
+    `version` changes on every insert/removal and on touch(), which callers
+    use after editing a project dict in place.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._by_created: List[Tuple[str, str]] = []
+        self.version = 0
+
+    def __setitem__(self, name: str, project: Dict):
+        if name in self:
+            self._unindex(name)
+        super().__setitem__(name, project)
+        bisect.insort(self._by_created, (project.get("created_at", ""), name))
+        self.version += 1
+
+    def __delitem__(self, name: str):
+        self._unindex(name)
+        super().__delitem__(name)
+        self.version += 1
+
+    def pop(self, name: str, *default):
+        if name in self:
+            self._unindex(name)
+            self.version += 1
+        return super().pop(name, *default)
+
+    def clear(self):
+        super().clear()
+        self._by_created.clear()
+        self.version += 1
+
+    def touch(self):
+        self.version += 1
+
+    def _unindex(self, name: str):
+        key = (self[name].get("created_at", ""), name)
+        i = bisect.bisect_left(self._by_created, key)
+        if i < len(self._by_created) and self._by_created[i] == key:
+            del self._by_created[i]
+        else:  # created_at was edited in place since insertion
+            self._by_created = [k for k in self._by_created if k[1] != name]
+
+    def newest_first(self):
+        """Yield (name, project) pairs, most recently created first."""
+        for _, name in reversed(self._by_created):
+            yield name, super().__getitem__(name)
+
+
+def _slice_query_result(result: Dict, index: int, n_results: int) -> Dict:
+    """Extract one query's top-n rows from a batched Chroma-shaped result."""
+    own = {}
+    for key, value in result.items():
+        if isinstance(value, list) and len(value) > index and isinstance(value[index], list):
+            own[key] = [value[index][:n_results]]
+        else:
+            own[key] = value
+    return own
+
+
+def _atomic_write_bytes(path: Path, data: bytes):
+    """
+    Replace `path` with `data` via a single write(2) to a uniquely named
+    sibling temp file, fsync'd and then renamed over the target, so readers
+    never observe a truncated file and concurrent saves never share a temp.
+    """
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        try:
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+            os.fchmod(fd, 0o644)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(tmp)
+        raise
+
+
+async def _kill_process_group(process: asyncio.subprocess.Process):
+    """
+    Stop a subprocess started with start_new_session=True together with
+    every child it spawned (the CLI's node helpers): SIGTERM the group, give
+    it CLAUDE_KILL_GRACE seconds, then SIGKILL whatever is left.
+    """
+    if not hasattr(os, "killpg"):
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+        return
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+    except ProcessLookupError:
+        return
+    try:
+        await asyncio.wait_for(process.wait(), timeout=CLAUDE_KILL_GRACE)
+    except asyncio.TimeoutError:
+        pass
+    try:
+        # Also reaches children that outlived the leader or ignored SIGTERM
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    await process.wait()
+
+
+async def _drain_pipe(stream: asyncio.StreamReader, chunks: List[bytes], limit: int) -> bool:
+    """
+    Collect raw `stream` chunks as they arrive, so a timeout can still
+    report what was produced; decoding happens once, by the caller.
+    Returns False as soon as more than `limit` bytes have been read.
+    """
+    total = 0
+    while True:
+        data = await stream.read(CLAUDE_READ_CHUNK)
+        if not data:
+            return True
+        total += len(data)
+        if total > limit:
+            return False
+        chunks.append(data)
+
+
+def _output_text(chunks: List[bytes], raw: bool = False) -> Union[str, bytes]:
+    """Join drained chunks; decode once unless the caller parses bytes itself."""
+    data = b"".join(chunks)
+    return data if raw else data.decode("utf-8", "replace")
+
+
+def _text_prefix(value: Union[str, bytes], chars: int) -> str:
+    """First `chars` characters of `value`, decoding at most 4 bytes per character."""
+    if isinstance(value, bytes):
+        value = value[:chars * 4].decode("utf-8", "replace")
+    return value[:chars]
+
+
+def _coalesce_notifications(batch: List[Tuple[object, str]]) -> List[Tuple[object, str]]:
+    """
+    Join consecutive (channel, message) pairs for the same channel into as
+    few messages as fit DISCORD_MESSAGE_LIMIT; oversized ones are truncated.
+    """
+    merged: List[Tuple[object, str]] = []
+    for channel, msg in batch:
+        if len(msg) > DISCORD_MESSAGE_LIMIT:
+            msg = msg[:DISCORD_MESSAGE_LIMIT - 3] + "..."
+        if merged and merged[-1][0] is channel and \
+                len(merged[-1][1]) + 2 + len(msg) <= DISCORD_MESSAGE_LIMIT:
+            merged[-1] = (channel, f"{merged[-1][1]}\n\n{msg}")
+        else:
+            merged.append((channel, msg))
+    return merged
+
+
+def _decode_monitor_entry(raw: bytes) -> Dict:
+    """
+    A saved MONITORS_KEY value: msgpack, or JSON as written by earlier
+    versions. Raises ValueError for anything else.
+    """
+    try:
+        entry = msgspec.msgpack.decode(raw)
+    except msgspec.DecodeError:
+        entry = _json_loads(raw)
+    if not isinstance(entry, dict):
+        raise ValueError("monitor entry is not a mapping")
+    return entry
+
+
+def _read_project_metadata(entry: Tuple[float, str]) -> Optional[Tuple[float, Dict]]:
+    """
+    (mtime, parsed project) for one (mtime, path) entry from the workspace
+    scan; unreadable or corrupt files give None.
+    """
+    mtime, path = entry
+    try:
+        with open(path, "rb") as f:
+            return mtime, _json_loads(f.read())
+    except Exception:
+        return None
+
+
+def _format_git_status(porcelain: str) -> List[str]:
+    """Summary lines for `git status --porcelain=v2 --branch` output."""
+    branch, ahead_behind = "(detached)", ""
+    changed = untracked = conflicted = 0
+    for line in porcelain.splitlines():
+        if line.startswith("# branch.head "):
+            branch = line[len("# branch.head "):]
+        elif line.startswith("# branch.ab "):
+            ahead, behind = line[len("# branch.ab "):].split()
+            if ahead != "+0" or behind != "-0":
+                ahead_behind = f" (ahead {ahead[1:]}, behind {behind[1:]})"
+        elif line.startswith(("1 ", "2 ")):
+            changed += 1
+        elif line.startswith("u "):
+            conflicted += 1
+        elif line.startswith("? "):
+            untracked += 1
+
+    lines = [f"🌿 Branch: `{branch}`{ahead_behind}"]
+    if changed or untracked or conflicted:
+        parts = [f"{changed} changed", f"{untracked} untracked"]
+        if conflicted:
+            parts.append(f"{conflicted} conflicted")
+        lines.append(f"📝 Uncommitted: {', '.join(parts)}")
+    else:
+        lines.append("✅ Working tree clean")
+    return lines
+
+
+def _list_project_files(path: str) -> str:
+    """Top-level entries of a project (hidden ones skipped), directories first."""
+    with os.scandir(path) as it:
+        entries = sorted(
+            (not e.is_dir(), e.name + ("/" if e.is_dir() else ""))
+            for e in it if not e.name.startswith(".")
+        )
+    names = [name for _, name in entries]
+    listing = ", ".join(names[:STATUS_MAX_FILES]) or "(empty)"
+    if len(names) > STATUS_MAX_FILES:
+        listing += f" (+{len(names) - STATUS_MAX_FILES} more)"
+    return f"📂 Files: {listing}"
+
+
+# ==========================================
+# INTENT PROMPT (compiled once at import)
+# ==========================================
+
+_INTENT_TEMPLATE = string.Template("""
+Analyze this user message and determine the intent.
+Return ONLY a JSON object with the intent classification.
+
+Possible intents:
+- new_project: User wants to start a new project
+- code_task: User wants to implement a feature or fix something
+- status_check: User wants to know current project status
+- update_project: User wants to modify existing project
+- deploy: User wants to deploy the project
+- run_pipeline: User wants to run the full automated pipeline
+- assign_issues: User wants to assign GitHub issues to agents
+- run_tests: User wants to run tests or QA checks
+- workers: User wants to start, stop, or check status of worker agents
+- general_query: General question or conversation
+
+User message: "$message"
+
+Return format:
+{"intent": "intent_name", "confidence": 0.95, "reasoning": "brief explanation"}
+""")
+
+# ==========================================
+# HANDLER PROMPTS (compiled once at import)
+# ==========================================
+
+_CODE_TASK_TMPL = string.Template("""
+Implement the following task for the current project:
+
+"$message"
+
+Context:
+- Project: $project_name
+- Original Requirements: $requirements
+
+Steps:
+1. Analyze the current codebase
+2. Identify files that need to be created or modified
+3. Implement the changes
+4. Test the changes if applicable
+5. Commit the changes to git
+""")
+
+_STATUS_PROMPT = """
+Analyze the current project and provide a brief status update:
+1. List key files that exist
+2. Check git status (any uncommitted changes?)
+3. Any errors visible in logs?
+Provide a concise 3-5 line summary.
+"""
+
+_GENERAL_QUERY_TMPL = string.Template("""
+Answer this question from the user:
+
+"$message"
+
+Relevant context from previous conversations:
+$context
+
+Current project: $project_name
+
+Provide a helpful, friendly response.
+""")
+
+# JSON object inside an optional ```json fence in Claude's reply
+_FENCE_RE = re.compile(r"```(?:json)?\s*(\{.*?\})\s*```", re.S)
+_FENCE_RE_BYTES = re.compile(_FENCE_RE.pattern.encode(), re.S)
+
+
+# ==========================================
+# RESPONSE TEMPLATES (compiled once at import)
+# ==========================================
+
+_NEW_PROJECT_TMPL = string.Template("""
+✅ **Project Created Successfully!**
+
+📁 **Project**: `$project_name`
+📄 **PRD**: $prd_size KB
+🐙 **GitHub**: $repo_url
+📋 **Issues**: $issues_created created
+
+**What Just Happened:**
+1. ✅ Product Manager analyzed your requirements
+2. ✅ Created comprehensive PRD with user stories
+3. ✅ Project Manager created GitHub repository
+4. ✅ Generated $issues_created issues from PRD
+5. ✅ Set up branches, labels, and protection rules
+
+**Next Steps:**
+- Say `run pipeline` to fully automate development
+- Say `assign issues` to route issues to specialized agents
+- Say `status` to see current project state
+
+**Repository**: $repo_url
+**Local Path**: $project_path
+
+Your project is ready for development! 🚀
+""")
+
+_PIPELINE_COMPLETE_TMPL = string.Template("""
+🎉 **Full Pipeline Complete!**
+
+$steps_summary
+**Project**: `$project_name`
+**Repository**: $repo_url
+$push_status$monitor_status$deploy_status
+
+The pipeline has automatically:
+- Designed database schema and migrations
+- Set up CI/CD with GitHub Actions
+- Created Docker configuration for deployment
+- Assigned issues to specialized agents for implementation
+- Configured QA validation for all pull requests
+
+Your project is ready for automated development! 🚀
+""")
+
+_PROJECT_STATUS_TMPL = string.Template("""
+📊 **Project Status**
+
+📁 **Project**: $project_name
+🔗 **Repository**: $repo_url
+📅 **Created**: $created_at
+🔄 **Status**: $status$deploy_line
+
+**Agent Queue Status:**
+$queue_str
+
+**Codebase Overview:**
+$overview
+""")
+
+_TEST_RESULTS_TMPL = string.Template("""
+$status_icon **Test Results**
+
+**Project**: $project_name
+**Tests Passed**: $passed
+**Coverage**: $coverage
+
+**Output:**
+```
+$output
+```
+""")
+
+_DEPLOYED_TMPL = string.Template(
+    "🌐 **Deployed!**\n\n"
+    "**Project**: `$project_name`\n"
+    "**URL**: $url\n"
+    "**Host Port**: $port"
+    "$note"
+)
+
+_WORKER_STATUS_TMPL = string.Template(
+    "📊 **Worker Status**\n\n"
+    "**Running**: $running\n\n"
+    "**Queue Sizes:**\n$queue_lines\n\n"
+    "**Worker States:**\n$state_lines"
+)
 
 
 class MasterAgent:
@@ -41,24 +689,110 @@ class MasterAgent:
     6. QA Agent → Review PRs, run tests, validate coverage
     7. DevOps Agent → CI/CD, Docker, deployment config
     8. Deployer → Docker + Cloudflare Tunnel → public URL
+
+    Every handler is async and I/O bound (Redis, Chroma, Claude Code
+    subprocesses, HTTP); run it under uvloop — entry points call
+    utils.event_loop.install_uvloop() before starting their loop.
     """
 
+    # Intent → name of the handler method, called as handler(message, user_id)
+    _HANDLERS = {
+        "new_project": "handle_new_project",
+        "code_task": "handle_code_task",
+        "status_check": "handle_status_check",
+        "update_project": "handle_update_project",
+        "deploy": "handle_deploy_project",
+        "run_pipeline": "handle_run_full_pipeline",
+        "assign_issues": "handle_assign_issues",
+        "run_tests": "handle_run_tests",
+        "workers": "handle_workers",
+        "monitor": "handle_monitor_status",
+        "general_query": "handle_general_query",
+    }
+
+    # `!workers` action word → method; anything else reports status
+    _WORKER_ACTIONS = {
+        "start": "start_workers",
+        "stop": "stop_workers",
+        "status": "worker_status",
+    }
+
     def __init__(self, workspace_dir: str = None):
         if workspace_dir is None:
-            workspace_dir = str(Path.home() / "ai-dev-pipeline" / "projects")
+            workspace_dir = DEFAULT_WORKSPACE
 
         self.workspace_dir = Path(workspace_dir)
         self.workspace_dir.mkdir(parents=True, exist_ok=True)
 
-        # Initialize memory system (ChromaDB)
-        memory_path = str(Path.home() / "ai-dev-pipeline" / "memory" / "vector_store")
-        self.memory_client = chromadb.PersistentClient(path=memory_path)
-        self.memory = self.memory_client.get_or_create_collection(name="master_memory")
-
-        # Initialize Redis for agent communication
+        # Initialize memory system (ChromaDB, or sqlite-vec when opted in)
+        self._embedding_fn = embedding_functions.DefaultEmbeddingFunction()
+        self.memory = None
+        if MEMORY_BACKEND == "sqlite-vec":
+            self.memory = open_sqlite_vec_memory(MEMORY_DIR / "memory.sqlite")
+        self._intent_collection = None
+        if self.memory is None:
+            self.memory_client = chromadb.PersistentClient(path=str(MEMORY_DIR / "vector_store"))
+            self.memory = self.memory_client.get_or_create_collection(
+                name="master_memory", embedding_function=self._embedding_fn
+            )
+            # Semantic intent cache: message embedding → classified intent
+            self._intent_collection = self.memory_client.get_or_create_collection(
+                name="intent_cache",
+                embedding_function=self._embedding_fn,
+                metadata={"hnsw:space": "cosine"},
+            )
+        # normalized message → intent dict, most recently used last
+        self._intent_cache: "OrderedDict[str, Dict]" = OrderedDict()
+        self._embed_cache: "OrderedDict[str, np.ndarray]" = self._load_embed_cache()
+        # _embed_many runs both on the loop and in memory-writer threads
+        self._embed_lock = threading.Lock()
+
+        # (unit float32 query vector, (n_results, category), result) + last-used ticks for LRU
+        self._qcache: List[Tuple[np.ndarray, Tuple, Dict]] = []
+        self._qcache_used: List[int] = []
+        self._qcache_tick = 0
+        self._qcache_matrix: Optional[np.ndarray] = None
+        # Bumped on every invalidation; a query that overlapped one isn't cached
+        self._qcache_gen = 0
+
+        # Pending (embedding, unit vector, (n_results, category), future) query misses
+        self._qbuf: List[Tuple[List[float], np.ndarray, Tuple, asyncio.Future]] = []
+        self._qbuf_task: Optional[asyncio.Task] = None
+
+        # Pending (id, document, metadata) memory writes + their flusher task
+        self._mem_queue: List[Tuple[str, str, Dict]] = []
+        self._mem_flusher: Optional[asyncio.Task] = None
+        self._mem_wakeup = asyncio.Event()      # set when a full batch is waiting
+        self._mem_write_lock = asyncio.Lock()   # keeps batch writes in order
+        self._mem_seen: "OrderedDict[str, None]" = OrderedDict()   # recent memory ids
+
+        # Categories known to have (or, after a store check, lack) memories
+        self._known_cats: Set[str] = set()
+        self._absent_cats: Set[str] = set()
+
+        # Long-lived per-day handle for the Claude Code interaction log
+        self._log_dir = LOG_DIR
+        self._log_dir.mkdir(parents=True, exist_ok=True)
+        self._log_fd: Optional[int] = None
+        self._log_date = None
+        self._log_buffer: List[bytes] = []
+        self._log_buffer_bytes = 0
+        self._log_buffer_date = None
+        self._log_lock = asyncio.Lock()
+        self._log_flusher: Optional[asyncio.Task] = None
+        self._log_wakeup = asyncio.Event()      # set when a full batch is waiting
+
+        # Initialize Redis for agent communication: one async pool per process.
+        # Replies stay raw bytes; values are msgpack/JSON decoded straight from them
         redis_host = os.getenv("REDIS_HOST", "localhost")
         redis_port = int(os.getenv("REDIS_PORT", 6379))
-        self.redis = redis.Redis(host=redis_host, port=redis_port, decode_responses=True)
+        self.redis_pool = ConnectionPool(
+            host=redis_host,
+            port=redis_port,
+            decode_responses=False,
+            max_connections=REDIS_MAX_CONNECTIONS,
+        )
+        self.redis = Redis(connection_pool=self.redis_pool)
 
         # Core agents (always needed)
         self.pm_agent = ProductManagerAgent(agent_id="pm_main")
@@ -71,9 +805,17 @@ class MasterAgent:
         self._devops_agent: Optional[DevOpsAgent] = None
         self._qa_agent: Optional[QAAgent] = None
         self._assignment_manager: Optional[AssignmentManager] = None
+        self._agent_locks = {
+            attr: threading.Lock()
+            for attr in ("_backend_agent", "_frontend_agent", "_database_agent",
+                         "_devops_agent", "_qa_agent", "_assignment_manager")
+        }
+        self._github_client: Optional[GitHubClient] = None
 
         # Phase 5: Multi-project state
-        self._projects: Dict[str, Dict] = {}
+        self._projects = _ProjectRegistry()
+        # (projects version, active name, monitor state) → dashboard rows
+        self._status_snapshot: Optional[Tuple[Tuple, Dict]] = None
         self._active_project_name: Optional[str] = None
 
         # Pipeline state tracking
@@ -84,14 +826,46 @@ class MasterAgent:
         self._worker_daemon: Optional[AgentWorkerDaemon] = None
         self._worker_task: Optional[asyncio.Task] = None
 
+        # project path → (directory mtime_ns, detected stack)
+        self._stack_cache: Dict[str, Tuple[int, str]] = {}
+
+        # Fire-and-forget pipeline events, published in order by one task
+        self._outbox: List[Tuple[str, Dict]] = []
+        self._outbox_task: Optional[asyncio.Task] = None
+
+        # Every live background task, so shutdown can cancel them together
+        self._tasks: Set[asyncio.Task] = set()
+
         # Phase 4/5: proactive Discord notifications + per-project CI monitors
         self._notify_channel = None
-        self._monitors: Dict[str, object] = {}   # project_name → PipelineMonitor
-
-        # Restore all projects from disk
+        self._notify_queue: List[Tuple[object, str]] = []   # (channel, message)
+        self._notify_flusher: Optional[asyncio.Task] = None
+        self._monitor = None   # shared PipelineMonitor, created on first use
+
+        # Persistent Claude workers (see CLAUDE_WORKER_CMD), created on first use
+        self._claude_pool: Optional[ClaudeWorkerPool] = None
+        # Spawned `claude -p` runs still in flight, killed on shutdown
+        self._claude_procs: Set[asyncio.subprocess.Process] = set()
+        self._claude_slots = asyncio.Semaphore(CLAUDE_MAX_CONCURRENCY)
+        # Local status overviews: project path -> (monotonic time, text)
+        self._status_cache: Dict[str, Tuple[float, str]] = {}
+        # Recent failed runs: request digest -> (monotonic time, result)
+        self._claude_failures: Dict[bytes, Tuple[float, Dict]] = {}
+
+        # Restore all projects from disk (in the background inside a loop)
+        self._restore_task: Optional[asyncio.Task] = None
         self._restore_all_projects()
 
-        print("🧠 Master Agent initialized (Phase 5)")
+        # Build the specialist agents in the background if a restored project
+        # will need them; without a running loop, start on the first message.
+        self._warmup_task: Optional[asyncio.Task] = None
+        try:
+            asyncio.get_running_loop()
+            self._start_prewarm()
+        except RuntimeError:
+            pass
+
+        logger.info("🧠 Master Agent initialized (Phase 5)")
 
     # ==========================================
     # MULTI-PROJECT: current_project property
@@ -123,39 +897,98 @@ class MasterAgent:
 
     @property
     def backend_agent(self) -> BackendAgent:
-        if not self._backend_agent:
-            self._backend_agent = BackendAgent(agent_id="backend_main")
-        return self._backend_agent
+        return self._lazy("_backend_agent", lambda: BackendAgent(agent_id="backend_main"))
 
     @property
     def frontend_agent(self) -> FrontendAgent:
-        if not self._frontend_agent:
-            self._frontend_agent = FrontendAgent(agent_id="frontend_main")
-        return self._frontend_agent
+        return self._lazy("_frontend_agent", lambda: FrontendAgent(agent_id="frontend_main"))
 
     @property
     def database_agent(self) -> DatabaseAgent:
-        if not self._database_agent:
-            self._database_agent = DatabaseAgent(agent_id="database_main")
-        return self._database_agent
+        return self._lazy("_database_agent", lambda: DatabaseAgent(agent_id="database_main"))
 
     @property
     def devops_agent(self) -> DevOpsAgent:
-        if not self._devops_agent:
-            self._devops_agent = DevOpsAgent(agent_id="devops_main")
-        return self._devops_agent
+        return self._lazy("_devops_agent", lambda: DevOpsAgent(agent_id="devops_main"))
 
     @property
     def qa_agent(self) -> QAAgent:
-        if not self._qa_agent:
-            self._qa_agent = QAAgent(agent_id="qa_main")
-        return self._qa_agent
+        return self._lazy("_qa_agent", lambda: QAAgent(agent_id="qa_main"))
 
     @property
     def assignment_manager(self) -> AssignmentManager:
-        if not self._assignment_manager:
-            self._assignment_manager = AssignmentManager()
-        return self._assignment_manager
+        return self._lazy("_assignment_manager", AssignmentManager)
+
+    def _lazy(self, attr: str, factory):
+        """
+        Build a lazily initialised agent once. _prewarm constructs agents in
+        worker threads, so a handler reading the same property meanwhile
+        waits for that instance instead of creating a second one.
+        """
+        agent = getattr(self, attr)
+        if not agent:
+            with self._agent_locks[attr]:
+                agent = getattr(self, attr)
+                if not agent:
+                    agent = factory()
+                    setattr(self, attr, agent)
+        return agent
+
+    @property
+    def github_client(self) -> GitHubClient:
+        """Shared GitHub client; raises ValueError while credentials are missing."""
+        if not self._github_client:
+            self._github_client = create_github_client()
+        return self._github_client
+
+    def _spawn_task(self, coro) -> asyncio.Task:
+        """Start a background task that shutdown() will cancel and await."""
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def _start_prewarm(self):
+        if self._warmup_task is None:
+            self._warmup_task = self._spawn_task(self._prewarm())
+
+    async def _prewarm(self):
+        """
+        Seed the semantic intent cache, resume saved CI/CD monitoring, reheat
+        the memory index for recently active projects, spawn the Claude
+        worker pool, then construct the specialist agents concurrently in
+        worker threads (each opens a Redis subscription) so the first pipeline
+        request doesn't pay for it. Agents are only built when a restored
+        project is past planning.
+        """
+        try:
+            await asyncio.to_thread(self._warm_intent_cache)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not warm intent cache: {e}")
+        await self._ensure_restored()
+        await self._rehydrate_monitors()
+        if not self._embed_cache:
+            try:
+                seeded = await asyncio.to_thread(self._seed_embed_cache_from_store)
+                if seeded:
+                    logger.info(f"🔥 Seeded embedding cache with {seeded} stored vectors")
+            except Exception as e:
+                logger.warning(f"⚠️ Could not seed embedding cache: {e}")
+        await self._warm_memory_cache()
+        pool = self._get_claude_pool()
+        if pool:
+            await pool.start()
+
+        if not any(p.get("status") in PREWARM_STATUSES for p in self._projects.values()):
+            return
+        start = time.monotonic()
+        names = ("backend_agent", "frontend_agent", "database_agent", "qa_agent")
+        results = await asyncio.gather(
+            *(asyncio.to_thread(getattr, self, name) for name in names),
+            return_exceptions=True,
+        )
+        warmed = sum(1 for r in results if not isinstance(r, Exception))
+        logger.info(f"🔥 Prewarmed {warmed} agents in {time.monotonic() - start:.1f}s")
 
     # ==========================================
     # MAIN MESSAGE ENTRY POINT
@@ -166,79 +999,124 @@ class MasterAgent:
         Main entry point for all user messages.
         Analyzes intent and routes to appropriate handler.
         """
-        print(f"📨 Processing message from {user_id}: {message[:100]}...")
+        logger.info(f"📨 Processing message from {user_id}: {message[:100]}...")
+        self._start_prewarm()
+        await self._ensure_restored()
 
-        await self.store_memory(
-            category="user_message",
-            content=message,
-            metadata={"user_id": user_id, "timestamp": datetime.now().isoformat()},
-        )
+        # Both sides of the turn are written together once the handler returns
+        memories = [(
+            "user_message",
+            message,
+            {"user_id": user_id, "timestamp": datetime.now().isoformat()},
+        )]
 
         intent_result = await self.analyze_intent(message)
         intent = intent_result.get("intent", "general_query")
-        print(f"🎯 Detected intent: {intent}")
-
-        handlers = {
-            "new_project": self.handle_new_project,
-            "code_task": self.handle_code_task,
-            "status_check": self.handle_status_check,
-            "update_project": self.handle_update_project,
-            "deploy": self.handle_deploy_project,
-            "run_pipeline": self.handle_run_full_pipeline,
-            "assign_issues": self.handle_assign_issues,
-            "run_tests": self.handle_run_tests,
-            "workers": self.handle_workers,
-            "monitor": lambda msg, uid: self.handle_monitor_status(msg),
-            "general_query": self.handle_general_query,
-        }
+        logger.info(f"🎯 Detected intent: {intent}")
 
-        handler = handlers.get(intent, self.handle_general_query)
+        handler = getattr(self, self._HANDLERS.get(intent, "handle_general_query"))
         response = await handler(message, user_id)
 
-        await self.store_memory(
-            category="agent_response",
-            content=response,
-            metadata={"user_id": user_id, "intent": intent},
-        )
+        memories.append(("agent_response", response, {"user_id": user_id, "intent": intent}))
+        await self.store_memories(memories)
 
         return response
 
     async def analyze_intent(self, message: str) -> Dict:
-        """Analyze user message to determine intent."""
-        prompt = f"""
-Analyze this user message and determine the intent.
-Return ONLY a JSON object with the intent classification.
-
-Possible intents:
-- new_project: User wants to start a new project
-- code_task: User wants to implement a feature or fix something
-- status_check: User wants to know current project status
-- update_project: User wants to modify existing project
-- deploy: User wants to deploy the project
-- run_pipeline: User wants to run the full automated pipeline
-- assign_issues: User wants to assign GitHub issues to agents
-- run_tests: User wants to run tests or QA checks
-- workers: User wants to start, stop, or check status of worker agents
-- general_query: General question or conversation
+        """
+        Classify a user message. Cheap layers are tried first — the keyword
+        table, the leading-command regex, the exact-message LRU, then the nearest semantic neighbour in
+        the intent_cache collection (read-only intents only) — and Claude is
+        only called on a miss.
+        """
+        normalized = _normalize_intent_text(message)
+        if normalized in _INTENT_KEYWORDS:
+            return {"intent": _INTENT_KEYWORDS[normalized], "confidence": 1.0, "reasoning": "keyword"}
+
+        fast = _FAST_INTENT_RE.match(message.lstrip().lower())
+        if fast:
+            phrase = " ".join((fast.group("command") or fast.group("query")).split())
+            return {"intent": _FAST_INTENTS[phrase], "confidence": 1.0, "reasoning": "command"}
+
+        cached = self._intent_cache.get(normalized)
+        if cached is not None:
+            self._intent_cache.move_to_end(normalized)
+            return dict(cached)
+
+        # Embedding + Chroma calls run in a worker thread, off the event loop
+        similar = await asyncio.to_thread(self._lookup_similar_intent, normalized)
+        if similar is not None:
+            self._remember_intent(normalized, similar)
+            return dict(similar)
+
+        result = await self._classify_intent_with_claude(message)
+        if result.get("reasoning") != "Parse error" and result.get("intent"):
+            self._remember_intent(normalized, result)
+            await asyncio.to_thread(self._upsert_intent, normalized, result)
+        return result
+
+    def _lookup_similar_intent(self, normalized: str) -> Optional[Dict]:
+        if self._intent_collection is None:
+            return None
+        try:
+            hits = self._intent_collection.query(
+                query_embeddings=self._embed_many([normalized]), n_results=1
+            )
+            distances = hits.get("distances") or [[]]
+            if distances[0] and distances[0][0] < INTENT_CACHE_MAX_DISTANCE:
+                intent = hits["metadatas"][0][0]["intent"]
+                if intent in SEMANTIC_SAFE_INTENTS:
+                    return {"intent": intent, "confidence": 0.9, "reasoning": "semantic cache"}
+        except Exception as e:
+            logger.warning(f"⚠️ Intent cache lookup failed: {e}")
+        return None
+
+    def _remember_intent(self, normalized: str, result: Dict):
+        self._intent_cache[normalized] = result
+        self._intent_cache.move_to_end(normalized)
+        while len(self._intent_cache) > INTENT_CACHE_SIZE:
+            self._intent_cache.popitem(last=False)
+
+    def _upsert_intent(self, normalized: str, result: Dict):
+        """Add a Claude-classified message to the semantic intent cache."""
+        if self._intent_collection is None:
+            return
+        try:
+            self._intent_collection.upsert(
+                ids=[hashlib.sha256(normalized.encode("utf-8")).hexdigest()],
+                documents=[normalized],
+                embeddings=self._embed_many([normalized]),
+                metadatas=[{"intent": result["intent"]}],
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ Intent cache write failed: {e}")
 
-User message: "{message}"
+    def _warm_intent_cache(self):
+        """Seed the semantic intent cache with canonical phrasings (idempotent)."""
+        if self._intent_collection is None:
+            return
+        phrases = [(intent, phrase) for intent, group in _CANONICAL_INTENT_PHRASES.items() for phrase in group]
+        documents = [phrase for _, phrase in phrases]
+        self._intent_collection.upsert(
+            ids=[f"canonical_{hashlib.sha256(p.encode('utf-8')).hexdigest()[:16]}" for p in documents],
+            documents=documents,
+            embeddings=[list(map(float, v)) for v in self._embedding_fn(documents)],
+            metadatas=[{"intent": intent} for intent, _ in phrases],
+        )
 
-Return format:
-{{"intent": "intent_name", "confidence": 0.95, "reasoning": "brief explanation"}}
-"""
-        result = await self.call_claude_code(prompt, allowed_tools=["Write"])
+    async def _classify_intent_with_claude(self, message: str) -> Dict:
+        prompt = _INTENT_TEMPLATE.substitute(message=message)
+        result = await self.call_claude_code(prompt, allowed_tools=["Write"], raw=True)
 
         try:
-            stdout = result.get("stdout", "{}")
-            if "```json" in stdout:
-                json_str = stdout.split("```json")[1].split("```")[0].strip()
-            elif "```" in stdout:
-                json_str = stdout.split("```")[1].split("```")[0].strip()
-            else:
-                json_str = stdout.strip()
-            return json.loads(json_str)
+            # Spawned runs hand back bytes (parsed without a decode);
+            # persistent workers reply with str
+            stdout = result.get("stdout") or b"{}"
+            fence = _FENCE_RE_BYTES if isinstance(stdout, bytes) else _FENCE_RE
+            m = fence.search(stdout)
+            return _json_loads(m.group(1) if m else stdout.strip())
         except Exception as e:
-            print(f"⚠️ Intent parsing failed: {e}")
+            logger.warning(f"⚠️ Intent parsing failed: {e}")
             return {"intent": "general_query", "confidence": 0.5, "reasoning": "Parse error"}
 
     # ==========================================
@@ -247,24 +1125,23 @@ Return format:
 
     async def handle_new_project(self, message: str, user_id: str) -> str:
         """Initialize a new project using PM and Project Manager agents."""
-        print("🚀 Initializing new project...")
+        logger.info("🚀 Initializing new project...")
 
         project_name = f"project_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        project_path = self.workspace_dir / project_name
-        project_path.mkdir(parents=True, exist_ok=True)
-        (project_path / "docs").mkdir(exist_ok=True)
+        project_path = os.path.join(self.workspace_dir, project_name)
+        os.makedirs(os.path.join(project_path, "docs"), exist_ok=True)   # creates both levels
 
         # Step 1: PRD
         try:
             prd_result = await self.pm_agent.create_prd_from_scratch(
                 requirements=message,
                 project_name=project_name,
-                project_path=str(project_path),
+                project_path=project_path,
             )
             if not prd_result["success"]:
                 return "❌ Failed to create PRD. Please try again."
             prd_path = prd_result["prd_path"]
-            prd_size = Path(prd_path).stat().st_size / 1024
+            prd_size = os.path.getsize(prd_path) / 1024
         except Exception as e:
             diagnosis = self._format_error_for_discord(
                 e, {"stage": "PRD creation", "project": project_name}
@@ -290,7 +1167,7 @@ Return format:
         # Store project
         self.current_project = {
             "name": project_name,
-            "path": str(project_path),
+            "path": project_path,
             "prd_path": prd_path,
             "repo_url": repo_url,
             "repo_name": repo_name,
@@ -301,44 +1178,28 @@ Return format:
         }
         await self.save_project_metadata()
 
-        return f"""
-✅ **Project Created Successfully!**
-
-📁 **Project**: `{project_name}`
-📄 **PRD**: {prd_size:.2f} KB
-🐙 **GitHub**: {repo_url}
-📋 **Issues**: {issues_created} created
-
-**What Just Happened:**
-1. ✅ Product Manager analyzed your requirements
-2. ✅ Created comprehensive PRD with user stories
-3. ✅ Project Manager created GitHub repository
-4. ✅ Generated {issues_created} issues from PRD
-5. ✅ Set up branches, labels, and protection rules
-
-**Next Steps:**
-- Say `run pipeline` to fully automate development
-- Say `assign issues` to route issues to specialized agents
-- Say `status` to see current project state
-
-**Repository**: {repo_url}
-**Local Path**: {project_path}
-
-Your project is ready for development! 🚀
-"""
+        return _NEW_PROJECT_TMPL.substitute(
+            project_name=project_name,
+            prd_size=f"{prd_size:.2f}",
+            repo_url=repo_url,
+            issues_created=issues_created,
+            project_path=project_path,
+        )
 
     async def handle_run_full_pipeline(self, message: str, user_id: str) -> str:
         """Run the full autonomous development pipeline end-to-end."""
-        if not self.current_project:
+        # Bound once: the run takes minutes and the active project may change
+        project = self.current_project
+        if not project:
             return "❌ No active project. Please start a new project first."
 
-        project_path = self.current_project["path"]
-        prd_path = self.current_project.get("prd_path", "")
-        repo_name = self.current_project.get("repo_name", "")
-        project_name = self.current_project["name"]
+        project_path = project["path"]
+        prd_path = project.get("prd_path", "")
+        repo_name = project.get("repo_name", "")
+        project_name = project["name"]
 
         self._pipeline_steps = []
-        print("\n🚀 Starting Full Autonomous Development Pipeline...\n")
+        logger.info("🚀 Starting Full Autonomous Development Pipeline...")
 
         result = await self.run_full_pipeline(
             project_path=project_path,
@@ -346,8 +1207,8 @@ Your project is ready for development! 🚀
             repo_name=repo_name,
         )
 
-        self.current_project["status"] = "pipeline_complete"
-        await self.save_project_metadata()
+        project["status"] = "pipeline_complete"
+        await self.save_project_metadata(project)
 
         # --- Auto-push generated code to GitHub ---
         push_status = ""
@@ -365,7 +1226,7 @@ Your project is ready for development! 🚀
                 )
                 if pushed:
                     push_succeeded = True
-                    repo_url = self.current_project.get("repo_url", "")
+                    repo_url = project.get("repo_url", "")
                     push_status = f"\n🚀 Code pushed to {repo_url or repo_name}"
                 else:
                     push_status = "\n⚠️ Auto-push failed — check logs and push manually."
@@ -378,11 +1239,7 @@ Your project is ready for development! 🚀
         monitor_status = ""
         if push_succeeded:
             try:
-                from agents.pipeline_monitor import PipelineMonitor
-                github_client = create_github_client()
-                monitor = PipelineMonitor(master=self, github=github_client)
-                await monitor.start()
-                self._monitors[project_name] = monitor
+                await self._start_project_monitor(project_name)
                 monitor_status = "\n🔍 CI/CD monitor started — watching for failures."
             except Exception as e:
                 monitor_status = f"\n⚠️ Could not start monitor: {str(e)[:100]}"
@@ -397,8 +1254,8 @@ Your project is ready for development! 🚀
             )
             if deploy_result["success"]:
                 url = deploy_result["url"]
-                self.current_project["deploy_url"] = url
-                await self.save_project_metadata()
+                project["deploy_url"] = url
+                await self.save_project_metadata(project)
                 deploy_status = f"\n🌐 Live at: {url}"
                 if deploy_result.get("error"):
                     deploy_status += f" _(note: {deploy_result['error']})_"
@@ -413,23 +1270,14 @@ Your project is ready for development! 🚀
             status_icon = "✅" if step.get("success") else "❌"
             steps_summary += f"{status_icon} **{step['name']}**: {step.get('message', '')}\n"
 
-        return f"""
-🎉 **Full Pipeline Complete!**
-
-{steps_summary}
-**Project**: `{project_name}`
-**Repository**: {self.current_project.get('repo_url', 'N/A')}
-{push_status}{monitor_status}{deploy_status}
-
-The pipeline has automatically:
-- Designed database schema and migrations
-- Set up CI/CD with GitHub Actions
-- Created Docker configuration for deployment
-- Assigned issues to specialized agents for implementation
-- Configured QA validation for all pull requests
-
-Your project is ready for automated development! 🚀
-"""
+        return _PIPELINE_COMPLETE_TMPL.substitute(
+            steps_summary=steps_summary,
+            project_name=project_name,
+            repo_url=project.get("repo_url", "N/A"),
+            push_status=push_status,
+            monitor_status=monitor_status,
+            deploy_status=deploy_status,
+        )
 
     async def run_full_pipeline(
         self,
@@ -438,28 +1286,68 @@ Your project is ready for automated development! 🚀
         repo_name: str,
         db_type: str = "postgresql",
     ) -> Dict:
-        """Execute the full development pipeline."""
-        steps = []
+        """
+        Execute the full development pipeline.
 
-        # Stage 1: Database Setup
-        print("📊 Stage 1/4: Setting up database schema...")
+        Database setup, DevOps setup and QA configuration don't depend on
+        each other and run concurrently; issue assignment runs once they
+        finish. Steps are reported in the fixed stage order regardless.
+        Each stage publishes its step to the pipeline events channel as
+        soon as it finishes, followed by a final "summary" event.
+        """
+        channel = f"{PIPELINE_EVENTS_PREFIX}{repo_name}"
+        stage_names = ["Database Setup", "DevOps / CI-CD Setup", "QA Configuration"]
+
+        logger.info("⚡ Stages 1, 2, 4 of 4: database, CI/CD and QA setup in parallel...")
+        results = await asyncio.gather(
+            self._stage_db(channel, project_path, prd_path, db_type),
+            self._stage_devops(channel, project_path, repo_name),
+            self._stage_qa_config(channel, project_path),
+            return_exceptions=True,
+        )
+        db_step, devops_step, qa_step = [
+            {"name": name, "success": False, "message": str(result)}
+            if isinstance(result, BaseException) else result
+            for name, result in zip(stage_names, results)
+        ]
+
+        assign_step = await self._stage_assign(channel, project_path, repo_name)
+
+        steps = [db_step, devops_step, assign_step, qa_step]
+        success_count = sum(1 for s in steps if s.get("success"))
+        self._publish_later([(channel, {
+            "type": "summary",
+            "steps_succeeded": success_count,
+            "steps_total": len(steps),
+        })])
+        return {
+            "success": success_count > 0,
+            "steps": steps,
+            "steps_succeeded": success_count,
+            "steps_total": len(steps),
+        }
+
+    async def _stage_db(self, channel: str, project_path: str, prd_path: str, db_type: str) -> Dict:
+        logger.info("📊 Stage 1/4: Setting up database schema...")
         try:
             db_result = await self.database_agent.setup_database_for_project(
                 project_path=project_path,
                 prd_path=prd_path,
                 db_type=db_type,
             )
-            steps.append({
+            step = {
                 "name": "Database Setup",
                 "success": db_result.get("success", False),
                 "message": db_result.get("message", ""),
-            })
-            print("  ✅ Database schema created")
+            }
+            logger.info("  ✅ Database schema created")
         except Exception as e:
-            steps.append({"name": "Database Setup", "success": False, "message": str(e)})
+            step = {"name": "Database Setup", "success": False, "message": str(e)}
+        self._publish_later([(channel, {"type": "step", **step})])
+        return step
 
-        # Stage 2: DevOps Setup
-        print("🔧 Stage 2/4: Setting up CI/CD and Docker...")
+    async def _stage_devops(self, channel: str, project_path: str, repo_name: str) -> Dict:
+        logger.info("🔧 Stage 2/4: Setting up CI/CD and Docker...")
         try:
             devops_result = await self.devops_agent.setup_cicd_pipeline({
                 "task_type": "setup_cicd_pipeline",
@@ -467,34 +1355,40 @@ Your project is ready for automated development! 🚀
                 "repo_name": repo_name,
                 "stack": self._detect_stack(project_path),
             })
-            steps.append({
+            step = {
                 "name": "DevOps / CI-CD Setup",
                 "success": devops_result.get("success", False),
                 "message": devops_result.get("message", ""),
-            })
-            print("  ✅ CI/CD and Docker configured")
+            }
+            logger.info("  ✅ CI/CD and Docker configured")
         except Exception as e:
-            steps.append({"name": "DevOps / CI-CD Setup", "success": False, "message": str(e)})
+            step = {"name": "DevOps / CI-CD Setup", "success": False, "message": str(e)}
+        self._publish_later([(channel, {"type": "step", **step})])
+        return step
 
-        # Stage 3: Auto-Assign Issues
-        print("📋 Stage 3/4: Assigning issues to agents...")
+    async def _stage_assign(self, channel: str, project_path: str, repo_name: str) -> Dict:
+        logger.info("📋 Stage 3/4: Assigning issues to agents...")
+        assign_events = []
         try:
             assign_result = await self.assignment_manager.assign_all_issues(
                 repo_name=repo_name,
                 project_path=project_path,
             )
             assigned = assign_result.get("assigned", 0)
-            steps.append({
+            step = {
                 "name": "Issue Assignment",
                 "success": assign_result.get("success", False),
                 "message": f"Assigned {assigned} issues to specialized agents",
-            })
-            print(f"  ✅ {assigned} issues assigned to agents")
+            }
+            assign_events = self._assignment_events(channel, assign_result)
+            logger.info(f"  ✅ {assigned} issues assigned to agents")
         except Exception as e:
-            steps.append({"name": "Issue Assignment", "success": False, "message": str(e)})
+            step = {"name": "Issue Assignment", "success": False, "message": str(e)}
+        self._publish_later([*assign_events, (channel, {"type": "step", **step})])
+        return step
 
-        # Stage 4: QA Configuration
-        print("🧪 Stage 4/4: Configuring QA validation...")
+    async def _stage_qa_config(self, channel: str, project_path: str) -> Dict:
+        logger.info("🧪 Stage 4/4: Configuring QA validation...")
         try:
             qa_config = {
                 "min_coverage": int(os.getenv("MIN_TEST_COVERAGE", "80")),
@@ -502,23 +1396,20 @@ Your project is ready for automated development! 🚀
                 "block_on_failure": True,
             }
             qa_config_path = Path(project_path) / ".qa_config.json"
-            with open(qa_config_path, "w") as f:
-                json.dump(qa_config, f, indent=2)
-            steps.append({
+            await asyncio.to_thread(
+                _atomic_write_bytes,
+                qa_config_path,
+                _json_dumps_pretty(qa_config),
+            )
+            step = {
                 "name": "QA Configuration",
                 "success": True,
                 "message": f"QA agent configured (min coverage: {qa_config['min_coverage']}%)",
-            })
+            }
         except Exception as e:
-            steps.append({"name": "QA Configuration", "success": False, "message": str(e)})
-
-        success_count = sum(1 for s in steps if s.get("success"))
-        return {
-            "success": success_count > 0,
-            "steps": steps,
-            "steps_succeeded": success_count,
-            "steps_total": len(steps),
-        }
+            step = {"name": "QA Configuration", "success": False, "message": str(e)}
+        self._publish_later([(channel, {"type": "step", **step})])
+        return step
 
     async def handle_assign_issues(self, message: str, user_id: str) -> str:
         """Assign all open GitHub issues to the appropriate agents."""
@@ -539,6 +1430,10 @@ Your project is ready for automated development! 🚀
         if not result.get("success"):
             return f"❌ Assignment failed: {result.get('error', 'Unknown error')}"
 
+        await self._publish_batch(
+            self._assignment_events(f"{PIPELINE_EVENTS_PREFIX}{repo_name}", result)
+        )
+
         assigned = result.get("assigned", 0)
         summary = result.get("summary", {})
 
@@ -577,41 +1472,26 @@ Your project is ready for automated development! 🚀
         status_icon = "✅" if passed else "❌"
         coverage_str = f"{coverage:.1f}%" if coverage is not None else "N/A"
 
-        return f"""
-{status_icon} **Test Results**
-
-**Project**: {self.current_project['name']}
-**Tests Passed**: {"Yes" if passed else "No"}
-**Coverage**: {coverage_str}
-
-**Output:**
-```
-{output}
-```
-"""
+        return _TEST_RESULTS_TMPL.substitute(
+            status_icon=status_icon,
+            project_name=self.current_project["name"],
+            passed="Yes" if passed else "No",
+            coverage=coverage_str,
+            output=output,
+        )
 
     async def handle_code_task(self, message: str, user_id: str) -> str:
         """Handle coding tasks for current project."""
-        if not self.current_project:
+        project = self.current_project
+        if not project:
             return "❌ No active project. Please start a new project first with your requirements."
 
-        project_path = self.current_project["path"]
-        prompt = f"""
-Implement the following task for the current project:
-
-"{message}"
-
-Context:
-- Project: {self.current_project['name']}
-- Original Requirements: {self.current_project.get('requirements', 'See project PRD')}
-
-Steps:
-1. Analyze the current codebase
-2. Identify files that need to be created or modified
-3. Implement the changes
-4. Test the changes if applicable
-5. Commit the changes to git
-"""
+        project_path = project["path"]
+        prompt = _CODE_TASK_TMPL.substitute(
+            message=message,
+            project_name=project["name"],
+            requirements=project.get("requirements", "See project PRD"),
+        )
         result = await self.call_claude_code(
             prompt=prompt,
             project_path=project_path,
@@ -624,7 +1504,8 @@ Steps:
 
     async def handle_status_check(self, message: str = None, user_id: str = None) -> str:
         """Provide status update on current project and agent queues."""
-        if not self.current_project:
+        project = self.current_project
+        if not project:
             return "📊 **Status**: No active project. Ready to start a new one!"
 
         try:
@@ -638,37 +1519,66 @@ Steps:
         ]
         queue_str = "\n".join(queue_lines) if queue_lines else "  • All queues empty"
 
-        deploy_url = self.current_project.get("deploy_url")
+        deploy_url = project.get("deploy_url")
         deploy_line = f"\n🌐 **Live URL**: {deploy_url}" if deploy_url else ""
 
-        project_path = self.current_project["path"]
-        status_prompt = """
-Analyze the current project and provide a brief status update:
-1. List key files that exist
-2. Check git status (any uncommitted changes?)
-3. Any errors visible in logs?
-Provide a concise 3-5 line summary.
-"""
-        code_result = await self.call_claude_code(
-            prompt=status_prompt,
-            project_path=project_path,
-            allowed_tools=["Bash", "Read"],
+        project_path = project["path"]
+        if message and _STATUS_DETAIL_RE.search(message):
+            code_result = await self.call_claude_code(
+                prompt=_STATUS_PROMPT,
+                project_path=project_path,
+                allowed_tools=["Bash", "Read"],
+            )
+            overview = code_result.get("stdout", "Unable to read project status")
+        else:
+            overview = await self._local_status_overview(project_path)
+
+        return _PROJECT_STATUS_TMPL.substitute(
+            project_name=project["name"],
+            repo_url=project.get("repo_url", "N/A"),
+            created_at=project["created_at"],
+            status=project.get("status", "unknown"),
+            deploy_line=deploy_line,
+            queue_str=queue_str,
+            overview=overview,
         )
 
-        return f"""
-📊 **Project Status**
+    async def _local_status_overview(self, project_path: str) -> str:
+        """
+        Branch, uncommitted changes and top-level files read directly from
+        the project, without a Claude run. Reused for STATUS_CACHE_TTL.
+        """
+        cached = self._status_cache.get(project_path)
+        if cached is not None and time.monotonic() - cached[0] < STATUS_CACHE_TTL:
+            return cached[1]
 
-📁 **Project**: {self.current_project['name']}
-🔗 **Repository**: {self.current_project.get('repo_url', 'N/A')}
-📅 **Created**: {self.current_project['created_at']}
-🔄 **Status**: {self.current_project.get('status', 'unknown')}{deploy_line}
+        try:
+            files = await asyncio.to_thread(_list_project_files, project_path)
+        except OSError:
+            return "⚠️ Project directory not found"
 
-**Agent Queue Status:**
-{queue_str}
+        try:
+            process = await asyncio.create_subprocess_exec(
+                "git", "-C", project_path, "status", "--porcelain=v2", "--branch",
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+            try:
+                stdout, _ = await asyncio.wait_for(process.communicate(), timeout=STATUS_GIT_TIMEOUT)
+            finally:
+                if process.returncode is None:
+                    process.kill()
+                    await process.wait()
+            git_lines = (
+                _format_git_status(stdout.decode("utf-8", "replace"))
+                if process.returncode == 0 else ["⚠️ Not a git repository"]
+            )
+        except (OSError, asyncio.TimeoutError) as e:
+            git_lines = [f"⚠️ git status unavailable: {str(e) or 'timed out'}"]
 
-**Codebase Overview:**
-{code_result.get('stdout', 'Unable to read project status')}
-"""
+        overview = "\n".join([*git_lines, files])
+        self._status_cache[project_path] = (time.monotonic(), overview)
+        return overview
 
     async def handle_update_project(self, message: str, user_id: str) -> str:
         return await self.handle_code_task(message, user_id)
@@ -682,20 +1592,21 @@ Provide a concise 3-5 line summary.
         Deploy (or re-deploy) the active project.
         Shows existing URL if already deployed, otherwise triggers Docker + CF deploy.
         """
-        if not self.current_project:
+        project = self.current_project
+        if not project:
             return "❌ No active project to deploy."
 
-        existing_url = self.current_project.get("deploy_url")
+        existing_url = project.get("deploy_url")
         if existing_url and "re" not in (message or "").lower():
             return (
                 f"🌐 **Already deployed!**\n\n"
-                f"**Project**: `{self.current_project['name']}`\n"
+                f"**Project**: `{project['name']}`\n"
                 f"**URL**: {existing_url}\n\n"
                 f"Say `!deploy redeploy` to build and push a fresh container."
             )
 
-        project_path = self.current_project["path"]
-        project_name = self.current_project["name"]
+        project_path = project["path"]
+        project_name = project["name"]
 
         await self._notify(f"🚀 Deploying `{project_name}`…")
 
@@ -708,19 +1619,15 @@ Provide a concise 3-5 line summary.
         if deploy_result["success"]:
             url = deploy_result["url"]
             port = deploy_result["port"]
-            self.current_project["deploy_url"] = url
-            await self.save_project_metadata()
+            project["deploy_url"] = url
+            await self.save_project_metadata(project)
 
             note = ""
             if deploy_result.get("error"):
                 note = f"\n\n⚠️ Note: {deploy_result['error']}"
 
-            return (
-                f"🌐 **Deployed!**\n\n"
-                f"**Project**: `{project_name}`\n"
-                f"**URL**: {url}\n"
-                f"**Host Port**: {port}"
-                f"{note}"
+            return _DEPLOYED_TMPL.substitute(
+                project_name=project_name, url=url, port=port, note=note
             )
 
         return (
@@ -737,26 +1644,14 @@ Provide a concise 3-5 line summary.
         if not self._projects:
             return "📂 No projects found. Use `!new <description>` to create one."
 
-        lines = []
-        for name, proj in sorted(
-            self._projects.items(),
-            key=lambda kv: kv[1].get("created_at", ""),
-            reverse=True,
-        ):
-            active_marker = " ◀ active" if name == self._active_project_name else ""
-            status = proj.get("status", "unknown")
-            deploy_url = proj.get("deploy_url", "")
-            url_str = f" | 🌐 {deploy_url}" if deploy_url else ""
-            repo = proj.get("repo_url", "") or proj.get("repo_name", "")
-            lines.append(
-                f"• `{name}`{active_marker} — {status}{url_str}\n"
-                f"  🐙 {repo}"
-            )
-
-        return (
-            f"📂 **Projects ({len(self._projects)}):**\n\n"
-            + "\n\n".join(lines)
-        )
+        active = self._active_project_name
+        return f"📂 **Projects ({len(self._projects)}):**\n\n" + "\n\n".join([
+            f"• `{name}`{' ◀ active' if name == active else ''}"
+            f" — {proj.get('status', 'unknown')}"
+            f"{' | 🌐 ' + proj['deploy_url'] if proj.get('deploy_url') else ''}\n"
+            f"  🐙 {proj.get('repo_url', '') or proj.get('repo_name', '')}"
+            for name, proj in self._projects.newest_first()
+        ])
 
     async def handle_switch_project(self, name: str) -> str:
         """Switch the active project by name."""
@@ -767,25 +1662,15 @@ Provide a concise 3-5 line summary.
                 f"Known projects: {known or 'none'}"
             )
 
-        # Stop monitor for current project
-        if self._active_project_name and self._active_project_name in self._monitors:
-            old_monitor = self._monitors[self._active_project_name]
-            if old_monitor.is_running():
-                await old_monitor.stop()
-
         self._active_project_name = name
         proj = self._projects[name]
 
-        # Start monitor for new project if repo is known
+        # Watch the new project too; the previous one stays monitored
         repo_name = proj.get("repo_name", "")
         monitor_note = ""
         if repo_name:
             try:
-                from agents.pipeline_monitor import PipelineMonitor
-                github_client = create_github_client()
-                monitor = PipelineMonitor(master=self, github=github_client)
-                await monitor.start()
-                self._monitors[name] = monitor
+                await self._start_project_monitor(name, resume_from=await self._saved_handled_runs(name))
                 monitor_note = f"\n🔍 CI/CD monitor started for `{repo_name}`."
             except Exception as e:
                 monitor_note = f"\n⚠️ Could not start monitor: {str(e)[:80]}"
@@ -805,12 +1690,13 @@ Provide a concise 3-5 line summary.
     # ==========================================
 
     async def handle_workers(self, message: str, user_id: str) -> str:
-        msg_lower = message.lower()
-        if "start" in msg_lower:
-            return await self.start_workers()
-        elif "stop" in msg_lower:
-            return await self.stop_workers()
-        return await self.worker_status()
+        # Whole words only, so e.g. "restart" or "nonstop" never match
+        method = next(
+            (self._WORKER_ACTIONS[word] for word in message.lower().split()
+             if word in self._WORKER_ACTIONS),
+            "worker_status",
+        )
+        return await getattr(self, method)()
 
     async def start_workers(self, agents: Optional[List[str]] = None) -> str:
         if self._worker_daemon and self._worker_daemon._running:
@@ -818,7 +1704,7 @@ Provide a concise 3-5 line summary.
 
         self._worker_daemon = AgentWorkerDaemon(agent_types=agents, master=self)
         agent_types = self._worker_daemon.agent_types
-        self._worker_task = asyncio.create_task(self._worker_daemon.start())
+        self._worker_task = self._spawn_task(self._worker_daemon.start())
 
         return (
             f"✅ Workers started for: {', '.join(agent_types)}\n\n"
@@ -846,19 +1732,11 @@ Provide a concise 3-5 line summary.
             return "📊 Workers are not running. Use `!workers start` to start them."
 
         status = self._worker_daemon.get_status()
-        queue_lines = [
-            f"  • **{agent}**: {count} pending tasks"
-            for agent, count in status.get("queues", {}).items()
-        ]
-        state_lines = [
-            f"  • **{agent}**: {state}"
-            for agent, state in status.get("worker_states", {}).items()
-        ]
-        return (
-            f"📊 **Worker Status**\n\n"
-            f"**Running**: {'Yes' if status['running'] else 'No'}\n\n"
-            f"**Queue Sizes:**\n" + "\n".join(queue_lines) + "\n\n"
-            f"**Worker States:**\n" + "\n".join(state_lines)
+        queue_lines, state_lines = self._worker_daemon.status_lines(status)
+        return _WORKER_STATUS_TMPL.substitute(
+            running="Yes" if status["running"] else "No",
+            queue_lines=queue_lines,
+            state_lines=state_lines,
         )
 
     # ==========================================
@@ -870,12 +1748,31 @@ Provide a concise 3-5 line summary.
         self._notify_channel = channel
 
     async def _notify(self, msg: str):
-        """Send a message to the notify channel if set."""
-        if self._notify_channel:
+        """
+        Queue a message for the notify channel, if set. Messages arriving
+        within NOTIFY_COALESCE_WINDOW are sent together as one Discord message.
+        """
+        logger.info(f"[notify] {msg}")
+        if not self._notify_channel:
+            return
+        self._notify_queue.append((self._notify_channel, msg))
+        if self._notify_flusher is None or self._notify_flusher.done():
+            self._notify_flusher = self._spawn_task(self._notify_flush_loop())
+
+    async def _notify_flush_loop(self):
+        """Send queued notifications once per window; exit once none are left."""
+        while self._notify_queue:
+            await asyncio.sleep(NOTIFY_COALESCE_WINDOW)
+            await self.flush_notifications()
+
+    async def flush_notifications(self):
+        """Send every queued notification now (used on shutdown and in tests)."""
+        batch, self._notify_queue = self._notify_queue, []
+        for channel, text in _coalesce_notifications(batch):
             try:
-                await self._notify_channel.send(msg)
-            except Exception:
-                pass
+                await channel.send(text)
+            except Exception as e:
+                logger.warning(f"Discord notification failed: {e}")
 
     def _format_error_for_discord(self, error: Exception, context: dict) -> str:
         """
@@ -912,7 +1809,7 @@ Provide a concise 3-5 line summary.
             f"**Suggested fix**: {suggestion}"
         )
 
-    async def handle_monitor_status(self, action: str = "status") -> str:
+    async def handle_monitor_status(self, action: str = "status", user_id: Optional[str] = None) -> str:
         action = action.lower().strip()
         if action == "stop":
             return await self._stop_monitor()
@@ -925,44 +1822,115 @@ Provide a concise 3-5 line summary.
             return "❌ No active project to monitor."
 
         name = self._active_project_name
-        monitor = self._monitors.get(name)
-        if monitor and monitor.is_running():
+        if self._monitor and self._monitor.is_watching(name):
             return "⚠️ Pipeline monitor is already running."
 
-        from agents.pipeline_monitor import PipelineMonitor
         try:
-            github = create_github_client()
+            await self._start_project_monitor(name, resume_from=await self._saved_handled_runs(name))
         except ValueError as e:
             return f"❌ Cannot start monitor: {e}"
 
-        monitor = PipelineMonitor(master=self, github=github)
-        await monitor.start()
-        self._monitors[name] = monitor
         repo = self.current_project.get("repo_name", "unknown")
         return f"✅ Pipeline monitor started for `{repo}`."
 
     async def _stop_monitor(self) -> str:
         name = self._active_project_name
-        monitor = self._monitors.get(name)
-        if not monitor or not monitor.is_running():
+        if not self._monitor or not self._monitor.is_watching(name):
             return "⚠️ Pipeline monitor is not running."
-        await monitor.stop()
+        await self._monitor.unwatch(name)
+        await self._forget_monitor(name)   # explicitly stopped: don't resume on restart
+        if not self._monitor.projects:
+            self._monitor = None           # release its run history with the last project
         return "✅ Pipeline monitor stopped."
 
+    async def _start_project_monitor(self, name: str, resume_from: Optional[List[int]] = None):
+        """Add a project to the shared monitor and record it in Redis."""
+        if self._monitor is None or not self._monitor.projects:
+            self._monitor = PipelineMonitor(
+                master=self,
+                github=self.github_client,
+                on_handled=self._persist_monitor,
+            )
+        monitor = self._monitor
+        newly_watched = name not in monitor.projects
+        try:
+            await monitor.watch(name, resume_from=resume_from)
+            await self._persist_monitor(name)
+        except BaseException:
+            # Interrupted mid-start (e.g. the command was cancelled): don't
+            # leave a half-registered project polling with no Redis entry
+            if newly_watched:
+                await monitor.unwatch(name)
+            raise
+        return monitor
+
+    async def _persist_monitor(self, name: str):
+        """Record a watched project's repo and handled runs in the MONITORS_KEY hash."""
+        monitor = self._monitor
+        project = self._projects.get(name)
+        if monitor is None or name not in monitor.projects or project is None:
+            return
+        try:
+            await self.redis.hset(MONITORS_KEY, name, msgspec.msgpack.encode({
+                "repo": project.get("repo_name", ""),
+                "handled_runs": monitor.handled_run_ids(),
+            }))
+        except Exception as e:
+            logger.warning(f"⚠️ Could not persist monitor state for {name}: {e}")
+
+    async def _forget_monitor(self, name: str):
+        try:
+            await self.redis.hdel(MONITORS_KEY, name)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not clear monitor state for {name}: {e}")
+
+    async def _saved_handled_runs(self, name: str) -> Optional[List[int]]:
+        try:
+            raw = await self.redis.hget(MONITORS_KEY, name)
+            return _decode_monitor_entry(raw).get("handled_runs") if raw else None
+        except Exception:
+            return None
+
+    async def _rehydrate_monitors(self):
+        """
+        Resume monitoring for every project that was watched when the process
+        last stopped, skipping entries whose project or repo has changed.
+        """
+        try:
+            saved = dict(await self.redis.hgetall(MONITORS_KEY))
+        except Exception as e:
+            logger.warning(f"⚠️ Could not read saved monitor state: {e}")
+            return
+        for key, raw in saved.items():
+            name = key.decode()
+            project = self._projects.get(name)
+            if project is None or (self._monitor and name in self._monitor.projects):
+                continue
+            try:
+                entry = _decode_monitor_entry(raw)
+            except ValueError:
+                continue
+            if entry.get("repo") != project.get("repo_name"):
+                continue
+            try:
+                await self._start_project_monitor(name, resume_from=entry.get("handled_runs"))
+                logger.info(f"🔍 Resumed CI/CD monitor for {name}")
+            except Exception as e:
+                logger.warning(f"⚠️ Could not resume monitor for {name}: {e}")
+
     def _monitor_status_message(self) -> str:
-        name = self._active_project_name
-        monitor = self._monitors.get(name) if name else None
+        monitor = self._monitor
         if not monitor:
             return "📊 Pipeline monitor: **not started**"
         status = monitor.get_status()
-        running = "✅ Running" if status["running"] else "⏹ Stopped"
-        repo = status.get("repo", "N/A")
+        running = "✅ Running" if monitor.is_watching(self._active_project_name) else "⏹ Stopped"
+        repos = ", ".join(f"`{r}`" for r in status.get("repos", [])) or "N/A"
         fixes = sum(status.get("fix_attempts", {}).values())
         handled = status.get("handled_runs", 0)
         return (
             f"📊 **Pipeline Monitor Status**\n\n"
             f"**State**: {running}\n"
-            f"**Watching**: `{repo}`\n"
+            f"**Watching**: {repos}\n"
             f"**Runs handled**: {handled}\n"
             f"**Total fix attempts**: {fixes}"
         )
@@ -972,24 +1940,17 @@ Provide a concise 3-5 line summary.
     # ==========================================
 
     async def handle_general_query(self, message: str, user_id: str) -> str:
-        context = await self.retrieve_memory(message, n_results=3)
+        # The memory lookup (embedding + vector search) starts before the
+        # active project is read
+        context_task = asyncio.create_task(self.retrieve_memory(message, n_results=3))
+        project_name = self.current_project.get('name') if self.current_project else 'None'
+        context = await context_task
         context_str = (
             "\n".join([f"- {doc}" for doc in context.get("documents", [[]])[0]])
             if context and context.get("documents") and len(context.get("documents")[0]) > 0
             else "No relevant context"
         )
-        prompt = f"""
-Answer this question from the user:
-
-"{message}"
-
-Relevant context from previous conversations:
-{context_str}
-
-Current project: {self.current_project.get('name') if self.current_project else 'None'}
-
-Provide a helpful, friendly response.
-"""
+        prompt = _GENERAL_QUERY_TMPL.substitute(message=message, context=context_str, project_name=project_name)
         result = await self.call_claude_code(prompt=prompt, allowed_tools=["Write"])
         return result.get("stdout", "I'm here to help! Could you provide more details?")
 
@@ -1003,38 +1964,93 @@ Provide a helpful, friendly response.
         project_path: Optional[str] = None,
         allowed_tools: Optional[List[str]] = None,
         context_files: Optional[List[str]] = None,
+        raw: bool = False,
+    ) -> Dict:
+        """
+        Run one Claude prompt. With `raw`, a spawned run's stdout is returned
+        as undecoded bytes for callers that parse it themselves. A run that
+        failed within CLAUDE_FAILURE_TTL is replayed rather than retried.
+        """
+        cwd = project_path or str(self.workspace_dir)
+        key = self._claude_request_key(prompt, cwd, allowed_tools, raw)
+        now = time.monotonic()
+        failed = self._claude_failures.get(key)
+        if failed is not None and now - failed[0] < CLAUDE_FAILURE_TTL:
+            logger.info(f"♻️ Reusing recent Claude failure: {prompt[:80]}...")
+            return dict(failed[1])
+
+        result = await self._run_claude(prompt, cwd, allowed_tools, raw)
+        if result.get("success"):
+            self._claude_failures.pop(key, None)
+        else:
+            now = time.monotonic()
+            self._claude_failures = {
+                k: v for k, v in self._claude_failures.items() if now - v[0] < CLAUDE_FAILURE_TTL
+            }
+            self._claude_failures[key] = (now, dict(result))
+        return result
+
+    @staticmethod
+    def _claude_request_key(prompt: str, cwd: str, allowed_tools: Optional[List[str]], raw: bool) -> bytes:
+        h = hashlib.blake2b(prompt.encode("utf-8", "replace"), digest_size=16)
+        h.update(f"\0{cwd}\0{','.join(allowed_tools or ())}\0{raw}".encode("utf-8", "replace"))
+        return h.digest()
+
+    async def _run_claude(
+        self, prompt: str, cwd: str, allowed_tools: Optional[List[str]], raw: bool
     ) -> Dict:
         cmd = ["claude", "-p", prompt, "--dangerously-skip-permissions"]
         if allowed_tools:
             cmd.extend(["--allowed-tools"])
             cmd.extend(allowed_tools)
 
-        cwd = project_path or str(self.workspace_dir)
-        print(f"🤖 Calling Claude Code: {prompt[:80]}...")
+        logger.info(f"🤖 Calling Claude Code: {prompt[:80]}...")
+
+        result = await self._call_claude_worker(prompt, cwd, allowed_tools)
+        if result is not None:
+            return result
 
         try:
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                cwd=cwd,
-            )
-            try:
-                stdout, stderr = await asyncio.wait_for(
-                    process.communicate(), timeout=300
+            # At most CLAUDE_MAX_CONCURRENCY CLI runs at once; each is a full
+            # runtime, so a burst would otherwise push the host into swap
+            async with self._claude_slots:
+                # Own session/process group, so a timeout can kill the whole tree
+                process = await asyncio.create_subprocess_exec(
+                    *cmd,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    cwd=cwd,
+                    start_new_session=True,
                 )
-                stdout = stdout.decode("utf-8")
-                stderr = stderr.decode("utf-8")
-                return_code = process.returncode
-            except asyncio.TimeoutError:
-                process.kill()
-                await process.communicate()
-                return {
-                    "stdout": "",
-                    "stderr": "Command timed out after 5 minutes",
-                    "return_code": -1,
-                    "success": False,
-                }
+                self._claude_procs.add(process)
+                out: List[bytes] = []
+                err: List[bytes] = []
+                try:
+                    within_limit = await asyncio.wait_for(
+                        self._read_claude_output(process, out, err), timeout=CLAUDE_CALL_TIMEOUT
+                    )
+                    stdout = _output_text(out, raw)
+                    stderr = _output_text(err)
+                    if not within_limit:
+                        return {
+                            "stdout": stdout,
+                            "stderr": f"Output exceeded {CLAUDE_MAX_OUTPUT // (1024 * 1024)} MB; run stopped",
+                            "return_code": -1,
+                            "success": False,
+                        }
+                    return_code = process.returncode
+                except asyncio.TimeoutError:
+                    return {
+                        "stdout": _output_text(out, raw),
+                        "stderr": "Command timed out after 5 minutes",
+                        "return_code": -1,
+                        "success": False,
+                    }
+                finally:
+                    # Timed out or cancelled: don't leave the CLI or its children running
+                    self._claude_procs.discard(process)
+                    if process.returncode is None:
+                        await _kill_process_group(process)
 
             await self.log_interaction(prompt, stdout, stderr)
             return {
@@ -1046,124 +2062,721 @@ Provide a helpful, friendly response.
         except Exception as e:
             return {"stdout": "", "stderr": str(e), "return_code": -1, "success": False}
 
+    async def _read_claude_output(
+        self, process: asyncio.subprocess.Process, out: List[bytes], err: List[bytes]
+    ) -> bool:
+        """
+        Stream stdout and stderr concurrently into `out`/`err` and wait for
+        the process to exit. Returns False (with the process group killed)
+        once either stream passes CLAUDE_MAX_OUTPUT.
+        """
+        async def drain(stream, chunks):
+            if await _drain_pipe(stream, chunks, CLAUDE_MAX_OUTPUT):
+                return True
+            await _kill_process_group(process)
+            return False
+
+        results = await asyncio.gather(drain(process.stdout, out), drain(process.stderr, err))
+        await process.wait()
+        return all(results)
+
+    def _get_claude_pool(self) -> Optional[ClaudeWorkerPool]:
+        if not CLAUDE_WORKER_CMD:
+            return None
+        if self._claude_pool is None:
+            self._claude_pool = ClaudeWorkerPool(
+                CLAUDE_WORKER_CMD,
+                cwd=str(self.workspace_dir),
+                size=CLAUDE_WORKER_POOL_SIZE,
+                limit=CLAUDE_WORKER_MAX_FRAME,
+            )
+        return self._claude_pool
+
+    async def _call_claude_worker(
+        self,
+        prompt: str,
+        cwd: str,
+        allowed_tools: Optional[List[str]],
+    ) -> Optional[Dict]:
+        """
+        Send one request to the persistent worker pool and await its reply.
+        Returns None when no worker is available so the caller spawns instead.
+        """
+        pool = self._get_claude_pool()
+        if pool is None:
+            return None
+
+        try:
+            reply = await pool.submit(prompt, cwd, allowed_tools, CLAUDE_CALL_TIMEOUT)
+        except asyncio.TimeoutError:
+            return {
+                "stdout": "",
+                "stderr": "Command timed out after 5 minutes",
+                "return_code": -1,
+                "success": False,
+            }
+        except (ConnectionError, OSError) as e:
+            logger.warning(f"⚠️ Persistent Claude worker failed ({e}) — falling back to per-call spawn")
+            return None
+        if reply is None:
+            return None
+
+        stdout = reply.get("stdout", "")
+        stderr = reply.get("stderr", "")
+        return_code = reply.get("return_code", 0)
+        await self.log_interaction(prompt, stdout, stderr)
+        return {
+            "stdout": stdout,
+            "stderr": stderr,
+            "return_code": return_code,
+            "success": return_code == 0,
+        }
+
+    # ==========================================
+    # REDIS MESSAGING
+    # ==========================================
+
+    async def _publish_batch(self, events: List[Tuple[str, Dict]]):
+        """
+        Publish (channel, message) events in one non-transactional pipeline
+        round trip. Progress events are best-effort: a Redis failure is
+        logged and never interrupts the caller.
+        """
+        if not events:
+            return
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for channel, message in events:
+                    pipe.publish(channel, _json_dumps(message))
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"⚠️ Could not publish {len(events)} pipeline event(s): {e}")
+
+    def _publish_later(self, events: List[Tuple[str, Dict]]):
+        """
+        Queue events for the single outbox task, so a stage never waits on
+        Redis and subscribers still see events in the order they were queued.
+        """
+        if not events:
+            return
+        self._outbox.extend(events)
+        if self._outbox_task is None or self._outbox_task.done():
+            self._outbox_task = self._spawn_task(self._drain_outbox())
+
+    async def _drain_outbox(self):
+        """Publish queued events in order; whatever piles up meanwhile goes as one batch."""
+        while self._outbox:
+            events, self._outbox = self._outbox, []
+            await self._publish_batch(events)
+
+    @staticmethod
+    def _assignment_events(channel: str, assign_result: Dict) -> List[Tuple[str, Dict]]:
+        """One event per agent from an assign_all_issues summary."""
+        return [
+            (channel, {
+                "type": "assignment",
+                "agent_type": agent_type,
+                "count": info.get("count", 0),
+                "issues": info.get("issues", []),
+            })
+            for agent_type, info in assign_result.get("summary", {}).items()
+        ]
+
     # ==========================================
     # MEMORY
     # ==========================================
 
     async def store_memory(self, category: str, content: str, metadata: Dict = None):
-        memory_id = f"{category}_{datetime.now().timestamp()}"
-        self.memory.add(
-            documents=[content],
-            metadatas=[{"category": category, **(metadata or {})}],
-            ids=[memory_id],
-        )
+        await self.store_memories([(category, content, metadata)])
+
+    async def store_memories(self, entries: List[Tuple[str, str, Optional[Dict]]]):
+        """
+        Queue (category, content, metadata) entries for the next batched add.
+        The background flusher writes the queue every MEMORY_FLUSH_INTERVAL
+        seconds, or as soon as MEMORY_BATCH_SIZE entries are waiting, so
+        callers never wait on embedding or the vector store.
+        """
+        if not entries:
+            return
+        scope = {"project": self._active_project_name} if self._active_project_name else {}
+        for category, content, metadata in entries:
+            memory_id = self._memory_id(category, content)
+            if self._seen_memory(memory_id):
+                continue
+            self._known_cats.add(category)
+            self._absent_cats.discard(category)
+            self._mem_queue.append((memory_id, content, {"category": category, **scope, **(metadata or {})}))
+
+        if len(self._mem_queue) >= MEMORY_BATCH_SIZE:
+            self._mem_wakeup.set()
+        if self._mem_flusher is None or self._mem_flusher.done():
+            self._mem_flusher = self._spawn_task(self._memory_flush_loop())
+
+    def _memory_id(self, category: str, content: str) -> str:
+        """
+        Content-addressed id, scoped to the category and active project, so
+        storing the same memory again upserts one record instead of adding.
+        """
+        h = hashlib.blake2b(content.encode("utf-8", "replace"), digest_size=12)
+        h.update(f"\0{category}\0{self._active_project_name or ''}".encode("utf-8", "replace"))
+        return h.hexdigest()
 
-    async def retrieve_memory(self, query: str, n_results: int = 5) -> Dict:
+    def _seen_memory(self, memory_id: str) -> bool:
+        """
+        True if this memory was stored recently; otherwise remember it.
+        Repeats skip embedding and the write entirely.
+        """
+        if memory_id in self._mem_seen:
+            self._mem_seen.move_to_end(memory_id)
+            return True
+        self._mem_seen[memory_id] = None
+        if len(self._mem_seen) > MEMORY_SEEN_SIZE:
+            self._mem_seen.popitem(last=False)
+        return False
+
+    async def flush_memories(self):
+        """Write every queued memory now (used on shutdown and in tests)."""
+        await self._flush_memory_queue()
+
+    async def _memory_flush_loop(self):
+        """Flush the memory queue on a short timer; exit once it stays empty."""
+        while True:
+            try:
+                await asyncio.wait_for(self._mem_wakeup.wait(), MEMORY_FLUSH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._mem_wakeup.clear()
+            if not self._mem_queue:
+                return
+            await self._flush_memory_queue()
+
+    async def _flush_memory_queue(self):
+        # The lock also makes flush_memories wait for a write already in flight
+        async with self._mem_write_lock:
+            if not self._mem_queue:
+                return
+            batch, self._mem_queue = self._mem_queue, []
+            self._invalidate_query_cache()
+            await asyncio.to_thread(self._write_memory_batch, batch)
+            # Queries answered while the write was in flight may predate it
+            self._invalidate_query_cache()
+        await self._record_hot_projects(batch)
+
+    async def _record_hot_projects(self, batch: List[Tuple[str, str, Dict]]):
+        """Bump the write time of every project in a flushed batch (best-effort)."""
+        projects = {metadata["project"] for _, _, metadata in batch if metadata.get("project")}
+        if not projects:
+            return
+        now = time.time()
         try:
-            return self.memory.query(query_texts=[query], n_results=n_results)
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.zadd(MEMORY_HOT_PROJECTS_KEY, {name: now for name in projects})
+                pipe.zremrangebyrank(MEMORY_HOT_PROJECTS_KEY, 0, -MEMORY_WARM_PROJECTS - 1)
+                await pipe.execute()
         except Exception as e:
-            print(f"⚠️ Memory retrieval error: {e}")
+            logger.warning(f"⚠️ Could not record hot projects: {e}")
+
+    async def _warm_memory_cache(self):
+        """
+        Query the memory store once per hot project so the first real lookup
+        after a restart doesn't walk a cold index. Falls back to the newest
+        restored projects when Redis has no history yet.
+        """
+        try:
+            names = [
+                name.decode()
+                for name in await self.redis.zrevrange(MEMORY_HOT_PROJECTS_KEY, 0, MEMORY_WARM_PROJECTS - 1)
+            ]
+        except Exception:
+            names = []
+        if not names:
+            names = list(itertools.islice(
+                (name for name, _ in self._projects.newest_first()), MEMORY_WARM_PROJECTS
+            ))
+        if not names:
+            return
+        start = time.monotonic()
+        try:
+            await asyncio.to_thread(
+                lambda: self.memory.query(query_embeddings=self._embed_many(names), n_results=5)
+            )
+            logger.info(f"🔥 Warmed memory index for {len(names)} projects in {time.monotonic() - start:.2f}s")
+        except Exception as e:
+            logger.warning(f"⚠️ Could not warm memory index: {e}")
+
+    def _write_memory_batch(self, batch: List[Tuple[str, str, Dict]]):
+        # Ids are content hashes: upsert makes a repeat a no-op, and a repeat
+        # inside one batch (possible once it left the seen-set) must be
+        # collapsed because Chroma rejects duplicate ids in a single call
+        unique = {memory_id: (content, metadata) for memory_id, content, metadata in batch}
+        documents = [content for content, _ in unique.values()]
+        try:
+            self.memory.upsert(
+                documents=documents,
+                embeddings=self._embed_many(documents),
+                metadatas=[metadata for _, metadata in unique.values()],
+                ids=list(unique),
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ Memory write error ({len(batch)} entries dropped): {e}")
+
+    async def retrieve_memory(
+        self, query: str, n_results: int = 5, category: Optional[str] = None
+    ) -> Dict:
+        """
+        Return the n_results memories nearest to `query`, optionally limited
+        to one category. Categories that have never been stored return an
+        empty result without touching the vector store.
+        """
+        if category is not None and not await self._category_known(category):
+            return {"documents": [[]]}
+        try:
+            embedding = await self._embed_query(query)
+            q = np.asarray(embedding[0], dtype=np.float32)
+            norm = np.linalg.norm(q)
+            if norm:
+                q = q / norm
+
+            scope = (n_results, category)
+            cached = self._query_cache_lookup(q, scope)
+            if cached is not None:
+                return cached
+
+            future = asyncio.get_running_loop().create_future()
+            self._qbuf.append((embedding[0], q, scope, future))
+            if self._qbuf_task is None or self._qbuf_task.done():
+                self._qbuf_task = self._spawn_task(self._dispatch_query_batch())
+            return await future
+        except Exception as e:
+            logger.warning(f"⚠️ Memory retrieval error: {e}")
             return {"documents": [[]]}
 
+    async def _dispatch_query_batch(self):
+        """
+        After a QUERY_BATCH_WINDOW debounce, answer every pending
+        retrieve_memory call with one memory.query per category filter;
+        calls that arrive while a batch is in flight go in the next one.
+        Queries run in a worker thread so a concurrent batch write (which
+        holds the sqlite-vec lock) never blocks the event loop.
+        """
+        while self._qbuf:
+            await asyncio.sleep(QUERY_BATCH_WINDOW)
+            batch, self._qbuf = self._qbuf, []
+            await self._answer_query_batch(batch)
+
+    async def _answer_query_batch(self, batch: list):
+        """Run one memory.query per category in `batch` and resolve its futures."""
+        groups: Dict[Optional[str], list] = {}
+        for entry in batch:
+            groups.setdefault(entry[2][1], []).append(entry)
+
+        for category, group in groups.items():
+            kwargs = {"where": {"category": category}} if category is not None else {}
+            generation = self._qcache_gen
+            try:
+                result = await asyncio.to_thread(
+                    self.memory.query,
+                    query_embeddings=[embedding for embedding, _, _, _ in group],
+                    n_results=max(n for _, _, (n, _), _ in group),
+                    **kwargs,
+                )
+            except Exception as e:
+                for *_, future in group:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for i, (_, q, scope, future) in enumerate(group):
+                own = _slice_query_result(result, i, scope[0])
+                if generation == self._qcache_gen:
+                    self._query_cache_insert(q, scope, own)
+                if not future.done():
+                    future.set_result(own)
+
+    async def _category_known(self, category: str) -> bool:
+        """
+        True if any memory with this category exists. Categories written by
+        this process are tracked in a set; anything else is checked against
+        the store once, in a worker thread (to pick up memories from earlier
+        runs), and a miss is remembered until the category is next written.
+        """
+        if category in self._known_cats:
+            return True
+        if category in self._absent_cats:
+            return False
+        try:
+            found = await asyncio.to_thread(
+                self.memory.get, where={"category": category}, limit=1, include=[]
+            )
+            present = bool(found.get("ids"))
+        except Exception:
+            return True  # can't tell — let the real query decide
+        (self._known_cats if present else self._absent_cats).add(category)
+        return present
+
+    async def _embed_query(self, query: str) -> List[List[float]]:
+        """Embed one query; a cache miss runs the model in a worker thread."""
+        if hashlib.sha256(query.encode("utf-8")).hexdigest() in self._embed_cache:
+            return self._embed_many([query])
+        return await asyncio.to_thread(self._embed_many, [query])
+
+    def _embed_many(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed texts through the sha256-keyed LRU; only cache misses reach
+        the embedding model, and they are embedded in a single batch.
+        Vectors are held (and returned) at fp16 precision, which halves the
+        cache's memory and on-disk size at no measurable recall cost.
+        """
+        keys = [hashlib.sha256(text.encode("utf-8")).hexdigest() for text in texts]
+        with self._embed_lock:
+            found = {}
+            for key in keys:
+                if key in self._embed_cache:
+                    self._embed_cache.move_to_end(key)
+                    found[key] = self._embed_cache[key]
+
+        # The model call runs unlocked; results are read from `found`, so a
+        # concurrent eviction can't pull a vector out from under us.
+        missing = {key: text for key, text in zip(keys, texts) if key not in found}
+        if missing:
+            vectors = self._embedding_fn(list(missing.values()))
+            fresh = {key: np.asarray(vector, dtype=np.float16) for key, vector in zip(missing, vectors)}
+            found.update(fresh)
+            with self._embed_lock:
+                self._embed_cache.update(fresh)
+                while len(self._embed_cache) > EMBED_CACHE_SIZE:
+                    self._embed_cache.popitem(last=False)
+
+        return [found[key].astype(np.float32).tolist() for key in keys]
+
+    def _query_cache_lookup(self, q: np.ndarray, scope: Tuple) -> Optional[Dict]:
+        """Return a cached result whose query is within QUERY_CACHE_THRESHOLD cosine of q."""
+        if not self._qcache:
+            return None
+        if self._qcache_matrix is None:
+            self._qcache_matrix = np.stack([vec for vec, _, _ in self._qcache])
+
+        scores = self._qcache_matrix @ q
+        for idx in np.argsort(scores)[::-1]:
+            if scores[idx] < QUERY_CACHE_THRESHOLD:
+                break
+            vec, cached_scope, result = self._qcache[idx]
+            if cached_scope == scope:
+                self._qcache_tick += 1
+                self._qcache_used[idx] = self._qcache_tick
+                return result
+        return None
+
+    def _query_cache_insert(self, q: np.ndarray, scope: Tuple, result: Dict):
+        self._qcache_tick += 1
+        if len(self._qcache) < QUERY_CACHE_SIZE:
+            self._qcache.append((q, scope, result))
+            self._qcache_used.append(self._qcache_tick)
+            self._qcache_matrix = None
+            return
+
+        # Full: overwrite the least-recently-used slot in place
+        idx = min(range(len(self._qcache_used)), key=self._qcache_used.__getitem__)
+        self._qcache[idx] = (q, scope, result)
+        self._qcache_used[idx] = self._qcache_tick
+        if self._qcache_matrix is not None:
+            self._qcache_matrix[idx] = q
+
+    def _invalidate_query_cache(self):
+        """New memories can change any answer — drop cached query results."""
+        self._qcache_gen += 1
+        self._qcache.clear()
+        self._qcache_used.clear()
+        self._qcache_matrix = None
+
+    def _load_embed_cache(self) -> "OrderedDict[str, np.ndarray]":
+        """Warm-start the embedding LRU from the pickle written at shutdown."""
+        try:
+            with open(EMBED_CACHE_PATH, "rb") as f:
+                cache = pickle.load(f)
+            if isinstance(cache, OrderedDict):
+                # Older caches stored plain float lists
+                for key, vector in cache.items():
+                    if not isinstance(vector, np.ndarray) or vector.dtype != np.float16:
+                        cache[key] = np.asarray(vector, dtype=np.float16)
+                return cache
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"⚠️ Ignoring unreadable embedding cache: {e}")
+        return OrderedDict()
+
+    def _seed_embed_cache_from_store(self) -> int:
+        """
+        Fill the embedding LRU from vectors the memory store already holds,
+        for starts without a saved cache, so stored documents that are
+        written or queried again aren't re-embedded. Stores that don't return
+        their original embeddings (sqlite-vec keeps them quantized) seed
+        nothing. Returns the number of vectors added.
+        """
+        stored = self.memory.get(limit=EMBED_CACHE_SIZE, include=["documents", "embeddings"])
+        documents = stored.get("documents") or []
+        embeddings = stored.get("embeddings")
+        if embeddings is None or not len(documents):
+            return 0
+        added = 0
+        with self._embed_lock:
+            for document, vector in zip(documents, embeddings):
+                key = hashlib.sha256(document.encode("utf-8")).hexdigest()
+                if key not in self._embed_cache:
+                    self._embed_cache[key] = np.asarray(vector, dtype=np.float16)
+                    added += 1
+            while len(self._embed_cache) > EMBED_CACHE_SIZE:
+                self._embed_cache.popitem(last=False)
+        return added
+
+    def _save_embed_cache(self):
+        try:
+            EMBED_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+            tmp = EMBED_CACHE_PATH.with_suffix(".pkl.tmp")
+            with open(tmp, "wb") as f:
+                with self._embed_lock:
+                    snapshot = OrderedDict(self._embed_cache)
+                pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, EMBED_CACHE_PATH)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not persist embedding cache: {e}")
+
+    async def shutdown(self):
+        """
+        Flush in-memory state to disk, stop monitors, workers and in-flight
+        Claude runs, and cancel every background task before the process exits.
+        """
+        if self._monitor and self._monitor.is_running():
+            for name in list(self._monitor.projects):
+                await self._persist_monitor(name)
+            await self._monitor.stop()
+        if self._worker_daemon and self._worker_daemon._running:
+            await self.stop_workers()
+        await asyncio.gather(*(_kill_process_group(p) for p in list(self._claude_procs)))
+        await self.flush_memories()
+        await self.flush_log()
+        await self.flush_notifications()
+        self._close_log()
+        self._save_embed_cache()
+
+        tasks = [t for t in self._tasks if t is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._claude_pool:
+            await self._claude_pool.close()
+        await self.redis.aclose()
+        await self.redis_pool.disconnect()
+
     # ==========================================
     # UTILITIES
     # ==========================================
 
     def _detect_stack(self, project_path: str) -> str:
-        path = Path(project_path)
-        has_python = any([
-            (path / "requirements.txt").exists(),
-            (path / "pyproject.toml").exists(),
-            (path / "setup.py").exists(),
-        ])
-        has_node = any([
-            (path / "package.json").exists(),
-            (path / "node_modules").exists(),
-        ])
-        if has_python and has_node:
-            return "fullstack"
-        elif has_python:
-            return "python"
-        elif has_node:
-            return "node"
-        return "unknown"
+        # Directory mtime changes whenever a top-level entry is added or
+        # removed, so it is a sufficient validator for the marker scan.
+        # One entry per project: a rescan replaces the stale result.
+        try:
+            mtime_ns = os.stat(project_path).st_mtime_ns
+        except OSError:
+            return "unknown"
+        cached = self._stack_cache.get(project_path)
+        if cached and cached[0] == mtime_ns:
+            return cached[1]
+        stack = _scan_stack(project_path)
+        self._stack_cache[project_path] = (mtime_ns, stack)
+        return stack
 
     def _restore_all_projects(self):
-        """On startup, load all projects from disk and activate the most recent."""
+        """
+        On startup, load all projects from disk and activate the most recent.
+        Inside a running loop this only schedules the load, so construction
+        never waits on disk; process_user_message awaits it before routing.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            try:
+                entries = self._project_metadata_entries()
+                with ThreadPoolExecutor() as pool:
+                    self._apply_restored(list(pool.map(_read_project_metadata, entries)))
+            except Exception as e:
+                logger.warning(f"⚠️ Could not restore project state: {e}")
+            return
+        self._restore_task = self._spawn_task(self._restore_all_projects_async())
+
+    async def _restore_all_projects_async(self):
+        """Read every project's metadata concurrently in worker threads."""
         try:
-            metadata_files = sorted(
-                self.workspace_dir.glob("*/.project_metadata.json"),
-                key=lambda p: p.stat().st_mtime,
-                reverse=True,
+            entries = await asyncio.to_thread(self._project_metadata_entries)
+            projects = await asyncio.gather(
+                *(asyncio.to_thread(_read_project_metadata, entry) for entry in entries)
             )
-            for mf in metadata_files:
-                try:
-                    with open(mf, "r") as f:
-                        proj = json.load(f)
-                    name = proj.get("name")
-                    if name:
-                        self._projects[name] = proj
-                except Exception:
-                    pass
-
-            if self._projects:
-                # Activate the most recently modified project
-                most_recent = metadata_files[0]
-                with open(most_recent, "r") as f:
-                    proj = json.load(f)
-                self._active_project_name = proj.get("name")
-                print(f"✅ Restored {len(self._projects)} project(s). Active: {self._active_project_name}")
+            self._apply_restored(projects)
         except Exception as e:
-            print(f"⚠️ Could not restore project state: {e}")
+            logger.warning(f"⚠️ Could not restore project state: {e}")
 
-    async def save_project_metadata(self):
-        """Save current project metadata to disk."""
-        if not self.current_project:
+    async def _ensure_restored(self):
+        if self._restore_task is not None:
+            await self._restore_task
+
+    def _project_metadata_entries(self) -> List[Tuple[float, str]]:
+        """
+        (mtime, path) of every saved project metadata file, newest first,
+        from one scandir pass and a single stat per project.
+        """
+        entries = []
+        with os.scandir(self.workspace_dir) as it:
+            for d in it:
+                if not d.is_dir():
+                    continue
+                metadata_file = os.path.join(d.path, ".project_metadata.json")
+                try:
+                    entries.append((os.stat(metadata_file).st_mtime, metadata_file))
+                except OSError:
+                    continue
+        entries.sort(reverse=True)
+        return entries
+
+    def _apply_restored(self, loaded: List[Optional[Tuple[float, Dict]]]):
+        """Register parsed projects (newest first) and activate the most recent."""
+        for entry in loaded:
+            if entry is None:
+                continue
+            proj = entry[1]
+            name = proj.get("name") if isinstance(proj, dict) else None
+            if not name:
+                continue
+            self._projects[name] = proj
+            if self._active_project_name is None:
+                self._active_project_name = name
+        if self._projects:
+            logger.info(f"✅ Restored {len(self._projects)} project(s). Active: {self._active_project_name}")
+
+    async def save_project_metadata(self, project: Optional[Dict] = None):
+        """Save `project` (default: the active one) metadata to disk."""
+        project = project or self.current_project
+        if not project:
             return
-        metadata_file = Path(self.current_project["path"]) / ".project_metadata.json"
-        with open(metadata_file, "w") as f:
-            json.dump(self.current_project, f, indent=2)
+        self._projects.touch()   # callers save after editing the dict in place
+        metadata_file = Path(project["path"]) / ".project_metadata.json"
+        if not _JSON_DUMPS_ATOMIC:
+            project = copy.deepcopy(project)
+        await asyncio.to_thread(self._sync_save_metadata, metadata_file, project)
+
+    @staticmethod
+    def _sync_save_metadata(metadata_file: Path, project: Dict):
+        # With a C encoder the event loop cannot mutate `project`
+        # mid-serialization (see _JSON_DUMPS_ATOMIC), so no snapshot is needed
+        data = _json_dumps_pretty(project)
+        _atomic_write_bytes(metadata_file, data)
 
     async def load_project(self, project_path: str) -> bool:
         metadata_file = Path(project_path) / ".project_metadata.json"
-        if not metadata_file.exists():
+        try:
+            data = await asyncio.to_thread(metadata_file.read_bytes)
+        except FileNotFoundError:
             return False
-        with open(metadata_file, "r") as f:
-            proj = json.load(f)
+        proj = _json_loads(data)
         name = proj.get("name")
         if name:
             self._projects[name] = proj
             self._active_project_name = name
-        print(f"✅ Loaded project: {name}")
+        logger.info(f"✅ Loaded project: {name}")
         return True
 
-    async def log_interaction(self, prompt: str, stdout: str, stderr: str):
-        log_dir = Path.home() / "ai-dev-pipeline" / "logs"
-        log_dir.mkdir(exist_ok=True)
-        log_file = log_dir / f"claude_code_{datetime.now().strftime('%Y%m%d')}.log"
-        with open(log_file, "a") as f:
-            f.write(f"\n{'='*80}\n")
-            f.write(f"Timestamp: {datetime.now().isoformat()}\n")
-            f.write(f"Prompt: {prompt[:500]}\n")
-            f.write(f"Stdout: {stdout[:2000]}\n")
-            f.write(f"Stderr: {stderr[:500]}\n")
-            f.write(f"{'='*80}\n")
+    async def log_interaction(self, prompt: str, stdout: Union[str, bytes], stderr: str):
+        """Queue one interaction record; a background task writes the daily log."""
+        now = datetime.now()
+        today = now.date()
+        if self._log_buffer and today != self._log_buffer_date:
+            await self.flush_log()  # records belong to the previous day's file
+
+        # Slice before encoding: only the kept prefix of a multi-MB stdout is
+        # ever transcoded, and a multi-byte character is never split.
+        record = "".join((
+            f"\n{'='*80}\n",
+            f"Timestamp: {now.isoformat()}\n",
+            f"Prompt: {prompt[:500]}\n",
+            f"Stdout: {_text_prefix(stdout, 2000)}\n",
+            f"Stderr: {stderr[:500]}\n",
+            f"{'='*80}\n",
+        )).encode("utf-8", "replace")
+        self._log_buffer_date = today
+        self._log_buffer.append(record)
+        self._log_buffer_bytes += len(record)
+
+        if len(self._log_buffer) >= LOG_FLUSH_EVERY or self._log_buffer_bytes >= LOG_FLUSH_BYTES:
+            self._log_wakeup.set()
+        if self._log_flusher is None or self._log_flusher.done():
+            self._log_flusher = self._spawn_task(self._log_flush_loop())
+
+    async def _log_flush_loop(self):
+        """Flush the interaction log on a short timer; exit once it stays empty."""
+        while True:
+            try:
+                await asyncio.wait_for(self._log_wakeup.wait(), LOG_FLUSH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._log_wakeup.clear()
+            if not self._log_buffer:
+                return
+            await self.flush_log()
+
+    async def flush_log(self):
+        """Write all buffered interaction records with a single os.write."""
+        if not self._log_buffer:
+            return
+        records, date = self._log_buffer, self._log_buffer_date
+        self._log_buffer = []
+        self._log_buffer_bytes = 0
+        async with self._log_lock:
+            await asyncio.to_thread(self._write_log, date, b"".join(records))
+
+    def _write_log(self, date, data: bytes):
+        if date != self._log_date:
+            self._close_log()
+            log_file = self._log_dir / f"claude_code_{date:%Y%m%d}.log"
+            self._log_fd = os.open(log_file, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+            self._log_date = date
+        view = memoryview(data)
+        while view:
+            view = view[os.write(self._log_fd, view):]
+
+    def _close_log(self):
+        if self._log_fd is not None:
+            os.close(self._log_fd)
+            self._log_fd = None
+            self._log_date = None
 
     # ==========================================
     # STATUS (for dashboard)
     # ==========================================
 
     def get_full_status(self) -> Dict:
-        """Return a snapshot suitable for the web dashboard."""
-        projects = {}
-        for name, proj in self._projects.items():
-            monitor = self._monitors.get(name)
-            monitor_running = monitor.is_running() if monitor else False
-            projects[name] = {
-                **proj,
-                "active": name == self._active_project_name,
-                "monitor_running": monitor_running,
-            }
+        """
+        Return a snapshot suitable for the web dashboard. Project rows are
+        rebuilt only when a project, the active project or the monitor's
+        watch set has changed since the last call; worker status is live.
+        The returned project rows are shared and must not be mutated.
+        """
+        monitor = self._monitor
+        key = (
+            self._projects.version,
+            self._active_project_name,
+            (monitor.is_running(), frozenset(monitor.projects)) if monitor else None,
+        )
+        if self._status_snapshot is None or self._status_snapshot[0] != key:
+            rows = {}
+            for name, proj in self._projects.items():
+                rows[name] = {
+                    **proj,
+                    "active": name == self._active_project_name,
+                    "monitor_running": bool(monitor and monitor.is_watching(name)),
+                }
+            self._status_snapshot = (key, rows)
+        projects = self._status_snapshot[1]
 
         worker_status = (
             self._worker_daemon.get_status()
@@ -1175,6 +2788,7 @@ Provide a helpful, friendly response.
             "projects": projects,
             "active_project": self._active_project_name,
             "workers": worker_status,
+            "claude_runs": {"running": len(self._claude_procs), "max": CLAUDE_MAX_CONCURRENCY},
         }
 
 
@@ -1190,5 +2804,7 @@ if __name__ == "__main__":
             "Create a simple task management web app", "test_user_123"
         )
         print(response)
+        await agent.shutdown()
 
+    install_uvloop()
     asyncio.run(test())
@@ -3,79 +3,116 @@ Agent Messaging System for AI Development Pipeline
 Redis-based pub/sub and queue system for agent-to-agent communication
 """
 
-import redis
-import json
+import msgspec
 import asyncio
+import functools
 from typing import Dict, Optional, Callable, Any, List
 from datetime import datetime
 import uuid
 
+from redis.asyncio import Redis
 
-class AgentMessage:
+BROADCAST_CHANNEL = "agent:broadcast"
+
+# Outgoing messages are queued and sent in one pipelined round trip per
+# batch: at most SEND_BATCH_MAX messages, or whatever arrived within
+# SEND_BATCH_WINDOW seconds of the first
+SEND_BATCH_MAX = 100
+SEND_BATCH_WINDOW = 0.005
+
+# Most messages an agent queue holds; past it the lowest-priority (highest
+# score) messages are dropped, in the same round trip as the enqueue
+QUEUE_MAX_LEN = 10_000
+
+# KEYS[1] = queue, ARGV = member, priority, cap. Returns the number dropped.
+_ENQUEUE_CAPPED_LUA = """
+redis.call('ZADD', KEYS[1], ARGV[2], ARGV[1])
+local extra = redis.call('ZCARD', KEYS[1]) - tonumber(ARGV[3])
+if extra > 0 then
+    redis.call('ZPOPMAX', KEYS[1], extra)
+    return extra
+end
+return 0
+"""
+
+# Queue keys are found with SCAN, never KEYS, and counted / deleted one
+# pipelined round trip per batch of this many keys
+QUEUE_KEY_PATTERN = "queue:agent:*"
+QUEUE_SCAN_BATCH = 500
+
+# Longest a blocking read waits before re-checking `running`. Messages wake
+# the reader as soon as they arrive; this only bounds how long stop takes.
+LISTEN_TIMEOUT = 1.0
+
+
+class AgentMessage(msgspec.Struct):
     """
     Standard message format for agent communication
+
+    Args:
+        message_type: Type of message (task_assignment, status_update, etc.)
+        sender: Agent sending the message
+        recipient: Agent receiving the message (or "broadcast")
+        content: Message content dictionary
+        priority: Message priority (0=highest, 3=lowest)
+        message_id: Optional unique message ID
     """
-    
-    def __init__(
-        self,
-        message_type: str,
-        sender: str,
-        recipient: str,
-        content: Dict,
-        priority: int = 2,
-        message_id: Optional[str] = None
-    ):
-        """
-        Initialize agent message
-        
-        Args:
-            message_type: Type of message (task_assignment, status_update, etc.)
-            sender: Agent sending the message
-            recipient: Agent receiving the message (or "broadcast")
-            content: Message content dictionary
-            priority: Message priority (0=highest, 3=lowest)
-            message_id: Optional unique message ID
-        """
-        self.message_id = message_id or str(uuid.uuid4())
-        self.message_type = message_type
-        self.sender = sender
-        self.recipient = recipient
-        self.content = content
-        self.priority = priority
-        self.timestamp = datetime.now().isoformat()
+
+    message_type: str
+    sender: str
+    recipient: str
+    content: Dict
+    priority: int = 2
+    message_id: Optional[str] = None
+    timestamp: str = msgspec.field(default_factory=lambda: datetime.now().isoformat())
+
+    def __post_init__(self):
+        if self.message_id is None:
+            self.message_id = str(uuid.uuid4())
     
     def to_dict(self) -> Dict:
         """Convert message to dictionary"""
-        return {
-            "message_id": self.message_id,
-            "message_type": self.message_type,
-            "sender": self.sender,
-            "recipient": self.recipient,
-            "content": self.content,
-            "priority": self.priority,
-            "timestamp": self.timestamp
-        }
+        return msgspec.structs.asdict(self)
+    
+    def to_bytes(self) -> bytes:
+        """Encode message as msgpack (the Redis wire format)"""
+        return _ENCODER.encode(self)
     
     def to_json(self) -> str:
-        """Convert message to JSON string"""
-        return json.dumps(self.to_dict())
+        """Convert message to JSON string (for logs and humans)"""
+        return msgspec.json.encode(self).decode("utf-8")
     
     @classmethod
     def from_dict(cls, data: Dict) -> 'AgentMessage':
         """Create message from dictionary"""
-        return cls(
-            message_type=data["message_type"],
-            sender=data["sender"],
-            recipient=data["recipient"],
-            content=data["content"],
-            priority=data.get("priority", 2),
-            message_id=data.get("message_id")
-        )
+        return msgspec.convert(data, cls)
+    
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'AgentMessage':
+        """Decode a msgpack message; JSON from older senders is still accepted"""
+        try:
+            return _DECODER.decode(data)
+        except msgspec.DecodeError:
+            return cls.from_json(data)
     
     @classmethod
-    def from_json(cls, json_str: str) -> 'AgentMessage':
-        """Create message from JSON string"""
-        return cls.from_dict(json.loads(json_str))
+    def from_json(cls, json_str) -> 'AgentMessage':
+        """Create message from JSON string (or bytes)"""
+        return msgspec.json.decode(json_str, type=cls)
+
+
+_ENCODER = msgspec.msgpack.Encoder()
+_DECODER = msgspec.msgpack.Decoder(AgentMessage)
+
+
+@functools.lru_cache(maxsize=128)
+def _recipient_key(recipient: str, use_queue: bool) -> str:
+    """Redis key a message to `recipient` goes to (queue or pub/sub channel)"""
+    if use_queue:
+        return f"queue:agent:{recipient}"
+    if recipient == "broadcast":
+        return BROADCAST_CHANNEL
+    return f"agent:{recipient}"
 
 
 class AgentMessenger:
@@ -105,29 +142,39 @@ class AgentMessenger:
         self.agent_id = agent_id
         self.agent_type = agent_type
         
-        # Connect to Redis
-        self.redis_client = redis.Redis(
+        # Connect to Redis (async client: connects on first command)
+        self.redis_client = Redis(
             host=redis_host,
             port=redis_port,
             db=redis_db,
-            decode_responses=True
+            decode_responses=False  # messages are msgpack bytes
         )
         
-        # Pub/sub for real-time messaging
+        # Pub/sub for real-time messaging: the agent-specific channel plus
+        # broadcast, subscribed on first read (subscribing needs the loop)
         self.pubsub = self.redis_client.pubsub()
-        
-        # Subscribe to agent-specific channel
         self.agent_channel = f"agent:{agent_type}:{agent_id}"
-        self.pubsub.subscribe(self.agent_channel)
+        self._subscribed = False
+        
+        # Keys built once rather than per message
+        self.sender_id = f"{agent_type}:{agent_id}"
+        self.queue_key = f"queue:agent:{agent_type}:{agent_id}"
         
-        # Also subscribe to broadcast channel
-        self.pubsub.subscribe("agent:broadcast")
+        # Capped enqueue, run by SHA (loaded once per pipeline if missing)
+        self._enqueue_script = self.redis_client.register_script(_ENQUEUE_CAPPED_LUA)
         
         # Message handlers
         self.message_handlers = {}
         
-        # Running flag
+        # Outgoing (key, payload, priority, use_queue) batch and its flusher
+        self._tx_queue: List[tuple] = []
+        self._tx_flusher: Optional[asyncio.Task] = None
+        self._tx_wakeup = asyncio.Event()   # set when a full batch is waiting
+        self._tx_lock = asyncio.Lock()      # keeps batches in send order
+        
+        # Running flag, and the inbox the blocking readers feed while listening
         self.running = False
+        self._inbox: Optional[asyncio.Queue] = None
     
     async def send_message(
         self,
@@ -153,30 +200,59 @@ class AgentMessenger:
         # Create message
         message = AgentMessage(
             message_type=message_type,
-            sender=f"{self.agent_type}:{self.agent_id}",
+            sender=self.sender_id,
             recipient=recipient,
             content=content,
             priority=priority
         )
         
-        if use_queue:
-            # Add to queue with priority
-            queue_name = f"queue:agent:{recipient}"
-            self.redis_client.zadd(
-                queue_name,
-                {message.to_json(): priority}
-            )
-        else:
-            # Publish to channel
-            if recipient == "broadcast":
-                channel = "agent:broadcast"
-            else:
-                channel = f"agent:{recipient}"
-            
-            self.redis_client.publish(channel, message.to_json())
+        # Queued for the next pipelined batch; flush() sends it immediately
+        key = _recipient_key(recipient, use_queue)
+        self._tx_queue.append((key, message.to_bytes(), priority, use_queue))
+        if len(self._tx_queue) >= SEND_BATCH_MAX:
+            self._tx_wakeup.set()
+        if self._tx_flusher is None or self._tx_flusher.done():
+            self._tx_flusher = asyncio.create_task(self._flush_loop())
         
         return message.message_id
     
+    async def _flush_loop(self):
+        """Send queued messages once per batch window; exit once none are left"""
+        while self._tx_queue:
+            try:
+                await asyncio.wait_for(self._tx_wakeup.wait(), SEND_BATCH_WINDOW)
+            except asyncio.TimeoutError:
+                pass
+            self._tx_wakeup.clear()
+            await self.flush()
+    
+    async def flush(self):
+        """
+        Send every queued message now in one pipelined round trip
+        (await before shutdown so nothing queued is lost)
+        """
+        async with self._tx_lock:
+            batch, self._tx_queue = self._tx_queue, []
+            if not batch:
+                return
+            try:
+                async with self.redis_client.pipeline(transaction=False) as pipe:
+                    for key, payload, priority, use_queue in batch:
+                        if use_queue:
+                            await self._enqueue_script(
+                                keys=[key], args=[payload, priority, QUEUE_MAX_LEN], client=pipe
+                            )
+                        else:
+                            pipe.publish(key, payload)
+                    await pipe.execute()
+            except Exception as e:
+                print(f"❌ Error sending {len(batch)} messages: {e}")
+    
+    async def _subscribe(self):
+        if not self._subscribed:
+            await self.pubsub.subscribe(self.agent_channel, BROADCAST_CHANNEL)
+            self._subscribed = True
+    
     async def receive_message(self, timeout: int = 1) -> Optional[AgentMessage]:
         """
         Receive a message from pub/sub
@@ -187,11 +263,12 @@ class AgentMessenger:
         Returns:
             AgentMessage or None if no message
         """
-        message = self.pubsub.get_message(timeout=timeout)
+        await self._subscribe()
+        message = await self.pubsub.get_message(timeout=timeout)
         
         if message and message['type'] == 'message':
             try:
-                return AgentMessage.from_json(message['data'])
+                return AgentMessage.from_bytes(message['data'])
             except Exception as e:
                 print(f"Error parsing message: {e}")
                 return None
@@ -205,17 +282,12 @@ class AgentMessenger:
         Returns:
             AgentMessage or None if queue empty
         """
-        queue_name = f"queue:agent:{self.agent_type}:{self.agent_id}"
-        
-        # Get highest priority message (lowest score in sorted set)
-        messages = self.redis_client.zrange(queue_name, 0, 0)
+        # Pop highest priority message (lowest score) in one atomic command
+        popped = await self.redis_client.zpopmin(self.queue_key)
         
-        if messages:
-            message_json = messages[0]
-            # Remove from queue
-            self.redis_client.zrem(queue_name, message_json)
-            
-            return AgentMessage.from_json(message_json)
+        if popped:
+            raw, _ = popped[0]
+            return AgentMessage.from_bytes(raw)
         
         return None
     
@@ -236,26 +308,69 @@ class AgentMessenger:
     async def start_listening(self):
         """
         Start listening for messages and dispatch to handlers
+
+        Pub/sub and the priority queue are each read by a blocking reader
+        that wakes as soon as a message arrives; both feed one inbox that
+        is handled in arrival order.
         """
         self.running = True
+        self._inbox = asyncio.Queue()
         
         print(f"📡 {self.agent_type} ({self.agent_id}) started listening...")
         
+        readers = [
+            asyncio.create_task(self._read_pubsub()),
+            asyncio.create_task(self._read_queue()),
+        ]
+        try:
+            while self.running:
+                message = await self._inbox.get()
+                if message is not None:   # None only wakes us for stop
+                    await self._handle_message(message)
+        finally:
+            self.running = False
+            # Readers notice `running` within LISTEN_TIMEOUT; the pub/sub
+            # connection is only released once its reader is done with it
+            await asyncio.gather(*readers, return_exceptions=True)
+            self._inbox = None
+            await self._unsubscribe()
+    
+    async def _unsubscribe(self):
+        if self._subscribed:
+            self._subscribed = False
+            await self.pubsub.unsubscribe()
+    
+    async def _read_pubsub(self):
+        """Block on pub/sub and forward each message to the inbox"""
         while self.running:
-            # Check pub/sub messages
-            message = await self.receive_message(timeout=1)
-            
-            if message:
-                await self._handle_message(message)
-            
-            # Check queue messages
-            queued_message = await self.get_queued_message()
-            
-            if queued_message:
-                await self._handle_message(queued_message)
-            
-            # Small delay to prevent CPU spinning
-            await asyncio.sleep(0.1)
+            try:
+                await self._subscribe()
+                message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=LISTEN_TIMEOUT)
+            except Exception as e:
+                print(f"❌ Pub/sub read failed: {e}")
+                await asyncio.sleep(LISTEN_TIMEOUT)
+                continue
+            if message and message['type'] == 'message':
+                try:
+                    self._inbox.put_nowait(AgentMessage.from_bytes(message['data']))
+                except Exception as e:
+                    print(f"Error parsing message: {e}")
+    
+    async def _read_queue(self):
+        """Block on the priority queue (BZPOPMIN) and forward each message"""
+        while self.running:
+            try:
+                popped = await self.redis_client.bzpopmin(self.queue_key, timeout=LISTEN_TIMEOUT)
+            except Exception as e:
+                print(f"❌ Queue read failed: {e}")
+                await asyncio.sleep(LISTEN_TIMEOUT)
+                continue
+            if popped:
+                _, raw, _ = popped
+                try:
+                    self._inbox.put_nowait(AgentMessage.from_bytes(raw))
+                except Exception as e:
+                    print(f"Error parsing message: {e}")
     
     async def _handle_message(self, message: AgentMessage):
         """Handle a received message"""
@@ -275,10 +390,18 @@ class AgentMessenger:
         else:
             print(f"⚠️  No handler for message type: {message.message_type}")
     
+    async def close(self):
+        """Send anything still queued, then release pub/sub and the connection pool"""
+        await self.flush()
+        await self._unsubscribe()
+        await self.pubsub.aclose()
+        await self.redis_client.aclose()
+    
     def stop_listening(self):
         """Stop listening for messages"""
         self.running = False
-        self.pubsub.unsubscribe()
+        if self._inbox is not None:
+            self._inbox.put_nowait(None)   # start_listening unsubscribes on exit
         print(f"🛑 {self.agent_type} ({self.agent_id}) stopped listening")
     
     async def broadcast(
@@ -383,26 +506,24 @@ class AgentMessenger:
             message_type="completion_notification",
             content={
                 "task_id": task_id,
-                "completed_by": f"{self.agent_type}:{self.agent_id}",
+                "completed_by": self.sender_id,
                 "result": result
             },
             priority=1
         )
     
-    def get_pending_message_count(self) -> int:
+    async def get_pending_message_count(self) -> int:
         """
         Get number of pending messages in queue
         
         Returns:
             Number of pending messages
         """
-        queue_name = f"queue:agent:{self.agent_type}:{self.agent_id}"
-        return self.redis_client.zcard(queue_name)
+        return await self.redis_client.zcard(self.queue_key)
     
-    def clear_queue(self):
+    async def clear_queue(self):
         """Clear all pending messages in queue"""
-        queue_name = f"queue:agent:{self.agent_type}:{self.agent_id}"
-        self.redis_client.delete(queue_name)
+        await self.redis_client.delete(self.queue_key)
     
     async def get_all_agent_statuses(self) -> List[Dict]:
         """
@@ -429,15 +550,15 @@ class MessageBus:
         redis_db: int = 0
     ):
         """Initialize message bus"""
-        self.redis_client = redis.Redis(
+        self.redis_client = Redis(
             host=redis_host,
             port=redis_port,
             db=redis_db,
-            decode_responses=True
+            decode_responses=False  # messages are msgpack bytes
         )
         
+        # Subscribed to agent:broadcast when monitoring starts
         self.pubsub = self.redis_client.pubsub()
-        self.pubsub.subscribe("agent:broadcast")
         
         # Track agent statuses
         self.agent_statuses = {}
@@ -451,25 +572,44 @@ class MessageBus:
         """
         print(f"👁️  Monitoring agent messages for {duration} seconds...")
         
-        import time
-        start_time = time.time()
-        
-        while time.time() - start_time < duration:
-            message = self.pubsub.get_message(timeout=1)
-            
-            if message and message['type'] == 'message':
-                try:
-                    agent_message = AgentMessage.from_json(message['data'])
-                    print(f"📡 [{agent_message.message_type}] "
-                          f"{agent_message.sender} → {agent_message.recipient}")
-                except Exception as e:
-                    print(f"Error parsing message: {e}")
-            
-            await asyncio.sleep(0.1)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + duration
+        
+        await self.pubsub.subscribe(BROADCAST_CHANNEL)
+        try:
+            # Block on the socket for whatever time is left: each message is
+            # printed as soon as it arrives, with no polling delay in between
+            while (remaining := deadline - loop.time()) > 0:
+                message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=remaining)
+                
+                if message and message['type'] == 'message':
+                    try:
+                        agent_message = AgentMessage.from_bytes(message['data'])
+                        print(f"📡 [{agent_message.message_type}] "
+                              f"{agent_message.sender} → {agent_message.recipient}")
+                    except Exception as e:
+                        print(f"Error parsing message: {e}")
+        finally:
+            # Stop buffering broadcasts nobody is reading until the next call
+            await self.pubsub.unsubscribe(BROADCAST_CHANNEL)
         
         print("✅ Monitoring complete")
     
-    def get_queue_stats(self) -> Dict:
+    async def _queue_key_batches(self):
+        """
+        Yield agent queue keys in lists of up to QUEUE_SCAN_BATCH. SCAN walks
+        the keyspace incrementally, so Redis keeps serving other clients.
+        """
+        batch = []
+        async for key in self.redis_client.scan_iter(match=QUEUE_KEY_PATTERN, count=QUEUE_SCAN_BATCH):
+            batch.append(key)
+            if len(batch) >= QUEUE_SCAN_BATCH:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    
+    async def get_queue_stats(self) -> Dict:
         """
         Get statistics about all message queues
         
@@ -478,23 +618,25 @@ class MessageBus:
         """
         stats = {}
         
-        # Get all queue keys
-        queue_keys = self.redis_client.keys("queue:agent:*")
-        
-        for queue_key in queue_keys:
-            count = self.redis_client.zcard(queue_key)
-            stats[queue_key] = count
+        async for queue_keys in self._queue_key_batches():
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                for queue_key in queue_keys:
+                    pipe.zcard(queue_key)
+                counts = await pipe.execute()
+            for queue_key, count in zip(queue_keys, counts):
+                stats[queue_key.decode()] = count
         
         return stats
     
-    def clear_all_queues(self):
+    async def clear_all_queues(self):
         """Clear all agent message queues"""
-        queue_keys = self.redis_client.keys("queue:agent:*")
+        cleared = 0
         
-        for queue_key in queue_keys:
-            self.redis_client.delete(queue_key)
+        async for queue_keys in self._queue_key_batches():
+            await self.redis_client.delete(*queue_keys)
+            cleared += len(queue_keys)
         
-        print(f"🧹 Cleared {len(queue_keys)} message queues")
+        print(f"🧹 Cleared {cleared} message queues")
 
 
 # ==========================================
@@ -544,6 +686,7 @@ if __name__ == "__main__":
             content={"task": "Implement user API"},
             priority=1
         )
+        await frontend_agent.flush()
         
         # Backend processes message
         message = await backend_agent.receive_message()
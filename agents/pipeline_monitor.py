@@ -1,17 +1,19 @@
 """
 Pipeline Monitor for AI Development Pipeline (Phase 4)
 
-Runs as a background asyncio task that:
-1. Polls GitHub Actions every 30 seconds for CI/CD failures
+Runs as a single background asyncio task that:
+1. Polls GitHub Actions every 30 seconds for CI/CD failures, for every
+   watched project's repo concurrently
 2. Diagnoses failures with Claude Code, pushes fixes, re-checks
 3. Detects stalled workers (stuck in 'working' for >10 min)
-4. Sends proactive Discord notifications via master._notify_channel
+4. Sends proactive Discord notifications via the master's notify queue
 """
 
 import asyncio
 import os
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import TYPE_CHECKING, Dict, Optional, Set
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, Iterable, List, Optional, Set
 
 from agents.github_client import GitHubClient
 from utils.structured_logger import get_logger
@@ -25,29 +27,53 @@ logger = get_logger("pipeline_monitor", agent_type="master")
 MONITOR_POLL_INTERVAL = int(os.getenv("MONITOR_POLL_INTERVAL", "30"))
 MAX_FIX_ATTEMPTS = 3
 WORKER_STALL_MINUTES = 10
+# Handled run ids kept when persisting monitor state across restarts
+PERSISTED_RUN_IDS = 100
+# Run ids remembered as handled / with fix attempts; the oldest are forgotten
+# first, so a long-lived monitor's memory stays flat
+HANDLED_RUNS_MAX = 1024
+FIX_ATTEMPTS_MAX = 1024
+# Repos polled concurrently per cycle (keeps clear of GitHub's secondary rate limit)
+MONITOR_CONCURRENCY = 8
 
 
 class PipelineMonitor:
     """
-    Background CI/CD watcher and worker health monitor.
+    Background CI/CD watcher and worker health monitor. One instance serves
+    every watched project: each cycle fans out over their repos.
 
     Lifecycle:
         monitor = PipelineMonitor(master, github)
-        await monitor.start()   # begins background loop
-        await monitor.stop()    # cancels loop cleanly
+        await monitor.watch("my-project")    # begins background loop
+        await monitor.unwatch("my-project")  # stops it once nothing is watched
+        await monitor.stop()                 # cancels loop cleanly
     """
 
-    def __init__(self, master: "MasterAgent", github: GitHubClient):
+    def __init__(
+        self,
+        master: "MasterAgent",
+        github: GitHubClient,
+        on_handled: Optional[Callable[[str], Awaitable[None]]] = None,
+    ):
         self.master = master
         self.github = github
+        # Awaited with the project name after each newly handled run, so its
+        # state can be persisted
+        self._on_handled = on_handled
         self._running = False
         self._task: Optional[asyncio.Task] = None
 
-        # run_id → number of fix attempts made
-        self._fix_attempts: Dict[int, int] = {}
+        # Names of the projects whose repos are polled
+        self.projects: Set[str] = set()
+        self._poll_slots = asyncio.Semaphore(MONITOR_CONCURRENCY)
 
-        # run_ids already fully handled (no re-processing)
-        self._handled_runs: Set[int] = set()
+        # run_id → number of fix attempts made (oldest first, bounded)
+        self._fix_attempts: "OrderedDict[int, int]" = OrderedDict()
+
+        # run_ids already fully handled (no re-processing), oldest first and
+        # bounded; run ids are unique across repos, so one set serves every
+        # watched project
+        self._handled_runs: "OrderedDict[int, None]" = OrderedDict()
 
         logger.info("PipelineMonitor initialized")
 
@@ -55,10 +81,16 @@ class PipelineMonitor:
     # PUBLIC API
     # ==========================================
 
-    async def start(self):
-        """Start the background monitoring loop (idempotent)."""
+    async def start(self, resume_from: Optional[Iterable[int]] = None):
+        """
+        Start the background monitoring loop (idempotent).
+        `resume_from` seeds the already-handled run ids saved by a previous
+        process, so a restart doesn't re-notify or re-fix those runs.
+        """
         if self._running:
             return
+        if resume_from:
+            self._remember_handled(sorted(resume_from))
         self._running = True
         self._task = asyncio.create_task(self._monitor_loop())
         logger.info("PipelineMonitor started")
@@ -78,12 +110,63 @@ class PipelineMonitor:
         """Return True if the monitor loop is active."""
         return self._running and self._task is not None and not self._task.done()
 
+    async def watch(self, name: str, resume_from: Optional[Iterable[int]] = None):
+        """Add a project to the polled set, starting the loop if needed."""
+        if resume_from:
+            self._remember_handled(sorted(resume_from))
+        if name not in self.projects:
+            self.projects.add(name)
+            repo_name = self._project(name).get("repo_name", "")
+            if repo_name:
+                await self._notify(f"🔍 Monitoring CI for {repo_name}...")
+        await self.start()
+
+    async def unwatch(self, name: str):
+        """Drop a project; the loop stops once no project is left."""
+        self.projects.discard(name)
+        if not self.projects:
+            await self.stop()
+
+    def is_watching(self, name: str) -> bool:
+        return self.is_running() and name in self.projects
+
+    def _project(self, name: str) -> Dict:
+        return self.master._projects.get(name) or {}
+
+    def _remember_handled(self, run_ids: Iterable[int]):
+        for run_id in run_ids:
+            self._handled_runs[run_id] = None
+            self._handled_runs.move_to_end(run_id)
+        while len(self._handled_runs) > HANDLED_RUNS_MAX:
+            self._handled_runs.popitem(last=False)
+
+    def _count_fix_attempt(self, run_id: int) -> int:
+        """Record one more fix attempt for `run_id` and return the new count."""
+        attempt = self._fix_attempts.pop(run_id, 0) + 1
+        self._fix_attempts[run_id] = attempt
+        if len(self._fix_attempts) > FIX_ATTEMPTS_MAX:
+            self._fix_attempts.popitem(last=False)
+        return attempt
+
+    async def _mark_handled(self, run_id: int, name: str):
+        self._remember_handled((run_id,))
+        if self._on_handled:
+            try:
+                await self._on_handled(name)
+            except Exception as e:
+                logger.warning(f"Could not persist handled run {run_id}: {e}")
+
+    def handled_run_ids(self) -> List[int]:
+        """Most recent handled run ids, for persisting across restarts."""
+        return sorted(self._handled_runs)[-PERSISTED_RUN_IDS:]
+
     def get_status(self) -> Dict:
         """Return current monitor state for the !monitor status command."""
-        project = self.master.current_project
         return {
             "running": self.is_running(),
-            "repo": project.get("repo_name", "") if project else "",
+            "repos": sorted(
+                filter(None, (self._project(n).get("repo_name", "") for n in self.projects))
+            ),
             "fix_attempts": dict(self._fix_attempts),
             "handled_runs": len(self._handled_runs),
         }
@@ -94,21 +177,21 @@ class PipelineMonitor:
 
     async def _monitor_loop(self):
         """30-second polling loop — runs until stop() is called."""
-        project = self.master.current_project
-        if project:
-            repo_name = project.get("repo_name", "")
-            if repo_name:
-                await self._notify(f"🔍 Monitoring CI for {repo_name}...")
-
         try:
             while self._running:
-                try:
-                    await self._check_ci_status()
-                    await self._check_worker_health()
-                except asyncio.CancelledError:
-                    raise
-                except Exception as e:
-                    logger.error(f"Monitor loop iteration error: {e}", exc_info=True)
+                # The GitHub poll and the local worker check are independent,
+                # so a slow GitHub call never delays stall detection
+                results = await asyncio.gather(
+                    self._check_ci_status(),
+                    self._check_worker_health(),
+                    return_exceptions=True,
+                )
+                for check, result in zip(("CI", "worker health"), results):
+                    if isinstance(result, Exception):
+                        logger.error(
+                            f"Monitor {check} check error: {result}",
+                            exc_info=(type(result), result, result.__traceback__),
+                        )
 
                 await asyncio.sleep(MONITOR_POLL_INTERVAL)
         except asyncio.CancelledError:
@@ -121,17 +204,35 @@ class PipelineMonitor:
     # ==========================================
 
     async def _check_ci_status(self):
-        """Fetch latest GitHub Actions run and act on failure/success."""
-        project = self.master.current_project
-        if not project:
-            return
+        """Check every watched project's repo concurrently."""
+        # Projects removed from the master since they were watched are dropped
+        # here, and the loop ends once nothing is left to poll
+        gone = {name for name in self.projects if name not in self.master._projects}
+        if gone:
+            self.projects -= gone
+            logger.info(f"Stopped monitoring removed projects: {', '.join(sorted(gone))}")
+            if not self.projects:
+                self._running = False
+                return
+        names = list(self.projects)
+        results = await asyncio.gather(
+            *(self._check_project_ci(name) for name in names),
+            return_exceptions=True,
+        )
+        for name, result in zip(names, results):
+            if isinstance(result, Exception):
+                logger.error(f"CI check failed for {name}: {result}")
 
+    async def _check_project_ci(self, name: str):
+        """Fetch a project's latest GitHub Actions run and act on failure/success."""
+        project = self._project(name)
         repo_name = project.get("repo_name", "")
         if not repo_name:
             return
 
         try:
-            runs = await self.github.get_workflow_runs(repo_name, branch="main")
+            async with self._poll_slots:
+                runs = await self.github.get_workflow_runs(repo_name, branch="main")
         except Exception as e:
             logger.warning(f"Could not fetch workflow runs for {repo_name}: {e}")
             return
@@ -153,21 +254,21 @@ class PipelineMonitor:
         if conclusion == "failure":
             attempts = self._fix_attempts.get(run_id, 0)
             if attempts >= MAX_FIX_ATTEMPTS:
-                self._handled_runs.add(run_id)
+                await self._mark_handled(run_id, name)
                 await self._notify(
-                    f"❌ CI still failing after {MAX_FIX_ATTEMPTS} auto-fix attempts — "
-                    f"needs your attention. Run ID: {run_id}"
+                    f"❌ CI still failing for `{repo_name}` after {MAX_FIX_ATTEMPTS} "
+                    f"auto-fix attempts — needs your attention. Run ID: {run_id}"
                 )
                 return
-            await self._handle_ci_failure(latest_run)
+            await self._handle_ci_failure(latest_run, name)
 
         elif conclusion == "success":
-            self._handled_runs.add(run_id)
+            await self._mark_handled(run_id, name)
             # Only notify if we were the ones who attempted a fix
             if run_id in self._fix_attempts:
-                await self._notify("✅ CI passing — all checks green")
+                await self._notify(f"✅ CI passing for `{repo_name}` — all checks green")
 
-    async def _handle_ci_failure(self, run: Dict):
+    async def _handle_ci_failure(self, run: Dict, name: str):
         """
         Diagnose a CI failure, apply a Claude Code fix, push the fix.
 
@@ -177,19 +278,17 @@ class PipelineMonitor:
         run_id = run.get("id")
         run_name = run.get("name", "CI")
 
-        project = self.master.current_project
+        project = self._project(name)
         if not project:
             return
 
         repo_name = project.get("repo_name", "")
         project_path = project.get("path", "")
 
-        # Increment attempt counter
-        self._fix_attempts[run_id] = self._fix_attempts.get(run_id, 0) + 1
-        attempt = self._fix_attempts[run_id]
+        attempt = self._count_fix_attempt(run_id)
 
         await self._notify(
-            f"❌ CI failed on `{run_name}` "
+            f"❌ CI failed on `{run_name}` for `{repo_name}` "
             f"(attempt {attempt}/{MAX_FIX_ATTEMPTS}) — diagnosing now..."
         )
 
@@ -255,7 +354,7 @@ Fix the code so CI will pass on the next run.
         )
 
         if pushed:
-            self._handled_runs.add(run_id)
+            await self._mark_handled(run_id, name)
             await self._notify(
                 f"🔧 Fix pushed: {fix_summary or 'see commit for details'}\n"
                 f"Waiting for CI to re-run..."
@@ -318,16 +417,8 @@ Fix the code so CI will pass on the next run.
     # ==========================================
 
     async def _notify(self, message: str):
-        """Send a proactive message to the last-used Discord channel."""
-        logger.info(f"[notify] {message}")
-
-        channel = getattr(self.master, "_notify_channel", None)
-        if channel is None:
-            return
-
-        try:
-            if len(message) > 2000:
-                message = message[:1997] + "..."
-            await channel.send(message)
-        except Exception as e:
-            logger.warning(f"Discord notification failed: {e}")
+        """
+        Send a proactive message to the last-used Discord channel through the
+        master's notification queue, so monitor and worker bursts coalesce.
+        """
+        await self.master._notify(message)
@@ -0,0 +1,221 @@
+"""
+sqlite-vec Memory Backend for AI Development Pipeline
+
+Drop-in replacement for the subset of the Chroma collection API that
+MasterAgent uses (add / query with precomputed embeddings). Vectors are
+stored int8-quantized in a sqlite-vec `vec0` virtual table, which keeps
+KNN queries fast and the on-disk index a quarter the size of FP32.
+
+Unit-length embedding components are small (RMS 1/sqrt(dim)), so a fixed
+[-1, 1] → [-127, 127] mapping would use only a few dozen int8 levels.
+New indexes instead map ±CLIP_SIGMAS RMS onto ±127; the rare larger
+components saturate at ±127. The scale depends only on the dimension and
+is recorded in `vec_meta` when the index is created.
+
+Enabled with MEMORY_BACKEND=sqlite-vec; MasterAgent falls back to Chroma
+whenever the extension cannot be loaded.
+"""
+
+import json
+import math
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+# KNN candidates fetched per requested result when filtering on metadata
+WHERE_OVERFETCH = 4
+
+# Component magnitude, in multiples of the RMS 1/sqrt(dim), mapped to 127
+CLIP_SIGMAS = 4.0
+# Scale of indexes created before index_scale(): [-1, 1] → [-127, 127]
+UNIT_SCALE = 127.0
+
+
+def _matches(metadata: Dict, where: Dict) -> bool:
+    return all(metadata.get(key) == value for key, value in where.items())
+
+
+def _unit_rows(vectors: Sequence[Sequence[float]]) -> np.ndarray:
+    m = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(m, axis=-1, keepdims=True)
+    return m / np.where(norms == 0, 1, norms)
+
+
+def quantize_i8(vector: Sequence[float], scale: float = UNIT_SCALE) -> np.ndarray:
+    """Scale a vector to unit length, multiply by `scale` and clip to int8."""
+    v = _unit_rows(vector)
+    return np.clip(np.round(v * scale), -127, 127).astype(np.int8)
+
+
+def index_scale(dim: int) -> float:
+    """
+    int8 scale for unit vectors of `dim` components: CLIP_SIGMAS × RMS maps
+    to 127 and larger components clip. One global scale keeps L2 distances
+    proportional. Low dimensions fall back to UNIT_SCALE, which never clips.
+    """
+    return max(UNIT_SCALE, 127.0 * math.sqrt(dim) / CLIP_SIGMAS)
+
+
+class SqliteVecMemory:
+    """
+    Vector memory on sqlite-vec with an int8 `vec0` index.
+
+    Documents and metadata live in a plain `chunks` table whose rowid
+    matches the `vec_chunks` row, so a KNN hit joins back in one query.
+    The vec0 table is created on first insert, once the embedding
+    dimension (and so the int8 scale, kept in `vec_meta`) is known.
+    MasterAgent writes from a worker thread while queries run on the
+    event loop, so every operation holds `_lock`.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self._lock = threading.Lock()
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            " rowid INTEGER PRIMARY KEY,"
+            " id TEXT UNIQUE NOT NULL,"
+            " document TEXT,"
+            " metadata TEXT)"
+        )
+        self.conn.execute("CREATE TABLE IF NOT EXISTS vec_meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.conn.commit()
+        self._has_index = self._index_exists()
+        row = self.conn.execute("SELECT value FROM vec_meta WHERE key = 'scale'").fetchone()
+        # Indexes built before vec_meta existed were quantized at UNIT_SCALE
+        self._scale = float(row[0]) if row else UNIT_SCALE
+
+    def _index_exists(self) -> bool:
+        row = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'vec_chunks'"
+        ).fetchone()
+        return row is not None
+
+    def _set_scale(self, dim: int):
+        self._scale = index_scale(dim)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO vec_meta (key, value) VALUES ('scale', ?)", (repr(self._scale),)
+        )
+
+    def _create_index(self, dim: int):
+        self._set_scale(dim)
+        self.conn.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS vec_chunks USING vec0(embedding int8[{dim}])"
+        )
+        self._has_index = True
+
+    def add(
+        self,
+        documents: List[str],
+        embeddings: List[Sequence[float]],
+        metadatas: List[Dict],
+        ids: List[str],
+    ):
+        if not ids:
+            return
+        with self._lock:
+            self._add(documents, embeddings, metadatas, ids)
+
+    def _add(self, documents, embeddings, metadatas, ids):
+        if not self._has_index:
+            self._create_index(len(embeddings[0]))
+
+        with self.conn:
+            for memory_id, document, embedding, metadata in zip(ids, documents, embeddings, metadatas):
+                existing = self.conn.execute(
+                    "SELECT rowid FROM chunks WHERE id = ?", (memory_id,)
+                ).fetchone()
+                if existing:
+                    rowid = existing[0]
+                    self.conn.execute(
+                        "UPDATE chunks SET document = ?, metadata = ? WHERE rowid = ?",
+                        (document, json.dumps(metadata), rowid),
+                    )
+                    self.conn.execute("DELETE FROM vec_chunks WHERE rowid = ?", (rowid,))
+                else:
+                    rowid = self.conn.execute(
+                        "INSERT INTO chunks (id, document, metadata) VALUES (?, ?, ?)",
+                        (memory_id, document, json.dumps(metadata)),
+                    ).lastrowid
+                self.conn.execute(
+                    "INSERT INTO vec_chunks (rowid, embedding) VALUES (?, vec_int8(?))",
+                    (rowid, quantize_i8(embedding, self._scale).tobytes()),
+                )
+
+    def query(
+        self,
+        query_embeddings: List[Sequence[float]],
+        n_results: int = 5,
+        where: Optional[Dict] = None,
+    ) -> Dict:
+        """
+        Return Chroma-shaped results: one inner list per query embedding.
+        vec0 cannot filter on the joined metadata during KNN, so a `where`
+        query over-fetches WHERE_OVERFETCH× candidates and filters them.
+        """
+        k = n_results * WHERE_OVERFETCH if where else n_results
+        result: Dict[str, List[List]] = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        for embedding in query_embeddings:
+            rows = []
+            if self._has_index:
+                with self._lock:
+                    rows = self.conn.execute(
+                        "SELECT c.id, c.document, c.metadata, v.distance"
+                        " FROM vec_chunks v JOIN chunks c ON c.rowid = v.rowid"
+                        " WHERE v.embedding MATCH vec_int8(?) AND k = ?"
+                        " ORDER BY v.distance",
+                        (quantize_i8(embedding, self._scale).tobytes(), k),
+                    ).fetchall()
+            hits = [(r[0], r[1], json.loads(r[2]), r[3]) for r in rows]
+            if where:
+                hits = [h for h in hits if _matches(h[2], where)][:n_results]
+            result["ids"].append([h[0] for h in hits])
+            result["documents"].append([h[1] for h in hits])
+            result["metadatas"].append([h[2] for h in hits])
+            result["distances"].append([h[3] for h in hits])
+        return result
+
+    def get(self, where: Optional[Dict] = None, limit: Optional[int] = None, include=None) -> Dict:
+        """Chroma-style metadata lookup (exact-match `where` on top-level keys)."""
+        sql, params = "SELECT id, document, metadata FROM chunks", []
+        if where:
+            sql += " WHERE " + " AND ".join("json_extract(metadata, ?) = ?" for _ in where)
+            for key, value in where.items():
+                params.extend((f"$.{key}", value))
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return {
+            "ids": [r[0] for r in rows],
+            "documents": [r[1] for r in rows],
+            "metadatas": [json.loads(r[2]) for r in rows],
+        }
+
+
+def open_sqlite_vec_memory(db_path: Path) -> Optional[SqliteVecMemory]:
+    """
+    Open (or create) the sqlite-vec memory database.
+    Returns None when sqlite-vec or SQLite extension loading is unavailable.
+    """
+    try:
+        import sqlite_vec  # optional dep, only needed for MEMORY_BACKEND=sqlite-vec
+    except ImportError:
+        print("⚠️ sqlite-vec not installed — using Chroma memory backend")
+        return None
+
+    try:
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        conn.enable_load_extension(True)
+        sqlite_vec.load(conn)
+        conn.enable_load_extension(False)
+        return SqliteVecMemory(conn)
+    except (AttributeError, sqlite3.Error) as e:
+        print(f"⚠️ Could not load sqlite-vec ({e}) — using Chroma memory backend")
+        return None
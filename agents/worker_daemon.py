@@ -7,10 +7,12 @@ Handles GitHub sync on completion/failure and routes QA review tasks.
 import asyncio
 import json
 import os
+import sys
+import time
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
-from agents.assignment_manager import AssignmentManager
+from agents.assignment_manager import AssignmentManager, QUEUE_AGENT_TYPES
 from agents.agent_factory import AgentFactory
 from agents.github_client import create_github_client
 from utils.constants import AgentType, REDIS_HOST, REDIS_PORT
@@ -21,10 +23,13 @@ from utils.structured_logger import get_logger
 # ==========================================
 
 WORKER_POLL_INTERVAL = int(os.getenv("WORKER_POLL_INTERVAL", "10"))
+# Tasks claimed per ZPOPMIN and run concurrently by each worker loop
 WORKER_MAX_CONCURRENT = int(os.getenv("WORKER_MAX_CONCURRENT", "1"))
 WORKER_AGENTS = os.getenv(
     "WORKER_AGENTS", "backend,frontend,database,devops,qa"
 ).split(",")
+# Queue sizes reported by get_status are reused for this long (seconds)
+STATUS_QUEUE_TTL = 0.5
 
 
 class AgentWorkerDaemon:
@@ -32,8 +37,9 @@ class AgentWorkerDaemon:
     Runs one async worker loop per agent type.
 
     Each loop:
-    1. Claims the next highest-priority task from Redis
-    2. Calls agent.execute_task(task)
+    1. Claims up to WORKER_MAX_CONCURRENT highest-priority tasks from Redis
+       in one round trip
+    2. Calls agent.execute_task(task) for each, concurrently
     3. On success → complete_task() + GitHub sync
     4. On failure → fail_task() + GitHub sync
 
@@ -49,8 +55,9 @@ class AgentWorkerDaemon:
         self.assignment_manager = AssignmentManager()
         self.github = create_github_client()
 
-        # Which agent types to run workers for
-        self.agent_types = agent_types or WORKER_AGENTS
+        # Which agent types to run workers for (interned: they key every
+        # per-worker dict on the hot loop)
+        self.agent_types = [sys.intern(a) for a in agent_types or WORKER_AGENTS]
 
         # Lazily-created agent instances (one per type)
         self._agents: Dict[str, object] = {}
@@ -65,6 +72,18 @@ class AgentWorkerDaemon:
         # ISO-format start time for the current task per worker (used for stall detection)
         self._task_start_times: Dict[str, str] = {}
 
+        # Status report lines per agent; only the count / state is filled in
+        self._queue_line_tmpls: Dict[str, str] = {
+            a: f"  • **{a}**: {{}} pending tasks"
+            for a in (*QUEUE_AGENT_TYPES, *self.agent_types)
+        }
+        self._state_line_prefixes: Dict[str, str] = {
+            a: f"  • **{a}**: " for a in self.agent_types
+        }
+
+        # (monotonic fetch time, queue sizes) behind get_status
+        self._queue_sizes: Optional[Tuple[float, Dict[str, int]]] = None
+
         # Phase 6: all-tasks-done detection
         # Holds a reference to MasterAgent so we can trigger deploy + notify
         self._master = master
@@ -102,9 +121,11 @@ class AgentWorkerDaemon:
             self._worker_states[agent_type] = "polling"
 
             try:
-                task = self.assignment_manager.claim_next_task(agent_type)
+                tasks = self.assignment_manager.claim_next_tasks(
+                    agent_type, WORKER_MAX_CONCURRENT
+                )
 
-                if task is None:
+                if not tasks:
                     # Queue empty — wait before polling again
                     self._worker_states[agent_type] = "idle"
                     await asyncio.sleep(WORKER_POLL_INTERVAL)
@@ -112,57 +133,10 @@ class AgentWorkerDaemon:
 
                 self._worker_states[agent_type] = "working"
                 self._task_start_times[agent_type] = datetime.utcnow().isoformat()
-                self.logger.info(
-                    f"[{agent_type}] Claimed task: {task.get('task_type')} "
-                    f"for issue #{task.get('issue_number')} in {task.get('repo_name')}"
+                await asyncio.gather(
+                    *(self._execute_task(agent_type, task) for task in tasks)
                 )
 
-                agent = self._get_agent(agent_type)
-
-                try:
-                    result = await agent.execute_task(task)
-
-                    # Mark complete in Redis
-                    self.assignment_manager.complete_task(
-                        repo_name=task.get("repo_name", ""),
-                        issue_number=task.get("issue_number", 0),
-                        result=result,
-                    )
-
-                    # GitHub sync
-                    await self._sync_github_on_complete(task, result, agent_type)
-
-                    # If backend/frontend produced a PR, enqueue QA review
-                    if agent_type in (AgentType.BACKEND, AgentType.FRONTEND):
-                        pr_number = result.get("pr_number")
-                        if pr_number:
-                            await self._enqueue_qa_review(
-                                repo_name=task.get("repo_name", ""),
-                                pr_number=pr_number,
-                                issue_number=task.get("issue_number", 0),
-                                project_path=task.get("project_path", ""),
-                            )
-
-                except Exception as task_error:
-                    error_msg = str(task_error)
-                    self.logger.error(
-                        f"[{agent_type}] Task failed: {error_msg}",
-                        exc_info=True
-                    )
-
-                    # Mark failed in Redis
-                    self.assignment_manager.fail_task(
-                        repo_name=task.get("repo_name", ""),
-                        issue_number=task.get("issue_number", 0),
-                        error=error_msg,
-                    )
-
-                    # Get diagnosis then sync GitHub with enriched comment
-                    diagnosis = await self._get_task_failure_diagnosis(task, error_msg)
-                    await self._sync_github_on_failure(
-                        task, error_msg, agent_type, diagnosis=diagnosis
-                    )
-
                 self._worker_states[agent_type] = "idle"
                 self._task_start_times.pop(agent_type, None)
                 await self._check_and_trigger_deploy()
@@ -179,6 +153,59 @@ class AgentWorkerDaemon:
         self.logger.info(f"Worker loop stopped for agent: {agent_type}")
         self._worker_states[agent_type] = "stopped"
 
+    async def _execute_task(self, agent_type: str, task: Dict):
+        """Run one claimed task and record its outcome in Redis and GitHub."""
+        self.logger.info(
+            f"[{agent_type}] Claimed task: {task.get('task_type')} "
+            f"for issue #{task.get('issue_number')} in {task.get('repo_name')}"
+        )
+
+        agent = self._get_agent(agent_type)
+
+        try:
+            result = await agent.execute_task(task)
+
+            # Mark complete in Redis
+            self.assignment_manager.complete_task(
+                repo_name=task.get("repo_name", ""),
+                issue_number=task.get("issue_number", 0),
+                result=result,
+            )
+
+            # GitHub sync
+            await self._sync_github_on_complete(task, result, agent_type)
+
+            # If backend/frontend produced a PR, enqueue QA review
+            if agent_type in (AgentType.BACKEND, AgentType.FRONTEND):
+                pr_number = result.get("pr_number")
+                if pr_number:
+                    await self._enqueue_qa_review(
+                        repo_name=task.get("repo_name", ""),
+                        pr_number=pr_number,
+                        issue_number=task.get("issue_number", 0),
+                        project_path=task.get("project_path", ""),
+                    )
+
+        except Exception as task_error:
+            error_msg = str(task_error)
+            self.logger.error(
+                f"[{agent_type}] Task failed: {error_msg}",
+                exc_info=True
+            )
+
+            # Mark failed in Redis
+            self.assignment_manager.fail_task(
+                repo_name=task.get("repo_name", ""),
+                issue_number=task.get("issue_number", 0),
+                error=error_msg,
+            )
+
+            # Get diagnosis then sync GitHub with enriched comment
+            diagnosis = await self._get_task_failure_diagnosis(task, error_msg)
+            await self._sync_github_on_failure(
+                task, error_msg, agent_type, diagnosis=diagnosis
+            )
+
     # ==========================================
     # QA WORKER — handles review_pr tasks
     # ==========================================
@@ -193,96 +220,18 @@ class AgentWorkerDaemon:
             self._worker_states[AgentType.QA] = "polling"
 
             try:
-                task = self.assignment_manager.claim_next_task(AgentType.QA)
+                tasks = self.assignment_manager.claim_next_tasks(
+                    AgentType.QA, WORKER_MAX_CONCURRENT
+                )
 
-                if task is None:
+                if not tasks:
                     self._worker_states[AgentType.QA] = "idle"
                     await asyncio.sleep(WORKER_POLL_INTERVAL)
                     continue
 
                 self._worker_states[AgentType.QA] = "working"
                 self._task_start_times[AgentType.QA] = datetime.utcnow().isoformat()
-                self.logger.info(
-                    f"[qa] Claimed QA task: {task.get('task_type')} "
-                    f"PR #{task.get('pr_number')} in {task.get('repo_name')}"
-                )
-
-                agent = self._get_agent(AgentType.QA)
-
-                try:
-                    result = await agent.execute_task(task)
-
-                    approved = result.get("approved", False)
-                    repo_name = task.get("repo_name", "")
-                    pr_number = task.get("pr_number", 0)
-                    issue_number = task.get("issue_number", 0)
-
-                    if approved:
-                        # Merge PR and close issue
-                        try:
-                            await self.github.merge_pull_request(repo_name, pr_number)
-                            self.logger.info(
-                                f"[qa] Merged PR #{pr_number} in {repo_name}"
-                            )
-                        except Exception as merge_err:
-                            self.logger.warning(
-                                f"[qa] Could not merge PR #{pr_number}: {merge_err}"
-                            )
-
-                        try:
-                            await self.github.close_issue(repo_name, issue_number)
-                            self.logger.info(
-                                f"[qa] Closed issue #{issue_number} in {repo_name}"
-                            )
-                        except Exception as close_err:
-                            self.logger.warning(
-                                f"[qa] Could not close issue #{issue_number}: {close_err}"
-                            )
-
-                        self.assignment_manager.complete_task(
-                            repo_name=repo_name,
-                            issue_number=issue_number,
-                            result=result,
-                        )
-                    else:
-                        # QA rejected — add label and mark failed
-                        try:
-                            await self.github.add_issue_comment(
-                                repo_name,
-                                issue_number,
-                                f"🔁 QA review requested changes on PR #{pr_number}. "
-                                f"Issues: {', '.join(result.get('issues', []))}",
-                            )
-                            await self.github.update_issue(
-                                repo_name,
-                                issue_number,
-                                labels=["needs-revision"],
-                            )
-                        except Exception as gh_err:
-                            self.logger.warning(
-                                f"[qa] GitHub update after rejection failed: {gh_err}"
-                            )
-
-                        self.assignment_manager.fail_task(
-                            repo_name=repo_name,
-                            issue_number=issue_number,
-                            error="QA review: changes requested",
-                        )
-
-                except Exception as task_error:
-                    error_msg = str(task_error)
-                    self.logger.error(
-                        f"[qa] QA task failed: {error_msg}", exc_info=True
-                    )
-                    self.assignment_manager.fail_task(
-                        repo_name=task.get("repo_name", ""),
-                        issue_number=task.get("issue_number", 0),
-                        error=error_msg,
-                    )
-                    diagnosis = await self._get_task_failure_diagnosis(task, error_msg)
-                    await self._sync_github_on_failure(
-                        task, error_msg, AgentType.QA, diagnosis=diagnosis
-                    )
+                await asyncio.gather(*(self._execute_qa_task(task) for task in tasks))
 
                 self._worker_states[AgentType.QA] = "idle"
                 self._task_start_times.pop(AgentType.QA, None)
@@ -298,6 +247,90 @@ class AgentWorkerDaemon:
         self.logger.info("QA worker loop stopped")
         self._worker_states[AgentType.QA] = "stopped"
 
+    async def _execute_qa_task(self, task: Dict):
+        """Review one PR task; merge and close on approval, flag it otherwise."""
+        self.logger.info(
+            f"[qa] Claimed QA task: {task.get('task_type')} "
+            f"PR #{task.get('pr_number')} in {task.get('repo_name')}"
+        )
+
+        agent = self._get_agent(AgentType.QA)
+
+        try:
+            result = await agent.execute_task(task)
+
+            approved = result.get("approved", False)
+            repo_name = task.get("repo_name", "")
+            pr_number = task.get("pr_number", 0)
+            issue_number = task.get("issue_number", 0)
+
+            if approved:
+                # Merge PR and close issue
+                try:
+                    await self.github.merge_pull_request(repo_name, pr_number)
+                    self.logger.info(
+                        f"[qa] Merged PR #{pr_number} in {repo_name}"
+                    )
+                except Exception as merge_err:
+                    self.logger.warning(
+                        f"[qa] Could not merge PR #{pr_number}: {merge_err}"
+                    )
+
+                try:
+                    await self.github.close_issue(repo_name, issue_number)
+                    self.logger.info(
+                        f"[qa] Closed issue #{issue_number} in {repo_name}"
+                    )
+                except Exception as close_err:
+                    self.logger.warning(
+                        f"[qa] Could not close issue #{issue_number}: {close_err}"
+                    )
+
+                self.assignment_manager.complete_task(
+                    repo_name=repo_name,
+                    issue_number=issue_number,
+                    result=result,
+                )
+            else:
+                # QA rejected — add label and mark failed
+                try:
+                    await self.github.add_issue_comment(
+                        repo_name,
+                        issue_number,
+                        f"🔁 QA review requested changes on PR #{pr_number}. "
+                        f"Issues: {', '.join(result.get('issues', []))}",
+                    )
+                    await self.github.update_issue(
+                        repo_name,
+                        issue_number,
+                        labels=["needs-revision"],
+                    )
+                except Exception as gh_err:
+                    self.logger.warning(
+                        f"[qa] GitHub update after rejection failed: {gh_err}"
+                    )
+
+                self.assignment_manager.fail_task(
+                    repo_name=repo_name,
+                    issue_number=issue_number,
+                    error="QA review: changes requested",
+                )
+
+        except Exception as task_error:
+            error_msg = str(task_error)
+            self.logger.error(
+                f"[qa] QA task failed: {error_msg}", exc_info=True
+            )
+            self.assignment_manager.fail_task(
+                repo_name=task.get("repo_name", ""),
+                issue_number=task.get("issue_number", 0),
+                error=error_msg,
+            )
+            diagnosis = await self._get_task_failure_diagnosis(task, error_msg)
+            await self._sync_github_on_failure(
+                task, error_msg, AgentType.QA, diagnosis=diagnosis
+            )
+
     # ==========================================
     # START / STOP
     # ==========================================
@@ -325,6 +358,13 @@ class AgentWorkerDaemon:
             self.logger.info("Worker daemon cancelled")
         except Exception as e:
             self.logger.error(f"Worker daemon error: {e}", exc_info=True)
+        finally:
+            # Cancelling gather cancels the loops too; make sure none outlive
+            # start() and that the daemon no longer reports itself running
+            self._running = False
+            for task in self._worker_tasks:
+                if not task.done():
+                    task.cancel()
 
     async def stop(self):
         """Gracefully stop all worker loops."""
@@ -542,15 +582,34 @@ class AgentWorkerDaemon:
     # ==========================================
 
     def get_status(self) -> Dict:
-        """Return queue sizes, worker states, and per-worker task start times."""
-        queue_status = self.assignment_manager.get_queue_status()
+        """
+        Return queue sizes, worker states, and per-worker task start times.
+        Queue sizes may be up to STATUS_QUEUE_TTL old, so dashboard polls and
+        repeated `!workers status` calls share one Redis round trip.
+        """
+        now = time.monotonic()
+        if self._queue_sizes is None or now - self._queue_sizes[0] > STATUS_QUEUE_TTL:
+            queue_status = self.assignment_manager.get_queue_status()
+            self._queue_sizes = (now, {
+                agent_type: info.get("pending_tasks", 0)
+                for agent_type, info in queue_status.items()
+            })
         return {
             "running": self._running,
             "agent_types": self.agent_types,
             "worker_states": dict(self._worker_states),
             "task_start_times": dict(self._task_start_times),
-            "queues": {
-                agent_type: info.get("pending_tasks", 0)
-                for agent_type, info in queue_status.items()
-            },
+            "queues": dict(self._queue_sizes[1]),
         }
+
+    def status_lines(self, status: Dict) -> Tuple[str, str]:
+        """Render get_status() queue sizes and worker states as report lines."""
+        queue_lines = "\n".join(
+            self._queue_line_tmpls.get(agent, f"  • **{agent}**: {{}} pending tasks").format(count)
+            for agent, count in status.get("queues", {}).items()
+        )
+        state_lines = "\n".join(
+            self._state_line_prefixes.get(agent, f"  • **{agent}**: ") + state
+            for agent, state in status.get("worker_states", {}).items()
+        )
+        return queue_lines, state_lines
@@ -45,6 +45,12 @@ def set_master(master: MasterAgent) -> None:
     _master = master
 
 
+@app.on_event("shutdown")
+async def shutdown_master() -> None:
+    """Persist MasterAgent caches (embedding LRU) when the server stops."""
+    await get_master().shutdown()
+
+
 # ==========================================
 # ROUTES
 # ==========================================
@@ -131,8 +137,7 @@ async def project_detail(request: Request, name: str):
     if name not in projects:
         raise HTTPException(status_code=404, detail=f"Project '{name}' not found")
 
-    project = projects[name]
-    project["name"] = name  # ensure name is available in template
+    project = {**projects[name], "name": name}  # ensure name is available in template
 
     return templates.TemplateResponse(
         "project.html",
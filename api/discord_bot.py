@@ -14,6 +14,7 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 
 from agents.master_agent import MasterAgent
+from utils.event_loop import install_uvloop
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -23,7 +24,16 @@ intents = discord.Intents.default()
 intents.message_content = True
 intents.guilds = True
 
-bot = commands.Bot(command_prefix='!', intents=intents, help_command=None)
+
+class PipelineBot(commands.Bot):
+    """Bot that lets the Master Agent persist its caches on shutdown"""
+
+    async def close(self):
+        await master.shutdown()
+        await super().close()
+
+
+bot = PipelineBot(command_prefix='!', intents=intents, help_command=None)
 
 # Initialize Master Agent
 master = MasterAgent()
@@ -291,6 +301,7 @@ def run_bot():
         print("❌ Error: DISCORD_BOT_TOKEN not found in environment variables")
         return
 
+    install_uvloop()
     try:
         bot.run(token)
     except KeyboardInterrupt:
@@ -29,4 +29,5 @@ if __name__ == "__main__":
         port=8080,
         reload=False,
         log_level="info",
+        loop="uvloop",
     )
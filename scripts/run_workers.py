@@ -12,6 +12,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from agents.worker_daemon import AgentWorkerDaemon
+from utils.event_loop import install_uvloop
 
 
 async def main():
@@ -36,4 +37,5 @@ async def main():
 
 
 if __name__ == "__main__":
+    install_uvloop()
     asyncio.run(main())
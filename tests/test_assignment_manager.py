@@ -16,6 +16,21 @@ from utils.constants import AgentType, TaskStatus
 # FIXTURES
 # ==========================================
 
+class _Pipeline:
+    """Queues commands and replays them on the mock client at execute()."""
+
+    def __init__(self, client):
+        self._client = client
+        self._calls = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self._calls.append((name, args, kwargs))
+
+    def execute(self):
+        calls, self._calls = self._calls, []
+        return [getattr(self._client, name)(*args, **kwargs) for name, args, kwargs in calls]
+
+
 @pytest.fixture
 def mock_redis():
     """Mock Redis client."""
@@ -28,6 +43,7 @@ def mock_redis():
     redis_mock.zcard = MagicMock(return_value=0)
     redis_mock.hgetall = MagicMock(return_value={})
     redis_mock.delete = MagicMock(return_value=1)
+    redis_mock.pipeline = MagicMock(side_effect=lambda **kwargs: _Pipeline(redis_mock))
     return redis_mock
 
 
@@ -283,6 +299,19 @@ class TestTaskQueue:
         assert result is not None
         assert result["issue_number"] == 10
 
+    def test_claim_next_tasks_pops_batch_in_one_call(self, manager, mock_redis):
+        queued = [
+            {"task_type": "implement_feature", "repo_name": "myrepo", "issue_number": n}
+            for n in (1, 2)
+        ]
+        mock_redis.zpopmin.return_value = [(json.dumps(t), float(i)) for i, t in enumerate(queued)]
+        claimed = manager.claim_next_tasks(AgentType.BACKEND, 5)
+
+        assert [t["issue_number"] for t in claimed] == [1, 2]
+        mock_redis.zpopmin.assert_called_once_with("queue:agent:backend", 5)
+        mock_redis.pipeline.assert_called_once()
+        assert mock_redis.hset.call_count == 2
+
     def test_claim_next_task_updates_status(self, manager, mock_redis):
         task = {
             "task_type": "implement_feature",
@@ -29,7 +29,7 @@ def mock_redis():
 def backend(mock_redis, tmp_path):
     """BackendAgent with all external deps mocked, pointing at tmp_path workspace."""
     mock_gh = AsyncMock()
-    with patch("agents.messaging.redis.Redis", return_value=mock_redis), \
+    with patch("agents.messaging.Redis", return_value=mock_redis), \
          patch("agents.backend_agent.create_github_client", return_value=mock_gh):
         agent = BackendAgent(agent_id="backend_test")
         agent.workspace_dir = tmp_path
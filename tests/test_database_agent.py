@@ -25,7 +25,7 @@ def mock_redis():
 
 @pytest.fixture
 def db_agent(mock_redis):
-    with patch("agents.messaging.redis.Redis", return_value=mock_redis):
+    with patch("agents.messaging.Redis", return_value=mock_redis):
         agent = DatabaseAgent(agent_id="db_test")
         return agent
 
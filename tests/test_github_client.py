@@ -0,0 +1,67 @@
+"""
+Tests for agents/github_client.py
+HTTP is mocked — no GitHub API access required.
+"""
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+from agents.github_client import GitHubClient
+
+
+# ==========================================
+# FIXTURES
+# ==========================================
+
+def _response(status=200, runs=None, etag=None):
+    response = MagicMock(status_code=status, headers={"ETag": etag} if etag else {})
+    response.json.return_value = {"workflow_runs": runs or []}
+    return response
+
+
+@pytest.fixture
+def client():
+    return GitHubClient(token="t", username="user")
+
+
+# ==========================================
+# WORKFLOW RUNS
+# ==========================================
+
+class TestWorkflowRunsCaching:
+
+    @pytest.mark.asyncio
+    async def test_not_modified_reuses_cached_runs(self, client):
+        runs = [{"id": 1, "status": "completed"}]
+        with patch("agents.github_client.requests.get", side_effect=[
+            _response(runs=runs, etag='W/"abc"'),
+            _response(status=304),
+        ]) as get:
+            first = await client.get_workflow_runs("repo", branch="main")
+            second = await client.get_workflow_runs("repo", branch="main")
+
+        assert first == second == runs
+        assert "If-None-Match" not in get.call_args_list[0].kwargs["headers"]
+        assert get.call_args_list[1].kwargs["headers"]["If-None-Match"] == 'W/"abc"'
+
+    @pytest.mark.asyncio
+    async def test_changed_runs_replace_cache(self, client):
+        with patch("agents.github_client.requests.get", side_effect=[
+            _response(runs=[{"id": 1}], etag='"a"'),
+            _response(runs=[{"id": 2}], etag='"b"'),
+            _response(status=304),
+        ]) as get:
+            await client.get_workflow_runs("repo", branch="main")
+            assert await client.get_workflow_runs("repo", branch="main") == [{"id": 2}]
+            assert await client.get_workflow_runs("repo", branch="main") == [{"id": 2}]
+        assert get.call_args_list[2].kwargs["headers"]["If-None-Match"] == '"b"'
+
+    @pytest.mark.asyncio
+    async def test_branches_cached_separately(self, client):
+        with patch("agents.github_client.requests.get", side_effect=[
+            _response(runs=[{"id": 1}], etag='"a"'),
+            _response(runs=[{"id": 2}]),
+        ]) as get:
+            await client.get_workflow_runs("repo", branch="main")
+            assert await client.get_workflow_runs("repo", branch="dev") == [{"id": 2}]
+        assert "If-None-Match" not in get.call_args_list[1].kwargs["headers"]
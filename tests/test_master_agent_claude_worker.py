@@ -0,0 +1,335 @@
+"""
+Tests for MasterAgent's persistent Claude worker pool (id-framed JSON-lines protocol).
+A tiny Python script stands in for the worker — no Claude CLI required.
+"""
+
+import sys
+import shlex
+import asyncio
+import pytest
+from pathlib import Path
+from unittest.mock import MagicMock, AsyncMock, patch
+
+# Echo worker: replies to each request with the upper-cased prompt.
+# Requests are answered in reverse order of arrival (in pairs) to prove
+# replies are routed by id, not by position.
+ECHO_WORKER = r'''
+import json, sys
+held = None
+for line in sys.stdin:
+    req = json.loads(line)
+    reply = {"id": req["id"], "stdout": req["prompt"].upper(), "stderr": "", "return_code": 0}
+    if held is None and req["prompt"].startswith("hold"):
+        held = reply
+        continue
+    print(json.dumps(reply), flush=True)
+    if held is not None:
+        print(json.dumps(held), flush=True)
+        held = None
+'''
+
+
+def _worker_cmd(script: str) -> str:
+    return f"{shlex.quote(sys.executable)} -c {shlex.quote(script)}"
+
+
+def _make_master(tmp_path):
+    with patch("agents.master_agent.chromadb.PersistentClient") as mock_chroma, \
+         patch("agents.master_agent.Redis"), \
+         patch("agents.master_agent.embedding_functions.DefaultEmbeddingFunction"), \
+         patch("agents.master_agent.EMBED_CACHE_PATH", Path("/nonexistent/embed_cache.pkl")), \
+         patch("agents.master_agent.ProductManagerAgent"), \
+         patch("agents.master_agent.ProjectManagerAgent"), \
+         patch("agents.master_agent.MasterAgent._restore_all_projects"):
+        mock_chroma.return_value.get_or_create_collection.return_value = MagicMock()
+        from agents.master_agent import MasterAgent
+        master = MasterAgent(workspace_dir=str(tmp_path))
+    master.log_interaction = AsyncMock()
+    return master
+
+
+@pytest.fixture
+def master(tmp_path):
+    return _make_master(tmp_path)
+
+
+async def _shutdown_worker(master):
+    if master._claude_pool:
+        await master._claude_pool.close()
+
+
+def _pids(master):
+    return [w.proc.pid for w in master._claude_pool.workers]
+
+
+class TestPersistentClaudeWorker:
+
+    @pytest.mark.asyncio
+    async def test_no_worker_when_unconfigured(self, master):
+        with patch("agents.master_agent.CLAUDE_WORKER_CMD", ""):
+            assert await master._call_claude_worker("hi", "/tmp", None) is None
+        assert master._claude_pool is None
+
+    @pytest.mark.asyncio
+    async def test_reply_routed_by_id(self, master):
+        with patch("agents.master_agent.CLAUDE_WORKER_CMD", _worker_cmd(ECHO_WORKER)), \
+             patch("agents.master_agent.CLAUDE_WORKER_POOL_SIZE", 1):
+            try:
+                first, second = await asyncio.gather(
+                    master.call_claude_code("hold this"),
+                    master.call_claude_code("then this"),
+                )
+            finally:
+                await _shutdown_worker(master)
+
+        assert first["stdout"] == "HOLD THIS"
+        assert second["stdout"] == "THEN THIS"
+        assert first["success"] and second["success"]
+
+    @pytest.mark.asyncio
+    async def test_single_process_reused(self, master):
+        with patch("agents.master_agent.CLAUDE_WORKER_CMD", _worker_cmd(ECHO_WORKER)):
+            try:
+                await master.call_claude_code("one")
+                pids = _pids(master)
+                await master.call_claude_code("two")
+                assert _pids(master) == pids and len(pids) == 1
+            finally:
+                await _shutdown_worker(master)
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_spawn_when_worker_dies(self, master, monkeypatch):
+        # Hide any real `claude` binary so the fallback spawn fails fast
+        monkeypatch.setenv("PATH", "/nonexistent")
+        dead_worker = _worker_cmd("import sys; sys.stdin.readline()")
+        with patch("agents.master_agent.CLAUDE_WORKER_CMD", dead_worker):
+            result = await asyncio.wait_for(master.call_claude_code("hello"), timeout=10)
+
+        assert result["success"] is False
+        assert "claude" in result["stderr"]
+        assert master._claude_pool.in_flight() == 0
+
+    @pytest.mark.asyncio
+    async def test_concurrent_large_prompts_stay_framed(self, master):
+        # Prompts larger than the pipe buffer force drain() to block mid-write
+        prompts = [f"p{i}-" + "x" * 200_000 for i in range(5)]
+        with patch("agents.master_agent.CLAUDE_WORKER_CMD", _worker_cmd(ECHO_WORKER)):
+            try:
+                results = await asyncio.wait_for(
+                    asyncio.gather(*(master.call_claude_code(p) for p in prompts)),
+                    timeout=30,
+                )
+            finally:
+                await _shutdown_worker(master)
+
+        assert [r["stdout"] for r in results] == [p.upper() for p in prompts]
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_spread_across_pool(self, master):
+        with patch("agents.master_agent.CLAUDE_WORKER_CMD", _worker_cmd(ECHO_WORKER)), \
+             patch("agents.master_agent.CLAUDE_WORKER_POOL_SIZE", 2):
+            try:
+                results = await asyncio.wait_for(
+                    asyncio.gather(*(master.call_claude_code(f"job {i}") for i in range(4))),
+                    timeout=30,
+                )
+                assert len(set(_pids(master))) == 2
+            finally:
+                await _shutdown_worker(master)
+
+        assert [r["stdout"] for r in results] == [f"JOB {i}" for i in range(4)]
+
+    @pytest.mark.asyncio
+    async def test_prewarm_starts_full_pool(self, master):
+        with patch("agents.master_agent.CLAUDE_WORKER_CMD", _worker_cmd(ECHO_WORKER)), \
+             patch("agents.master_agent.CLAUDE_WORKER_POOL_SIZE", 3):
+            try:
+                await master._prewarm()
+                assert len(_pids(master)) == 3
+            finally:
+                await _shutdown_worker(master)
+
+
+class TestWorkerTimeout:
+
+    # Replies to everything except prompts starting with "stall"
+    STALL_WORKER = r'''
+import json, sys
+for line in sys.stdin:
+    req = json.loads(line)
+    if not req["prompt"].startswith("stall"):
+        print(json.dumps({"id": req["id"], "stdout": req["prompt"], "stderr": "", "return_code": 0}), flush=True)
+'''
+
+    @pytest.mark.asyncio
+    async def test_timed_out_worker_is_replaced(self, tmp_path):
+        from agents.claude_worker_pool import ClaudeWorkerPool
+        pool = ClaudeWorkerPool(_worker_cmd(self.STALL_WORKER), cwd=str(tmp_path), size=1)
+        try:
+            with pytest.raises(asyncio.TimeoutError):
+                await pool.submit("stall", str(tmp_path), None, timeout=0.2)
+            [stalled] = pool.workers
+            assert not stalled.alive()
+
+            reply = await pool.submit("next", str(tmp_path), None, timeout=10)
+            assert reply["stdout"] == "next"
+            assert [w for w in pool.workers if w.alive()] != [stalled]
+            await asyncio.wait_for(stalled.reader, timeout=5)
+            assert stalled.proc.returncode is not None
+        finally:
+            await pool.close()
+
+
+# ==========================================
+# SPAWN FALLBACK TIMEOUTS
+# ==========================================
+
+# Stand-in `claude` that forks a long-lived child, as the real CLI does
+FAKE_CLAUDE = """#!/bin/sh
+sleep 60 &
+echo $! > "$CHILD_PID_FILE"
+sleep 60
+"""
+
+
+def _alive(pid: int) -> bool:
+    try:
+        state = Path(f"/proc/{pid}/stat").read_text().split()[2]
+    except (FileNotFoundError, IndexError):
+        return False
+    return state != "Z"
+
+
+def _install_fake_claude(tmp_path, monkeypatch, script: str):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir(exist_ok=True)
+    fake = bin_dir / "claude"
+    fake.write_text(script)
+    fake.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}:/usr/bin:/bin")
+
+
+class TestSpawnTimeout:
+
+    @pytest.mark.asyncio
+    async def test_timeout_kills_whole_process_group(self, master, tmp_path, monkeypatch):
+        _install_fake_claude(tmp_path, monkeypatch, FAKE_CLAUDE)
+        pid_file = tmp_path / "child.pid"
+        monkeypatch.setenv("CHILD_PID_FILE", str(pid_file))
+
+        with patch("agents.master_agent.CLAUDE_CALL_TIMEOUT", 0.5):
+            result = await master.call_claude_code("hi")
+
+        assert result["success"] is False
+        assert "timed out" in result["stderr"]
+        child = int(pid_file.read_text())
+        for _ in range(50):
+            if not _alive(child):
+                break
+            await asyncio.sleep(0.05)
+        assert not _alive(child)
+        assert master._claude_procs == set()
+
+
+class TestSpawnStreaming:
+
+    @pytest.mark.asyncio
+    async def test_multibyte_output_decoded_across_chunks(self, master, tmp_path, monkeypatch):
+        _install_fake_claude(tmp_path, monkeypatch, "#!/bin/sh\nprintf 'h\\303\\251llo \\342\\234\\223'\necho oops >&2\n")
+        with patch("agents.master_agent.CLAUDE_READ_CHUNK", 1):
+            result = await master.call_claude_code("hi")
+        assert result["success"] is True
+        assert result["stdout"] == "héllo ✓"
+        assert result["stderr"] == "oops\n"
+
+    @pytest.mark.asyncio
+    async def test_timeout_returns_partial_output(self, master, tmp_path, monkeypatch):
+        _install_fake_claude(tmp_path, monkeypatch, "#!/bin/sh\necho partial\nsleep 60\n")
+        with patch("agents.master_agent.CLAUDE_CALL_TIMEOUT", 0.5):
+            result = await master.call_claude_code("hi")
+        assert result["success"] is False
+        assert result["stdout"] == "partial\n"
+
+    @pytest.mark.asyncio
+    async def test_oversized_output_stops_run(self, master, tmp_path, monkeypatch):
+        _install_fake_claude(tmp_path, monkeypatch, "#!/bin/sh\nyes\n")
+        with patch("agents.master_agent.CLAUDE_MAX_OUTPUT", 1024), \
+             patch("agents.master_agent.CLAUDE_READ_CHUNK", 256):
+            result = await asyncio.wait_for(master.call_claude_code("hi"), timeout=10)
+        assert result["success"] is False
+        assert "exceeded" in result["stderr"]
+        assert 0 < len(result["stdout"]) <= 1024
+        assert master._claude_procs == set()
+
+    @pytest.mark.asyncio
+    async def test_raw_returns_undecoded_stdout(self, master, tmp_path, monkeypatch):
+        _install_fake_claude(tmp_path, monkeypatch, "#!/bin/sh\nprintf 'h\\303\\251llo'\n")
+        with patch("agents.master_agent.CLAUDE_READ_CHUNK", 1):
+            result = await master.call_claude_code("hi", raw=True)
+        assert result["stdout"] == "héllo".encode("utf-8")
+
+    @pytest.mark.asyncio
+    async def test_intent_parsed_from_raw_fenced_stdout(self, master):
+        master.call_claude_code = AsyncMock(return_value={
+            "stdout": b'Sure:\n```json\n{"intent": "status_check", "confidence": 0.9}\n```\n',
+        })
+        result = await master._classify_intent_with_claude("how is it going")
+        assert result["intent"] == "status_check"
+        assert master.call_claude_code.call_args.kwargs["raw"] is True
+
+    @pytest.mark.asyncio
+    async def test_raw_stdout_logged_as_text(self, master):
+        from agents.master_agent import MasterAgent
+        await MasterAgent.log_interaction(master, "p", "é".encode("utf-8") * 3000, "")
+        record = master._log_buffer[-1].decode("utf-8")
+        assert "Stdout: " + "é" * 2000 + "\n" in record
+
+
+
+class TestSpawnConcurrency:
+
+    @pytest.mark.asyncio
+    async def test_spawns_limited_to_available_slots(self, master, tmp_path, monkeypatch):
+        # Each run holds a lock dir; a second run inside the window records an overlap
+        _install_fake_claude(tmp_path, monkeypatch, (
+            "#!/bin/sh\n"
+            "mkdir \"$LOCK_DIR\" 2>/dev/null || echo overlap >> \"$OVERLAP_LOG\"\n"
+            "sleep 0.2\n"
+            "rmdir \"$LOCK_DIR\" 2>/dev/null\n"
+        ))
+        monkeypatch.setenv("LOCK_DIR", str(tmp_path / "lock"))
+        monkeypatch.setenv("OVERLAP_LOG", str(tmp_path / "overlap.log"))
+        master._claude_slots = asyncio.Semaphore(1)
+
+        results = await asyncio.gather(*(master.call_claude_code(f"run {i}") for i in range(3)))
+
+        assert all(r["success"] for r in results)
+        assert not (tmp_path / "overlap.log").exists()
+        assert master.get_full_status()["claude_runs"]["running"] == 0
+
+
+class TestFailureCache:
+
+    @pytest.mark.asyncio
+    async def test_recent_failure_replayed_without_respawn(self, master, tmp_path, monkeypatch):
+        runs = tmp_path / "runs.log"
+        _install_fake_claude(tmp_path, monkeypatch, f"#!/bin/sh\necho run >> {runs}\nexit 3\n")
+
+        first = await master.call_claude_code("fail")
+        second = await master.call_claude_code("fail")
+
+        assert first["success"] is False and second == first
+        assert runs.read_text().count("run") == 1
+
+    @pytest.mark.asyncio
+    async def test_failure_expires_and_success_not_cached(self, master, tmp_path, monkeypatch):
+        runs = tmp_path / "runs.log"
+        _install_fake_claude(tmp_path, monkeypatch, f"#!/bin/sh\necho run >> {runs}\n")
+        master._claude_failures[master._claude_request_key("ok", str(tmp_path), None, False)] = (
+            -100.0, {"success": False},
+        )
+
+        assert (await master.call_claude_code("ok"))["success"] is True
+        assert (await master.call_claude_code("ok"))["success"] is True
+        assert runs.read_text().count("run") == 2
+        assert master._claude_failures == {}
@@ -4,16 +4,26 @@ All external deps (Redis, GitHub, ChromaDB, Claude Code) are mocked.
 """
 
 import json
+import msgspec
+import subprocess
+import sys
 import pytest
 import asyncio
+import time
 from pathlib import Path
 from unittest.mock import MagicMock, AsyncMock, patch, PropertyMock
 
 
+def _fake_embed(texts):
+    return [[float(len(text)), 1.0] for text in texts]
+
+
 def _make_master(tmp_path):
     """Construct a MasterAgent with all heavy deps mocked."""
     with patch("agents.master_agent.chromadb.PersistentClient") as mock_chroma, \
-         patch("agents.master_agent.redis.Redis") as mock_redis, \
+         patch("agents.master_agent.Redis") as mock_redis, \
+         patch("agents.master_agent.embedding_functions.DefaultEmbeddingFunction"), \
+         patch("agents.master_agent.EMBED_CACHE_PATH", Path("/nonexistent/embed_cache.pkl")), \
          patch("agents.master_agent.ProductManagerAgent"), \
          patch("agents.master_agent.ProjectManagerAgent"), \
          patch("agents.master_agent.MasterAgent._restore_all_projects"):
@@ -21,6 +31,12 @@ def _make_master(tmp_path):
         from agents.master_agent import MasterAgent
         master = MasterAgent(workspace_dir=str(tmp_path))
         master._notify_channel = None
+        master._embedding_fn = _fake_embed
+        master.redis = AsyncMock()
+        master.redis.hgetall = AsyncMock(return_value={})
+        master.redis_pool = AsyncMock()
+        master._intent_collection = MagicMock()
+        master._intent_collection.query.return_value = {"distances": [[]], "metadatas": [[]]}
         return master
 
 
@@ -118,7 +134,9 @@ class TestRestoreAllProjects:
             mf.write_text(json.dumps({"name": name, "path": str(d)}))
 
         with patch("agents.master_agent.chromadb.PersistentClient") as mc, \
-             patch("agents.master_agent.redis.Redis"), \
+             patch("agents.master_agent.Redis"), \
+             patch("agents.master_agent.embedding_functions.DefaultEmbeddingFunction"), \
+             patch("agents.master_agent.EMBED_CACHE_PATH", Path("/nonexistent/embed_cache.pkl")), \
              patch("agents.master_agent.ProductManagerAgent"), \
              patch("agents.master_agent.ProjectManagerAgent"):
             mc.return_value.get_or_create_collection.return_value = MagicMock()
@@ -139,7 +157,9 @@ class TestRestoreAllProjects:
             time.sleep(0.02)  # ensure different mtime
 
         with patch("agents.master_agent.chromadb.PersistentClient") as mc, \
-             patch("agents.master_agent.redis.Redis"), \
+             patch("agents.master_agent.Redis"), \
+             patch("agents.master_agent.embedding_functions.DefaultEmbeddingFunction"), \
+             patch("agents.master_agent.EMBED_CACHE_PATH", Path("/nonexistent/embed_cache.pkl")), \
              patch("agents.master_agent.ProductManagerAgent"), \
              patch("agents.master_agent.ProjectManagerAgent"):
             mc.return_value.get_or_create_collection.return_value = MagicMock()
@@ -149,6 +169,47 @@ class TestRestoreAllProjects:
         # The most recently modified is the active one
         assert master._active_project_name == "proj_new"
 
+    @pytest.mark.asyncio
+    async def test_restore_is_deferred_inside_running_loop(self, tmp_workspace):
+        for name in ["proj_old", "proj_new"]:
+            d = tmp_workspace / name
+            d.mkdir()
+            (d / ".project_metadata.json").write_text(json.dumps({"name": name, "path": str(d)}))
+            time.sleep(0.02)
+        (tmp_workspace / "broken").mkdir()
+        (tmp_workspace / "broken" / ".project_metadata.json").write_text("{not json")
+
+        with patch("agents.master_agent.chromadb.PersistentClient") as mc, \
+             patch("agents.master_agent.Redis"), \
+             patch("agents.master_agent.embedding_functions.DefaultEmbeddingFunction"), \
+             patch("agents.master_agent.EMBED_CACHE_PATH", Path("/nonexistent/embed_cache.pkl")), \
+             patch("agents.master_agent.ProductManagerAgent"), \
+             patch("agents.master_agent.ProjectManagerAgent"), \
+             patch("agents.master_agent.MasterAgent._start_prewarm"):
+            mc.return_value.get_or_create_collection.return_value = MagicMock()
+            from agents.master_agent import MasterAgent
+            master = MasterAgent(workspace_dir=str(tmp_workspace))
+
+        assert master._projects == {}
+        await master._ensure_restored()
+        assert set(master._projects) == {"proj_old", "proj_new"}
+        assert master._active_project_name == "proj_new"
+
+    def test_metadata_entries_newest_first(self, master, tmp_workspace):
+        import os
+        for name, mtime in [("old", 100), ("new", 300), ("mid", 200)]:
+            d = tmp_workspace / name
+            d.mkdir()
+            mf = d / ".project_metadata.json"
+            mf.write_text("{}")
+            os.utime(mf, (mtime, mtime))
+        (tmp_workspace / "no_metadata").mkdir()
+        (tmp_workspace / "stray_file").write_text("x")
+
+        entries = master._project_metadata_entries()
+        assert [Path(path).parent.name for _, path in entries] == ["new", "mid", "old"]
+        assert [mtime for mtime, _ in entries] == [300, 200, 100]
+
 
 # ==========================================
 # handle_projects_list
@@ -179,6 +240,18 @@ class TestHandleProjectsList:
         result = await master.handle_projects_list()
         assert "active" in result
 
+    @pytest.mark.asyncio
+    async def test_newest_project_listed_first(self, master):
+        for name, created in [("mid", "2024-02"), ("old", "2024-01"), ("new", "2024-03")]:
+            master._projects[name] = {"name": name, "created_at": created}
+        master._projects["old"] = {"name": "old", "created_at": "2024-04"}  # re-saved
+        master._projects.pop("mid")
+
+        result = await master.handle_projects_list()
+        assert result.index("`old`") < result.index("`new`")
+        assert "`mid`" not in result
+        assert [n for n, _ in master._projects.newest_first()] == ["old", "new"]
+
     @pytest.mark.asyncio
     async def test_deploy_url_shown(self, master, project_b):
         master._projects["project_b"] = project_b
@@ -216,20 +289,22 @@ class TestHandleSwitchProject:
         assert master._active_project_name == "project_a"  # unchanged
 
     @pytest.mark.asyncio
-    async def test_switch_stops_old_monitor(self, master, project_a, project_b):
+    async def test_switch_keeps_old_project_monitored(self, master, project_a, project_b):
         master._projects["project_a"] = project_a
         master._projects["project_b"] = project_b
         master._active_project_name = "project_a"
+        master.redis.hget = AsyncMock(return_value=None)
 
-        old_monitor = MagicMock()
-        old_monitor.is_running = MagicMock(return_value=True)
-        old_monitor.stop = AsyncMock()
-        master._monitors["project_a"] = old_monitor
+        monitor = MagicMock()
+        monitor.projects = {"project_a"}
+        monitor.watch = AsyncMock(side_effect=lambda name, resume_from=None: monitor.projects.add(name))
+        monitor.stop = AsyncMock()
+        master._monitor = monitor
 
-        with patch("agents.master_agent.create_github_client", side_effect=ValueError("no token")):
-            await master.handle_switch_project("project_b")
+        await master.handle_switch_project("project_b")
 
-        old_monitor.stop.assert_called_once()
+        monitor.stop.assert_not_called()
+        assert monitor.projects == {"project_a", "project_b"}
 
 
 # ==========================================
@@ -294,6 +369,109 @@ class TestHandleDeployProject:
         assert "Deployed" in result
 
 
+# ==========================================
+# handle_run_full_pipeline
+# ==========================================
+
+class TestRunFullPipelineProject:
+
+    @pytest.mark.asyncio
+    async def test_switching_mid_run_keeps_original_project(self, master, project_a, project_b, monkeypatch):
+        monkeypatch.delenv("GITHUB_TOKEN", raising=False)
+        master.current_project = project_b
+        master.current_project = project_a
+
+        async def run(**kwargs):
+            master._active_project_name = "project_b"
+            return {"steps": []}
+
+        master.run_full_pipeline = run
+        master.save_project_metadata = AsyncMock()
+        deployed = {"success": True, "url": "https://project_a.devbot.site", "error": ""}
+        with patch("agents.deployer.deploy_project", AsyncMock(return_value=deployed)):
+            result = await master.handle_run_full_pipeline("go", "user")
+
+        assert "project_a" in result
+        assert project_a["deploy_url"] == "https://project_a.devbot.site"
+        assert project_b["deploy_url"] != project_a["deploy_url"]
+        assert all(c.args == (project_a,) for c in master.save_project_metadata.call_args_list)
+
+
+class TestHandlerPrompts:
+
+    @pytest.mark.asyncio
+    async def test_code_task_prompt_filled_from_project(self, master, project_a):
+        master.current_project = {**project_a, "requirements": "todo app"}
+        master.call_claude_code = AsyncMock(return_value={"success": True, "stdout": "done"})
+
+        await master.handle_code_task("charge $5 per ${plan}", "user")
+
+        kwargs = master.call_claude_code.call_args.kwargs
+        assert '"charge $5 per ${plan}"' in kwargs["prompt"]
+        assert "- Project: project_a\n- Original Requirements: todo app\n" in kwargs["prompt"]
+        assert kwargs["project_path"] == "/tmp/project_a"
+
+
+class TestStatusCheck:
+
+    @pytest.fixture
+    def repo(self, tmp_path, project_a):
+        path = tmp_path / "project_a"
+        (path / "src").mkdir(parents=True)
+        subprocess.run(["git", "init", "-q", "-b", "main", str(path)], check=True)
+        (path / "README.md").write_text("hi")
+        project_a["path"] = str(path)
+        return path
+
+    @pytest.mark.asyncio
+    async def test_overview_read_locally_without_claude(self, master, project_a, repo):
+        master.current_project = project_a
+        master.call_claude_code = AsyncMock()
+
+        result = await master.handle_status_check("status", "user")
+
+        master.call_claude_code.assert_not_called()
+        assert "🌿 Branch: `main`" in result
+        assert "📝 Uncommitted: 0 changed, 1 untracked" in result
+        assert "📂 Files: src/, README.md" in result
+
+    @pytest.mark.asyncio
+    async def test_overview_reused_within_ttl(self, master, project_a, repo):
+        master.current_project = project_a
+        first = await master.handle_status_check("status", "user")
+        (repo / "new.txt").write_text("x")
+        assert await master.handle_status_check("status", "user") == first
+
+        with patch("agents.master_agent.STATUS_CACHE_TTL", 0):
+            assert "2 untracked" in await master.handle_status_check("status", "user")
+
+    @pytest.mark.asyncio
+    async def test_summary_request_still_asks_claude(self, master, project_a, repo):
+        master.current_project = project_a
+        master.call_claude_code = AsyncMock(return_value={"stdout": "looks healthy"})
+
+        result = await master.handle_status_check("summarize the project status", "user")
+
+        master.call_claude_code.assert_awaited_once()
+        assert "looks healthy" in result
+
+    @pytest.mark.asyncio
+    async def test_missing_directory_reported(self, master, project_a):
+        master.current_project = {**project_a, "path": "/nonexistent/project_a"}
+        assert "Project directory not found" in await master.handle_status_check("status", "user")
+
+    def test_porcelain_ahead_behind_and_conflicts(self):
+        from agents.master_agent import _format_git_status
+        lines = _format_git_status(
+            "# branch.oid abc\n# branch.head dev\n# branch.upstream origin/dev\n# branch.ab +2 -1\n"
+            "1 .M N... 100644 100644 100644 a b f.py\nu UU N... 1 2 3 4 a b c g.py\n"
+        )
+        assert lines == [
+            "🌿 Branch: `dev` (ahead 2, behind 1)",
+            "📝 Uncommitted: 1 changed, 0 untracked, 1 conflicted",
+        ]
+
+
 # ==========================================
 # get_full_status (for dashboard)
 # ==========================================
@@ -328,3 +506,1193 @@ class TestGetFullStatus:
         status = master.get_full_status()
         assert status["workers"]["running"] is True
         assert status["workers"]["queues"]["backend"] == 2
+
+    def test_project_rows_reused_until_state_changes(self, master, project_a, project_b):
+        master.current_project = project_a
+        master._projects["project_b"] = project_b
+        first = master.get_full_status()["projects"]
+        assert master.get_full_status()["projects"] is first
+
+        master._active_project_name = "project_b"
+        switched = master.get_full_status()["projects"]
+        assert switched is not first
+        assert switched["project_b"]["active"] is True
+
+        master._projects.touch()
+        assert master.get_full_status()["projects"] is not switched
+
+
+# ==========================================
+# MEMORY WRITES
+# ==========================================
+
+class TestMemoryWrites:
+
+    @pytest.mark.asyncio
+    async def test_turn_is_stored_with_single_add(self, master):
+        master.analyze_intent = AsyncMock(return_value={"intent": "general_query"})
+        master.handle_general_query = AsyncMock(return_value="hello back")
+
+        await master.process_user_message("hello", "user_1")
+        await master.flush_memories()
+
+        master.memory.upsert.assert_called_once()
+        kwargs = master.memory.upsert.call_args.kwargs
+        assert kwargs["documents"] == ["hello", "hello back"]
+        assert [m["category"] for m in kwargs["metadatas"]] == ["user_message", "agent_response"]
+        assert len(set(kwargs["ids"])) == 2
+
+    @pytest.mark.asyncio
+    async def test_ids_are_content_hashes_scoped_to_category_and_project(self, master):
+        await master.store_memories([("note", "a", None), ("note", "b", None), ("other", "a", None)])
+        master._active_project_name = "project_a"
+        await master.store_memory("note", "a")
+        ids = [memory_id for memory_id, _, _ in master._mem_queue]
+        assert len(set(ids)) == 4
+        assert all(len(i) == 24 for i in ids)
+        master._active_project_name = None
+        assert master._memory_id("note", "a") == ids[0]
+
+    @pytest.mark.asyncio
+    async def test_repeat_within_one_batch_upserted_once(self, master):
+        with patch("agents.master_agent.MEMORY_SEEN_SIZE", 1):
+            await master.store_memory("note", "a")
+            await master.store_memory("note", "b")
+            await master.store_memory("note", "a")
+        await master.flush_memories()
+        kwargs = master.memory.upsert.call_args.kwargs
+        assert kwargs["documents"] == ["a", "b"]
+        assert len(set(kwargs["ids"])) == 2
+
+    @pytest.mark.asyncio
+    async def test_writes_coalesce_until_timer(self, master):
+        for i in range(3):
+            await master.store_memory("note", f"fact {i}")
+        master.memory.upsert.assert_not_called()
+
+        await asyncio.sleep(0.1)
+        master.memory.upsert.assert_called_once()
+        assert master.memory.upsert.call_args.kwargs["documents"] == ["fact 0", "fact 1", "fact 2"]
+
+    @pytest.mark.asyncio
+    async def test_full_batch_flushes_without_waiting_for_timer(self, master):
+        with patch("agents.master_agent.MEMORY_BATCH_SIZE", 2), \
+             patch("agents.master_agent.MEMORY_FLUSH_INTERVAL", 10):
+            await master.store_memory("note", "a")
+            await master.store_memory("note", "b")
+            for _ in range(100):
+                if master.memory.upsert.called:
+                    break
+                await asyncio.sleep(0.01)
+        master._mem_flusher.cancel()
+        master.memory.upsert.assert_called_once()
+        assert master._mem_queue == []
+
+    @pytest.mark.asyncio
+    async def test_store_does_not_block_on_write(self, master):
+        master.memory.upsert.side_effect = lambda **kw: time.sleep(0.2)
+        start = time.monotonic()
+        with patch("agents.master_agent.MEMORY_BATCH_SIZE", 1):
+            await master.store_memory("note", "a")
+            await asyncio.sleep(0.02)
+            await master.store_memory("note", "b")
+        assert time.monotonic() - start < 0.15
+        await master.flush_memories()
+        assert master.memory.upsert.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_store_memory_single_entry(self, master):
+        await master.store_memory("note", "remember this", {"user_id": "u"})
+        await master.flush_memories()
+        kwargs = master.memory.upsert.call_args.kwargs
+        assert kwargs["documents"] == ["remember this"]
+        assert kwargs["metadatas"][0] == {"category": "note", "user_id": "u"}
+
+    @pytest.mark.asyncio
+    async def test_repeated_content_stored_once(self, master):
+        await master.store_memory("note", "queue empty")
+        await master.store_memory("note", "queue empty")
+        await master.store_memory("other", "queue empty")
+        await master.flush_memories()
+        kwargs = master.memory.upsert.call_args.kwargs
+        assert kwargs["documents"] == ["queue empty", "queue empty"]
+        assert [m["category"] for m in kwargs["metadatas"]] == ["note", "other"]
+
+    @pytest.mark.asyncio
+    async def test_seen_content_forgotten_beyond_bound(self, master):
+        with patch("agents.master_agent.MEMORY_SEEN_SIZE", 1):
+            await master.store_memory("note", "a")
+            await master.store_memory("note", "b")
+            await master.store_memory("note", "a")
+        assert [doc for _, doc, _ in master._mem_queue] == ["a", "b", "a"]
+
+
+# ==========================================
+# EMBEDDING CACHE
+# ==========================================
+
+class TestEmbeddingCache:
+
+    def test_repeated_text_is_embedded_once(self, master):
+        master._embedding_fn = MagicMock(side_effect=_fake_embed)
+        first = master._embed_many(["same"])
+        second = master._embed_many(["same", "other"])
+        assert first[0] == second[0]
+        assert master._embedding_fn.call_count == 2
+        assert master._embedding_fn.call_args_list[1].args[0] == ["other"]
+
+    def test_seeded_from_store_vectors(self, master):
+        import numpy as np
+        master.memory.get.return_value = {
+            "documents": ["stored doc"],
+            "embeddings": np.array([[0.5, 2.0]]),
+        }
+        master._embedding_fn = MagicMock(side_effect=_fake_embed)
+        assert master._seed_embed_cache_from_store() == 1
+        assert master._embed_many(["stored doc"]) == [[0.5, 2.0]]
+        master._embedding_fn.assert_not_called()
+
+    def test_store_without_embeddings_seeds_nothing(self, master):
+        master.memory.get.return_value = {"ids": ["a"], "documents": ["doc"], "metadatas": [{}]}
+        assert master._seed_embed_cache_from_store() == 0
+        assert len(master._embed_cache) == 0
+
+    def test_lru_evicts_oldest(self, master):
+        with patch("agents.master_agent.EMBED_CACHE_SIZE", 2):
+            master._embed_many(["a", "b", "c"])
+        assert len(master._embed_cache) == 2
+
+    @pytest.mark.asyncio
+    async def test_retrieve_uses_cached_query_embedding(self, master):
+        await master.retrieve_memory("find me")
+        kwargs = master.memory.query.call_args.kwargs
+        assert kwargs["query_embeddings"] == [[7.0, 1.0]]
+
+    @pytest.mark.asyncio
+    async def test_uncached_query_embedded_off_the_loop(self, master):
+        def slow_embed(texts):
+            time.sleep(0.2)
+            return _fake_embed(texts)
+
+        master._embedding_fn = MagicMock(side_effect=slow_embed)
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            for _ in range(10):
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        async def retrieve():
+            await master.retrieve_memory("slow query")
+            return ticks
+
+        ticks_during, _ = await asyncio.gather(retrieve(), ticker())
+        # The loop kept ticking while the model ran
+        assert ticks_during >= 5
+        master._embedding_fn.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_cache_survives_restart(self, master, tmp_path):
+        cache_path = tmp_path / "embed_cache.pkl"
+        master._embed_many(["persist me"])
+        with patch("agents.master_agent.EMBED_CACHE_PATH", cache_path):
+            await master.shutdown()
+            loaded = master._load_embed_cache()
+        assert [v.tolist() for v in loaded.values()] == [[10.0, 1.0]]
+
+    def test_vectors_held_at_fp16(self, master):
+        import numpy as np
+        [vec] = master._embed_many(["abc"])
+        assert master._embed_cache[next(iter(master._embed_cache))].dtype == np.float16
+        assert vec == [3.0, 1.0]
+
+    def test_legacy_list_cache_upgraded_on_load(self, master, tmp_path):
+        import pickle
+        from collections import OrderedDict
+        cache_path = tmp_path / "embed_cache.pkl"
+        cache_path.write_bytes(pickle.dumps(OrderedDict(k=[0.5, 0.25])))
+        with patch("agents.master_agent.EMBED_CACHE_PATH", cache_path):
+            loaded = master._load_embed_cache()
+        assert str(loaded["k"].dtype) == "float16"
+
+
+# ==========================================
+# SEMANTIC QUERY CACHE
+# ==========================================
+
+class TestQueryCache:
+
+    @pytest.mark.asyncio
+    async def test_similar_query_served_from_cache(self, master):
+        master.memory.query.return_value = {"documents": [["hit"]]}
+        first = await master.retrieve_memory("abc")
+        # Same length → identical fake embedding → cosine 1.0
+        second = await master.retrieve_memory("xyz")
+        assert first == second == {"documents": [["hit"]]}
+        master.memory.query.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_dissimilar_query_misses(self, master):
+        await master.retrieve_memory("a")
+        await master.retrieve_memory("a much longer query")
+        assert master.memory.query.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_n_results_is_part_of_key(self, master):
+        await master.retrieve_memory("abc", n_results=3)
+        await master.retrieve_memory("abc", n_results=5)
+        assert master.memory.query.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_write_invalidates_cache(self, master):
+        await master.retrieve_memory("abc")
+        await master.store_memory("note", "new fact")
+        await master.flush_memories()
+        await master.retrieve_memory("abc")
+        assert master.memory.query.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_query_during_write_not_served_after_it(self, master):
+        import threading
+        release = threading.Event()
+        master.memory.upsert.side_effect = lambda **kw: release.wait(5)
+        master.memory.query.return_value = {"documents": [["old"]]}
+
+        await master.store_memory("note", "new fact")
+        flush = asyncio.create_task(master.flush_memories())
+        await asyncio.sleep(0.05)                      # write now in flight
+        assert (await master.retrieve_memory("abc"))["documents"] == [["old"]]
+        release.set()
+        await flush
+
+        master.memory.query.return_value = {"documents": [["old", "new fact"]]}
+        assert (await master.retrieve_memory("abc"))["documents"] == [["old", "new fact"]]
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_share_one_query(self, master):
+        master.memory.query.return_value = {
+            "ids": [["a1", "a2", "a3"], ["b1", "b2", "b3"]],
+            "documents": [["A1", "A2", "A3"], ["B1", "B2", "B3"]],
+            "embeddings": None,
+        }
+        first, second = await asyncio.gather(
+            master.retrieve_memory("q", n_results=3),
+            master.retrieve_memory("a longer query", n_results=1),
+        )
+
+        master.memory.query.assert_called_once()
+        assert master.memory.query.call_args.kwargs["n_results"] == 3
+        assert first["documents"] == [["A1", "A2", "A3"]]
+        assert second == {"ids": [["b1"]], "documents": [["B1"]], "embeddings": None}
+
+    @pytest.mark.asyncio
+    async def test_query_arriving_mid_batch_gets_next_batch(self, master):
+        import time
+        in_flight = asyncio.Event()
+        loop = asyncio.get_running_loop()
+
+        def slow_query(**kwargs):
+            loop.call_soon_threadsafe(in_flight.set)
+            time.sleep(0.3)
+            return {"documents": [["doc"]] * len(kwargs["query_embeddings"])}
+
+        master.memory.query.side_effect = slow_query
+        first = asyncio.create_task(master.retrieve_memory("q"))
+        await asyncio.wait_for(in_flight.wait(), timeout=1)
+        second = asyncio.create_task(master.retrieve_memory("a much longer query"))
+
+        await first
+        assert (await asyncio.wait_for(second, timeout=2))["documents"] == [["doc"]]
+        assert master.memory.query.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_batch_query_error_returns_empty(self, master):
+        master.memory.query.side_effect = RuntimeError("db down")
+        result = await master.retrieve_memory("q")
+        assert result == {"documents": [[]]}
+
+    @pytest.mark.asyncio
+    async def test_full_cache_evicts_least_recently_used(self, master):
+        master._embedding_fn = lambda texts: [[1.0, 0.0] if t == "keep" else [0.0, 1.0 + len(t)] for t in texts]
+        with patch("agents.master_agent.QUERY_CACHE_SIZE", 2):
+            await master.retrieve_memory("keep")
+            await master.retrieve_memory("x", n_results=1)
+            await master.retrieve_memory("keep")          # refresh "keep"
+            await master.retrieve_memory("x", n_results=2)  # evicts n_results=1 entry
+        assert [scope for _, scope, _ in master._qcache] == [(5, None), (2, None)]
+
+    @pytest.mark.asyncio
+    async def test_category_is_part_of_key(self, master):
+        await master.store_memory("note", "x")
+        await master.retrieve_memory("abc")
+        await master.retrieve_memory("abc", category="note")
+        assert master.memory.query.call_count == 2
+        assert master.memory.query.call_args.kwargs["where"] == {"category": "note"}
+
+
+# ==========================================
+# CATEGORY SHORT-CIRCUIT
+# ==========================================
+
+class TestCategoryShortCircuit:
+
+    @pytest.mark.asyncio
+    async def test_unknown_category_skips_vector_search(self, master):
+        master.memory.get.return_value = {"ids": []}
+        assert await master.retrieve_memory("q", category="never") == {"documents": [[]]}
+        assert await master.retrieve_memory("q", category="never") == {"documents": [[]]}
+        master.memory.get.assert_called_once()
+        master.memory.query.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_category_from_previous_run_is_found(self, master):
+        master.memory.get.return_value = {"ids": ["old_1"]}
+        await master.retrieve_memory("q", category="old")
+        master.memory.query.assert_called_once()
+        assert "old" in master._known_cats
+
+    @pytest.mark.asyncio
+    async def test_store_probe_runs_off_the_event_loop(self, master):
+        import threading
+        threads = []
+        master.memory.get.side_effect = lambda **kw: threads.append(threading.current_thread()) or {"ids": []}
+        await master.retrieve_memory("q", category="never")
+        assert threads and threading.main_thread() not in threads
+
+    @pytest.mark.asyncio
+    async def test_store_clears_absent_marker(self, master):
+        master.memory.get.return_value = {"ids": []}
+        await master.retrieve_memory("q", category="late")
+        await master.store_memory("late", "now it exists")
+        await master.flush_memories()
+        await master.retrieve_memory("q", category="late")
+        master.memory.query.assert_called_once()
+
+
+# ==========================================
+# INTERACTION LOG
+# ==========================================
+
+class TestInteractionLog:
+
+    def _log_files(self, home):
+        return list((home / "ai-dev-pipeline" / "logs").glob("claude_code_*.log"))
+
+    async def _wait_for_log(self, home, timeout=2.0):
+        for _ in range(int(timeout / 0.01)):
+            files = self._log_files(home)
+            if files and files[0].stat().st_size:
+                return files
+            await asyncio.sleep(0.01)
+        return self._log_files(home)
+
+    @pytest.mark.asyncio
+    async def test_full_batch_wakes_writer(self, master, tmp_path):
+        master._log_dir = tmp_path / "ai-dev-pipeline" / "logs"
+        master._log_dir.mkdir(parents=True)
+        with patch("agents.master_agent.LOG_FLUSH_EVERY", 3), \
+             patch("agents.master_agent.LOG_FLUSH_INTERVAL", 30):
+            await master.log_interaction("p1", "out", "")
+            await master.log_interaction("p2", "out", "")
+            await asyncio.sleep(0.05)
+            assert self._log_files(tmp_path) == []
+            await master.log_interaction("p3", "out", "")
+
+            [log_file] = await self._wait_for_log(tmp_path)
+            text = log_file.read_text()
+            assert [line for line in text.splitlines() if line.startswith("Prompt:")] == [
+                "Prompt: p1", "Prompt: p2", "Prompt: p3",
+            ]
+            master._log_flusher.cancel()
+        master._close_log()
+
+    @pytest.mark.asyncio
+    async def test_single_record_written_after_interval(self, master, tmp_path):
+        master._log_dir = tmp_path / "ai-dev-pipeline" / "logs"
+        master._log_dir.mkdir(parents=True)
+        with patch("agents.master_agent.LOG_FLUSH_INTERVAL", 0.01):
+            await master.log_interaction("lonely", "out", "")
+            [log_file] = await self._wait_for_log(tmp_path)
+            assert "Prompt: lonely" in log_file.read_text()
+            await master._log_flusher
+        assert master._log_buffer == []
+        master._close_log()
+
+    @pytest.mark.asyncio
+    async def test_truncation_keeps_characters_whole(self, master, tmp_path):
+        master._log_dir = tmp_path / "ai-dev-pipeline" / "logs"
+        master._log_dir.mkdir(parents=True)
+        # 3-byte characters plus a lone surrogate that strict UTF-8 would reject
+        await master.log_interaction("\ud800" + "é" * 600, "€" * 5000, "")
+        await master.flush_log()
+        master._close_log()
+
+        [log_file] = self._log_files(tmp_path)
+        text = log_file.read_text(encoding="utf-8")
+        assert "Stdout: " + "€" * 2000 + "\n" in text
+        assert "Prompt: ?" + "é" * 499 + "\n" in text
+
+    @pytest.mark.asyncio
+    async def test_shutdown_flushes_and_closes(self, master, tmp_path):
+        master._log_dir = tmp_path / "ai-dev-pipeline" / "logs"
+        master._log_dir.mkdir(parents=True)
+        with patch("agents.master_agent.EMBED_CACHE_PATH", tmp_path / "embed_cache.pkl"):
+            await master.log_interaction("only", "out", "err")
+            await master.shutdown()
+
+        [log_file] = self._log_files(tmp_path)
+        assert "Stderr: err" in log_file.read_text()
+        assert master._log_fd is None
+
+
+# ==========================================
+# PROJECT METADATA I/O
+# ==========================================
+
+class TestProjectMetadataIO:
+
+    @pytest.mark.asyncio
+    async def test_save_then_load_round_trip(self, master, tmp_path):
+        proj_dir = tmp_path / "roundtrip"
+        proj_dir.mkdir()
+        master._projects["roundtrip"] = {"name": "roundtrip", "path": str(proj_dir), "status": "ready"}
+        master._active_project_name = "roundtrip"
+        await master.save_project_metadata()
+
+        master._projects.clear()
+        master._active_project_name = None
+        assert await master.load_project(str(proj_dir)) is True
+        assert master.current_project["status"] == "ready"
+
+    @pytest.mark.asyncio
+    async def test_save_is_atomic_and_leaves_no_temp_file(self, master, tmp_path):
+        proj_dir = tmp_path / "atomic"
+        proj_dir.mkdir()
+        metadata_file = proj_dir / ".project_metadata.json"
+        metadata_file.write_text('{"name": "atomic", "status": "old"}')
+        master._projects["atomic"] = {"name": "atomic", "path": str(proj_dir), "status": "new"}
+        master._active_project_name = "atomic"
+
+        with patch("agents.master_agent.os.replace", side_effect=OSError("disk full")):
+            with pytest.raises(OSError):
+                await master.save_project_metadata()
+        # A failed save never touches the existing file
+        assert json.loads(metadata_file.read_text())["status"] == "old"
+
+        await master.save_project_metadata()
+        assert json.loads(metadata_file.read_text())["status"] == "new"
+        assert [p.name for p in proj_dir.iterdir()] == [".project_metadata.json"]
+
+    @pytest.mark.asyncio
+    async def test_concurrent_saves_use_separate_temp_files(self, tmp_path):
+        from agents.master_agent import _atomic_write_bytes
+        target = tmp_path / ".project_metadata.json"
+        payloads = [bytes([ord("a") + i]) * (1 << 20) for i in range(4)]
+
+        await asyncio.gather(*(asyncio.to_thread(_atomic_write_bytes, target, p) for p in payloads))
+
+        assert target.read_bytes() in payloads
+        assert [p.name for p in tmp_path.iterdir()] == [".project_metadata.json"]
+
+    @pytest.mark.asyncio
+    async def test_load_missing_metadata_returns_false(self, master, tmp_path):
+        assert await master.load_project(str(tmp_path / "nope")) is False
+
+
+# ==========================================
+# STACK DETECTION
+# ==========================================
+
+class TestDetectStack:
+
+    @pytest.mark.parametrize("files,expected", [
+        (["requirements.txt"], "python"),
+        (["pyproject.toml"], "python"),
+        (["package.json"], "node"),
+        (["setup.py", "package.json"], "fullstack"),
+        (["README.md"], "unknown"),
+    ])
+    def test_markers(self, master, tmp_path, files, expected):
+        proj = tmp_path / "proj"
+        proj.mkdir()
+        for name in files:
+            (proj / name).write_text("")
+        assert master._detect_stack(str(proj)) == expected
+
+    def test_node_modules_directory_counts(self, master, tmp_path):
+        (tmp_path / "node_modules").mkdir()
+        assert master._detect_stack(str(tmp_path)) == "node"
+
+    def test_missing_directory_is_unknown(self, master, tmp_path):
+        assert master._detect_stack(str(tmp_path / "missing")) == "unknown"
+
+    def test_new_marker_invalidates_cached_result(self, master, tmp_path):
+        import os
+        assert master._detect_stack(str(tmp_path)) == "unknown"
+        (tmp_path / "requirements.txt").write_text("")
+        # Guarantee a distinct mtime even on coarse-grained filesystems
+        st = os.stat(tmp_path)
+        os.utime(tmp_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+        assert master._detect_stack(str(tmp_path)) == "python"
+
+    def test_repeat_calls_skip_scan(self, master, tmp_path):
+        (tmp_path / "package.json").write_text("{}")
+        with patch("agents.master_agent._scan_stack", return_value="node") as scan:
+            master._detect_stack(str(tmp_path))
+            master._detect_stack(str(tmp_path))
+        scan.assert_called_once()
+
+    def test_rescan_replaces_stale_entry(self, master, tmp_path):
+        import os
+        master._detect_stack(str(tmp_path))
+        st = os.stat(tmp_path)
+        os.utime(tmp_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+        master._detect_stack(str(tmp_path))
+        assert list(master._stack_cache) == [str(tmp_path)]
+
+
+# ==========================================
+# BATCHED PIPELINE EVENTS
+# ==========================================
+
+def _mock_pipeline(master):
+    pipe = MagicMock()
+    pipe.execute = AsyncMock()
+    pipe.__aenter__ = AsyncMock(return_value=pipe)
+    pipe.__aexit__ = AsyncMock(return_value=False)
+    master.redis.pipeline = MagicMock(return_value=pipe)
+    return pipe
+
+
+class TestPublishBatch:
+
+    @pytest.mark.asyncio
+    async def test_events_sent_in_one_round_trip(self, master):
+        pipe = _mock_pipeline(master)
+        await master._publish_batch([("c1", {"a": 1}), ("c2", {"b": 2})])
+        master.redis.pipeline.assert_called_once_with(transaction=False)
+        assert [c.args for c in pipe.publish.call_args_list] == [("c1", b'{"a":1}'), ("c2", b'{"b":2}')]
+        pipe.execute.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_redis_failure_is_swallowed(self, master):
+        pipe = _mock_pipeline(master)
+        pipe.execute.side_effect = ConnectionError("redis down")
+        await master._publish_batch([("c", {})])   # must not raise
+
+    @pytest.mark.asyncio
+    async def test_assign_issues_publishes_summary_as_one_batch(self, master, project_a):
+        master._projects["project_a"] = project_a
+        master._active_project_name = "project_a"
+        pipe = _mock_pipeline(master)
+        master._assignment_manager = MagicMock()
+        master._assignment_manager.assign_all_issues = AsyncMock(return_value={
+            "success": True,
+            "assigned": 3,
+            "summary": {
+                "backend_agent": {"count": 2, "issues": [1, 2]},
+                "frontend_agent": {"count": 1, "issues": [3]},
+            },
+        })
+        await master.handle_assign_issues("assign", "u")
+        pipe.execute.assert_awaited_once()
+        channels = {c.args[0] for c in pipe.publish.call_args_list}
+        agents = [json.loads(c.args[1])["agent_type"] for c in pipe.publish.call_args_list]
+        assert channels == {"pipeline:events:project_a"}
+        assert agents == ["backend_agent", "frontend_agent"]
+
+
+# ==========================================
+# AGENT PREWARM
+# ==========================================
+
+class TestPrewarm:
+
+    @pytest.mark.asyncio
+    async def test_prewarm_builds_agents_for_active_projects(self, master, project_b):
+        master._projects["project_b"] = project_b
+        with patch("agents.master_agent.BackendAgent") as be, \
+             patch("agents.master_agent.FrontendAgent") as fe, \
+             patch("agents.master_agent.DatabaseAgent") as db, \
+             patch("agents.master_agent.QAAgent") as qa:
+            await master._prewarm()
+        assert master._backend_agent is be.return_value
+        assert master._qa_agent is qa.return_value
+        fe.assert_called_once()
+        db.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_concurrent_access_builds_one_agent(self, master):
+        import threading
+        entered, release = threading.Event(), threading.Event()
+
+        def slow_agent(**kwargs):
+            entered.set()
+            release.wait(5)
+            return MagicMock()
+
+        with patch("agents.master_agent.BackendAgent", side_effect=slow_agent) as be:
+            warm = asyncio.create_task(asyncio.to_thread(getattr, master, "backend_agent"))
+            await asyncio.to_thread(entered.wait, 5)
+            other = asyncio.create_task(asyncio.to_thread(getattr, master, "backend_agent"))
+            release.set()
+            first, second = await asyncio.gather(warm, other)
+        assert first is second
+        be.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_prewarm_skips_when_no_project_needs_agents(self, master):
+        master._projects["p"] = {"name": "p", "status": "planning"}
+        with patch("agents.master_agent.BackendAgent") as be:
+            await master._prewarm()
+        be.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_first_message_starts_prewarm_once(self, master):
+        master.analyze_intent = AsyncMock(return_value={"intent": "general_query"})
+        master.handle_general_query = AsyncMock(return_value="ok")
+        await master.process_user_message("hi", "u")
+        task = master._warmup_task
+        await master.process_user_message("again", "u")
+        assert task is not None and master._warmup_task is task
+        await task
+
+
+# ==========================================
+# INTENT CACHE
+# ==========================================
+
+class TestIntentCache:
+
+    def _claude_returns(self, master, intent):
+        master.call_claude_code = AsyncMock(return_value={
+            "stdout": json.dumps({"intent": intent, "confidence": 0.9, "reasoning": "r"}),
+            "success": True,
+        })
+
+    @pytest.mark.asyncio
+    async def test_keyword_skips_claude(self, master):
+        self._claude_returns(master, "general_query")
+        result = await master.analyze_intent("  Run Tests! ")
+        assert result["intent"] == "run_tests"
+        master.call_claude_code.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_leading_command_skips_claude(self, master):
+        self._claude_returns(master, "general_query")
+        assert (await master.analyze_intent("!deploy   now please"))["intent"] == "deploy"
+        assert (await master.analyze_intent("!run the pipeline for the shop"))["intent"] == "run_pipeline"
+        assert (await master.analyze_intent("Status of the build?"))["intent"] == "status_check"
+        master.call_claude_code.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_side_effecting_prefix_without_command_goes_to_claude(self, master):
+        self._claude_returns(master, "general_query")
+        result = await master.analyze_intent("deploy keeps failing, why?")
+        assert result["intent"] == "general_query"
+        master.call_claude_code.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_repeat_message_hits_exact_cache(self, master):
+        self._claude_returns(master, "code_task")
+        first = await master.analyze_intent("Add dark mode to the settings page")
+        second = await master.analyze_intent("add dark mode to the settings page.")
+        assert first["intent"] == second["intent"] == "code_task"
+        master.call_claude_code.assert_awaited_once()
+        master._intent_collection.upsert.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_vector_store_calls_run_off_the_event_loop(self, master):
+        import threading
+        self._claude_returns(master, "code_task")
+        threads = []
+        master._intent_collection.query.side_effect = lambda **kw: (
+            threads.append(threading.current_thread()) or {"distances": [[]], "metadatas": [[]]}
+        )
+        master._intent_collection.upsert.side_effect = lambda **kw: threads.append(threading.current_thread())
+        await master.analyze_intent("Add dark mode to the settings page")
+        assert len(threads) == 2
+        assert threading.main_thread() not in threads
+
+    @pytest.mark.asyncio
+    async def test_semantic_neighbour_skips_claude(self, master):
+        self._claude_returns(master, "general_query")
+        master._intent_collection.query.return_value = {
+            "distances": [[0.05]],
+            "metadatas": [[{"intent": "status_check"}]],
+        }
+        result = await master.analyze_intent("how is my project doing")
+        assert result["intent"] == "status_check"
+        master.call_claude_code.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_side_effecting_neighbour_confirmed_by_claude(self, master):
+        self._claude_returns(master, "general_query")
+        master._intent_collection.query.return_value = {
+            "distances": [[0.05]],
+            "metadatas": [[{"intent": "deploy"}]],
+        }
+        result = await master.analyze_intent("don't deploy the app yet")
+        assert result["intent"] == "general_query"
+        master.call_claude_code.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_distant_neighbour_falls_back_to_claude(self, master):
+        self._claude_returns(master, "new_project")
+        master._intent_collection.query.return_value = {
+            "distances": [[0.4]],
+            "metadatas": [[{"intent": "deploy"}]],
+        }
+        result = await master.analyze_intent("make me a recipe sharing site")
+        assert result["intent"] == "new_project"
+        master.call_claude_code.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_fenced_reply_is_extracted(self, master):
+        master.call_claude_code = AsyncMock(return_value={
+            "stdout": 'Sure:\n```json\n{"intent": "deploy", "confidence": 0.8}\n```\nDone.',
+        })
+        result = await master._classify_intent_with_claude("ship it")
+        assert result == {"intent": "deploy", "confidence": 0.8}
+        prompt = master.call_claude_code.call_args.args[0]
+        assert 'User message: "ship it"' in prompt
+
+    @pytest.mark.asyncio
+    async def test_parse_errors_are_not_cached(self, master):
+        master.call_claude_code = AsyncMock(return_value={"stdout": "not json"})
+        await master.analyze_intent("gibberish")
+        await master.analyze_intent("gibberish")
+        assert master.call_claude_code.await_count == 2
+
+    def test_warm_seeds_canonical_phrases(self, master):
+        master._warm_intent_cache()
+        kwargs = master._intent_collection.upsert.call_args.kwargs
+        assert "deploy the app" in kwargs["documents"]
+        assert len(kwargs["ids"]) == len(set(kwargs["ids"])) == len(kwargs["documents"])
+
+
+# ==========================================
+# FULL PIPELINE
+# ==========================================
+
+class TestRunFullPipeline:
+
+    @pytest.mark.asyncio
+    async def test_qa_config_written(self, master, tmp_path):
+        _mock_pipeline(master)
+        master._database_agent = MagicMock()
+        master._database_agent.setup_database_for_project = AsyncMock(return_value={"success": True})
+        master._devops_agent = MagicMock()
+        master._devops_agent.setup_cicd_pipeline = AsyncMock(return_value={"success": True})
+        master._assignment_manager = MagicMock()
+        master._assignment_manager.assign_all_issues = AsyncMock(return_value={"success": True, "assigned": 0})
+
+        result = await master.run_full_pipeline(str(tmp_path), "prd.md", "repo")
+
+        assert result["steps_succeeded"] == 4
+        qa_config = json.loads((tmp_path / ".qa_config.json").read_text())
+        assert qa_config["auto_review"] is True
+        assert not (tmp_path / ".qa_config.json.tmp").exists()
+
+    @pytest.mark.asyncio
+    async def test_progress_published_per_stage(self, master, tmp_path):
+        pipe = _mock_pipeline(master)
+        master._database_agent = MagicMock()
+        master._database_agent.setup_database_for_project = AsyncMock(return_value={"success": True})
+        master._devops_agent = MagicMock()
+        master._devops_agent.setup_cicd_pipeline = AsyncMock(side_effect=RuntimeError("boom"))
+        master._assignment_manager = MagicMock()
+        master._assignment_manager.assign_all_issues = AsyncMock(return_value={"success": True, "assigned": 0})
+
+        await master.run_full_pipeline(str(tmp_path), "prd.md", "repo")
+        await asyncio.gather(*master._tasks)
+
+        events = [json.loads(c.args[1]) for c in pipe.publish.call_args_list]
+        assert {c.args[0] for c in pipe.publish.call_args_list} == {"pipeline:events:repo"}
+        assert sorted(e["name"] for e in events if e["type"] == "step") == [
+            "Database Setup", "DevOps / CI-CD Setup", "Issue Assignment", "QA Configuration",
+        ]
+        assert events[-1] == {"type": "summary", "steps_succeeded": 3, "steps_total": 4}
+
+    @pytest.mark.asyncio
+    async def test_queued_events_published_in_order(self, master):
+        pipe = _mock_pipeline(master)
+        sent = []
+
+        async def slow_execute():
+            await asyncio.sleep(0.02)
+            sent.extend(json.loads(c.args[1])["n"] for c in pipe.publish.call_args_list[len(sent):])
+
+        pipe.execute.side_effect = slow_execute
+        master._publish_later([("c", {"n": 0})])
+        await asyncio.sleep(0)                 # first batch now in flight
+        for n in range(1, 4):
+            master._publish_later([("c", {"n": n})])
+        await master._outbox_task
+
+        assert sent == [0, 1, 2, 3]
+        assert pipe.execute.await_count == 2   # later events coalesced
+
+    @pytest.mark.asyncio
+    async def test_assign_runs_after_parallel_stages(self, master, tmp_path):
+        _mock_pipeline(master)
+        order = []
+
+        async def slow(name, result):
+            order.append(f"{name}:start")
+            await asyncio.sleep(0.05)
+            order.append(f"{name}:end")
+            return result
+
+        master._database_agent = MagicMock()
+        master._database_agent.setup_database_for_project = lambda **kw: slow("db", {"success": True})
+        master._devops_agent = MagicMock()
+        master._devops_agent.setup_cicd_pipeline = MagicMock(side_effect=RuntimeError("boom"))
+        master._assignment_manager = MagicMock()
+        master._assignment_manager.assign_all_issues = lambda **kw: slow("assign", {"success": True, "assigned": 2})
+
+        result = await master.run_full_pipeline(str(tmp_path), "prd.md", "repo")
+
+        assert [s["name"] for s in result["steps"]] == [
+            "Database Setup", "DevOps / CI-CD Setup", "Issue Assignment", "QA Configuration",
+        ]
+        assert result["steps"][1] == {"name": "DevOps / CI-CD Setup", "success": False, "message": "boom"}
+        assert result["steps_succeeded"] == 3
+        assert order == ["db:start", "db:end", "assign:start", "assign:end"]
+
+
+# ==========================================
+# MONITOR PERSISTENCE
+# ==========================================
+
+class TestMonitorPersistence:
+
+    def _fake_monitor(self, runs=()):
+        monitor = MagicMock()
+        monitor.projects = set()
+        monitor.watch = AsyncMock(side_effect=lambda name, resume_from=None: monitor.projects.add(name))
+        monitor.unwatch = AsyncMock(side_effect=monitor.projects.discard)
+        monitor.stop = AsyncMock()
+        monitor.is_running = MagicMock(return_value=True)
+        monitor.is_watching = MagicMock(side_effect=lambda name: name in monitor.projects)
+        monitor.handled_run_ids = MagicMock(return_value=list(runs))
+        return monitor
+
+    @pytest.mark.asyncio
+    async def test_start_monitor_persists_entry(self, master, project_a):
+        master._projects["project_a"] = project_a
+        master._active_project_name = "project_a"
+        master.redis.hget = AsyncMock(return_value=None)
+        monitor = self._fake_monitor(runs=[7])
+        with patch("agents.master_agent.create_github_client"), \
+             patch("agents.master_agent.PipelineMonitor", return_value=monitor):
+            await master.handle_monitor_status("start")
+
+        assert master._monitor is monitor
+        monitor.watch.assert_awaited_once_with("project_a", resume_from=None)
+        key, name, raw = master.redis.hset.call_args.args
+        assert name == "project_a"
+        assert msgspec.msgpack.decode(raw) == {"repo": "project_a", "handled_runs": [7]}
+
+    @pytest.mark.asyncio
+    async def test_each_handled_run_is_persisted(self, master, project_a):
+        master._projects["project_a"] = project_a
+        monitor = self._fake_monitor(runs=[1])
+        with patch("agents.master_agent.create_github_client"), \
+             patch("agents.master_agent.PipelineMonitor", return_value=monitor) as pm:
+            await master._start_project_monitor("project_a")
+        master.redis.hset.reset_mock()
+
+        monitor.handled_run_ids.return_value = [1, 2]
+        await pm.call_args.kwargs["on_handled"]("project_a")
+        assert msgspec.msgpack.decode(master.redis.hset.call_args.args[2])["handled_runs"] == [1, 2]
+
+    @pytest.mark.asyncio
+    async def test_cancelled_start_unwatches_project(self, master, project_a):
+        master._projects["project_a"] = project_a
+        monitor = self._fake_monitor()
+        master.redis.hset = AsyncMock(side_effect=asyncio.CancelledError)
+        with patch("agents.master_agent.create_github_client"), \
+             patch("agents.master_agent.PipelineMonitor", return_value=monitor), \
+             pytest.raises(asyncio.CancelledError):
+            await master._start_project_monitor("project_a")
+        monitor.unwatch.assert_awaited_once_with("project_a")
+        assert monitor.projects == set()
+
+    @pytest.mark.asyncio
+    async def test_explicit_stop_forgets_entry(self, master, project_a):
+        master._projects["project_a"] = project_a
+        master._active_project_name = "project_a"
+        master._monitor = self._fake_monitor()
+        master._monitor.projects.add("project_a")
+        monitor = master._monitor
+        await master.handle_monitor_status("stop")
+        monitor.unwatch.assert_awaited_once_with("project_a")
+        master.redis.hdel.assert_called_once()
+        # The idle monitor is released with its last project
+        assert master._monitor is None
+
+    @pytest.mark.asyncio
+    async def test_projects_share_one_monitor(self, master, project_a, project_b):
+        master._projects["project_a"] = project_a
+        master._projects["project_b"] = project_b
+        master.redis.hget = AsyncMock(return_value=None)
+        with patch("agents.master_agent.create_github_client") as factory, \
+             patch("agents.master_agent.PipelineMonitor", side_effect=lambda **kw: self._fake_monitor()) as pm:
+            await master._start_project_monitor("project_a")
+            await master._start_project_monitor("project_b")
+        factory.assert_called_once()
+        pm.assert_called_once()
+        assert master._monitor.projects == {"project_a", "project_b"}
+
+    @pytest.mark.asyncio
+    async def test_rehydrate_resumes_every_saved_project(self, master, project_a, project_b):
+        master._projects["project_a"] = project_a
+        master._projects["project_b"] = project_b
+        master._active_project_name = "project_a"
+        master.redis.hgetall = AsyncMock(return_value={
+            b"project_a": msgspec.msgpack.encode({"repo": "project_a", "handled_runs": [1, 2]}),
+            # Entries saved by earlier versions are JSON
+            b"project_b": json.dumps({"repo": "project_b", "handled_runs": [3]}).encode(),
+        })
+        monitor = self._fake_monitor()
+        with patch("agents.master_agent.create_github_client"), \
+             patch("agents.master_agent.PipelineMonitor", return_value=monitor):
+            await master._rehydrate_monitors()
+
+        monitor.watch.assert_any_await("project_a", resume_from=[1, 2])
+        monitor.watch.assert_any_await("project_b", resume_from=[3])
+        assert master._monitor is monitor
+
+    @pytest.mark.asyncio
+    async def test_rehydrate_skips_when_repo_changed(self, master, project_a):
+        master._projects["project_a"] = project_a
+        master._active_project_name = "project_a"
+        master.redis.hgetall = AsyncMock(return_value={
+            b"project_a": msgspec.msgpack.encode({"repo": "other", "handled_runs": []}),
+        })
+        with patch("agents.master_agent.PipelineMonitor") as pm:
+            await master._rehydrate_monitors()
+        pm.assert_not_called()
+        assert master._monitor is None
+
+
+# ==========================================
+# EMBEDDING CACHE CONCURRENCY
+# ==========================================
+
+class TestEmbedCacheThreads:
+
+    @pytest.mark.asyncio
+    async def test_eviction_during_embedding_is_safe(self, master):
+        import threading
+        entered, release = threading.Event(), threading.Event()
+
+        def slow_embed(texts):
+            entered.set()
+            release.wait(5)
+            return _fake_embed(texts)
+
+        master._embedding_fn = slow_embed
+        with patch("agents.master_agent.EMBED_CACHE_SIZE", 1):
+            writer = asyncio.create_task(asyncio.to_thread(master._embed_many, ["aa", "bbb"]))
+            await asyncio.to_thread(entered.wait, 5)
+            master._embedding_fn = _fake_embed
+            master._embed_many(["c", "dddd"])          # evicts on the loop meanwhile
+            release.set()
+            vectors = await writer
+        assert vectors == [[2.0, 1.0], [3.0, 1.0]]
+        assert len(master._embed_cache) == 1
+
+
+# ==========================================
+# INTENT DISPATCH
+# ==========================================
+
+class TestIntentDispatch:
+
+    def test_every_handler_exists(self, master):
+        for name in master._HANDLERS.values():
+            assert callable(getattr(master, name))
+
+    @pytest.mark.asyncio
+    async def test_monitor_intent_passes_message_as_action(self, master):
+        master.analyze_intent = AsyncMock(return_value={"intent": "monitor"})
+        result = await master.process_user_message("status", "u")
+        assert result == master._monitor_status_message()
+
+    @pytest.mark.asyncio
+    async def test_unknown_intent_falls_back_to_general_query(self, master):
+        master.analyze_intent = AsyncMock(return_value={"intent": "no_such_intent"})
+        master.handle_general_query = AsyncMock(return_value="fallback")
+        assert await master.process_user_message("hm", "u") == "fallback"
+
+
+# ==========================================
+# MEMORY INDEX WARMUP
+# ==========================================
+
+class TestMemoryWarmup:
+
+    @pytest.mark.asyncio
+    async def test_flush_records_active_project(self, master, project_a):
+        master._projects["project_a"] = project_a
+        master._active_project_name = "project_a"
+        pipe = _mock_pipeline(master)
+        await master.store_memory("note", "x")
+        await master.flush_memories()
+
+        assert master.memory.upsert.call_args.kwargs["metadatas"][0]["project"] == "project_a"
+        key, mapping = pipe.zadd.call_args.args
+        assert list(mapping) == ["project_a"]
+        pipe.execute.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_warm_queries_hot_projects_once(self, master):
+        master.redis.zrevrange = AsyncMock(return_value=[b"p1", b"p2"])
+        await master._warm_memory_cache()
+        master.memory.query.assert_called_once()
+        assert master.memory.query.call_args.kwargs["query_embeddings"] == [[2, 1.0], [2, 1.0]]
+
+    @pytest.mark.asyncio
+    async def test_warm_falls_back_to_newest_projects(self, master, project_a, project_b):
+        master._projects["project_a"] = project_a
+        master._projects["project_b"] = project_b
+        master.redis.zrevrange = AsyncMock(side_effect=ConnectionError("redis down"))
+        await master._warm_memory_cache()
+        assert len(master.memory.query.call_args.kwargs["query_embeddings"]) == 2
+
+    @pytest.mark.asyncio
+    async def test_warm_noop_without_projects(self, master):
+        master.redis.zrevrange = AsyncMock(return_value=[])
+        await master._warm_memory_cache()
+        master.memory.query.assert_not_called()
+
+
+# ==========================================
+# WORKER COMMANDS
+# ==========================================
+
+class TestHandleWorkers:
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("message, method", [
+        ("!workers start", "start_workers"),
+        ("please stop the workers", "stop_workers"),
+        ("workers status", "worker_status"),
+        ("restart workers", "worker_status"),
+        ("", "worker_status"),
+    ])
+    async def test_dispatch_on_whole_word(self, master, message, method):
+        for name in ("start_workers", "stop_workers", "worker_status"):
+            setattr(master, name, AsyncMock(return_value=name))
+        assert await master.handle_workers(message, "u") == method
+
+
+# ==========================================
+# DISCORD NOTIFICATIONS
+# ==========================================
+
+class TestNotifyQueue:
+
+    @pytest.mark.asyncio
+    async def test_burst_sent_as_one_message(self, master):
+        channel = AsyncMock()
+        master._notify_channel = channel
+        with patch("agents.master_agent.NOTIFY_COALESCE_WINDOW", 0.01):
+            await master._notify("first")
+            await master._notify("second")
+            channel.send.assert_not_called()
+            await master._notify_flusher
+        channel.send.assert_awaited_once_with("first\n\nsecond")
+
+    @pytest.mark.asyncio
+    async def test_no_channel_queues_nothing(self, master):
+        await master._notify("message")
+        assert master._notify_queue == []
+        assert master._notify_flusher is None
+
+    @pytest.mark.asyncio
+    async def test_batches_split_at_discord_limit(self, master):
+        channel = AsyncMock()
+        master._notify_channel = channel
+        await master._notify("a" * 1500)
+        await master._notify("b" * 1500)
+        await master._notify("x" * 3000)
+        await master.flush_notifications()
+        sent = [c.args[0] for c in channel.send.await_args_list]
+        assert [len(m) for m in sent] == [1500, 1500, 2000]
+        assert sent[2].endswith("...")
+
+    @pytest.mark.asyncio
+    async def test_send_errors_are_swallowed(self, master):
+        channel = AsyncMock()
+        channel.send = AsyncMock(side_effect=Exception("Discord down"))
+        master._notify_channel = channel
+        await master._notify("test")
+        await master.flush_notifications()  # Should not raise
+
+    @pytest.mark.asyncio
+    async def test_shutdown_sends_pending(self, master, tmp_path):
+        channel = AsyncMock()
+        master._notify_channel = channel
+        await master._notify("bye")
+        with patch("agents.master_agent.EMBED_CACHE_PATH", tmp_path / "embed_cache.pkl"):
+            await master.shutdown()
+        channel.send.assert_awaited_once_with("bye")
+
+
+# ==========================================
+# SHUTDOWN
+# ==========================================
+
+class TestShutdown:
+
+    @pytest.mark.asyncio
+    async def test_background_tasks_cancelled(self, master):
+        started = asyncio.Event()
+
+        async def forever():
+            started.set()
+            await asyncio.sleep(3600)
+
+        task = master._spawn_task(forever())
+        await started.wait()
+        await master.shutdown()
+        assert task.cancelled()
+        assert master._tasks == set()
+
+    @pytest.mark.asyncio
+    async def test_running_monitors_stopped(self, master, project_a):
+        master._projects["project_a"] = project_a
+        monitor = MagicMock()
+        monitor.projects = {"project_a"}
+        monitor.is_running = MagicMock(return_value=True)
+        monitor.stop = AsyncMock()
+        monitor.handled_run_ids = MagicMock(return_value=[])
+        master._monitor = monitor
+        await master.shutdown()
+        monitor.stop.assert_awaited_once()
+        master.redis.hset.assert_called_once()
+
+
+# ==========================================
+# JSON codec fallback
+# ==========================================
+
+class TestJsonFallback:
+
+    def test_stdlib_codec_used_without_orjson(self):
+        # chromadb itself needs orjson, so block it only for master_agent
+        script = (
+            "import sys, chromadb; sys.modules['orjson'] = sys.modules['ujson'] = None\n"
+            "import agents.master_agent as m\n"
+            "assert m._json_loads(b'{\"a\": 1}') == {'a': 1}\n"
+            "assert m._json_loads(m._json_dumps({'a': 'é'})) == {'a': 'é'}\n"
+            "assert m._json_dumps_pretty([1]) == b'[\\n  1\\n]'\n"
+            "assert m._JSON_DUMPS_ATOMIC is False\n"
+        )
+        root = Path(__file__).resolve().parent.parent
+        result = subprocess.run([sys.executable, "-c", script], cwd=root, capture_output=True, text=True)
+        assert result.returncode == 0, result.stderr
@@ -0,0 +1,310 @@
+"""
+Tests for the agent messaging layer (AgentMessage, AgentMessenger, MessageBus).
+Redis is mocked throughout.
+"""
+
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from agents.messaging import QUEUE_MAX_LEN, AgentMessage, AgentMessenger, MessageBus, _recipient_key
+
+
+# ==========================================
+# FIXTURES
+# ==========================================
+
+@pytest.fixture
+def mock_redis():
+    """Async Redis stand-in; pipeline() is its own context-managed pipe."""
+    r = MagicMock()
+    for name in ("zpopmin", "bzpopmin", "zcard", "keys", "delete", "aclose"):
+        setattr(r, name, AsyncMock())
+    pipe = r.pipeline.return_value
+    pipe.__aenter__.return_value = pipe
+    pipe.execute = AsyncMock()
+    r.register_script.return_value = AsyncMock()
+    pubsub = r.pubsub.return_value
+    for name in ("get_message", "subscribe", "unsubscribe", "aclose"):
+        setattr(pubsub, name, AsyncMock())
+    return r
+
+
+@pytest.fixture
+def messenger(mock_redis):
+    with patch("agents.messaging.Redis", return_value=mock_redis):
+        return AgentMessenger(agent_id="b1", agent_type="backend")
+
+
+@pytest.fixture
+def bus(mock_redis):
+    with patch("agents.messaging.Redis", return_value=mock_redis):
+        return MessageBus()
+
+
+def _message(**overrides) -> AgentMessage:
+    fields = {"message_type": "task_assignment", "sender": "qa:q1", "recipient": "backend", "content": {"n": 1}}
+    return AgentMessage(**{**fields, **overrides})
+
+
+# ==========================================
+# AGENT MESSAGE
+# ==========================================
+
+class TestAgentMessage:
+
+    def test_msgpack_round_trip(self):
+        message = _message(priority=0)
+        assert AgentMessage.from_bytes(message.to_bytes()) == message
+
+    def test_json_from_older_senders_still_decodes(self):
+        message = _message()
+        assert AgentMessage.from_bytes(message.to_json().encode()) == message
+
+    def test_dict_round_trip_keeps_id_and_timestamp(self):
+        message = _message()
+        data = message.to_dict()
+        assert set(data) == {
+            "message_id", "message_type", "sender", "recipient", "content", "priority", "timestamp",
+        }
+        assert AgentMessage.from_dict(data) == message
+
+    def test_message_id_generated_when_missing(self):
+        assert _message().message_id != _message().message_id
+        assert _message(message_id="fixed").message_id == "fixed"
+
+
+# ==========================================
+# AGENT MESSENGER
+# ==========================================
+
+class TestAgentMessenger:
+
+    def test_capped_enqueue_script_registered(self, messenger, mock_redis):
+        script = mock_redis.register_script.call_args.args[0]
+        assert "ZADD" in script and "ZPOPMAX" in script
+
+    def test_redis_replies_stay_bytes(self):
+        with patch("agents.messaging.Redis") as redis_cls:
+            AgentMessenger(agent_id="b1", agent_type="backend")
+        assert redis_cls.call_args.kwargs["decode_responses"] is False
+
+    @pytest.mark.asyncio
+    async def test_subscribes_on_first_read_only(self, messenger, mock_redis):
+        pubsub = mock_redis.pubsub.return_value
+        pubsub.subscribe.assert_not_called()
+        await messenger.receive_message(timeout=0)
+        await messenger.receive_message(timeout=0)
+        pubsub.subscribe.assert_awaited_once_with("agent:backend:b1", "agent:broadcast")
+
+    @pytest.mark.asyncio
+    async def test_close_flushes_then_releases_connections(self, messenger, mock_redis):
+        await messenger.send_message("frontend", "a", {})
+        await messenger.receive_message(timeout=0)
+        await messenger.close()
+        mock_redis.pipeline.return_value.execute.assert_awaited_once()
+        mock_redis.pubsub.return_value.unsubscribe.assert_awaited_once()
+        mock_redis.aclose.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_publish_sends_msgpack(self, messenger, mock_redis):
+        message_id = await messenger.send_message("frontend", "status_update", {"ok": True})
+        await messenger.flush()
+        channel, payload = mock_redis.pipeline.return_value.publish.call_args.args
+        assert channel == "agent:frontend"
+        sent = AgentMessage.from_bytes(payload)
+        assert sent.message_id == message_id
+        assert sent.sender == "backend:b1"
+
+    @pytest.mark.asyncio
+    async def test_burst_sent_in_one_pipeline(self, messenger, mock_redis):
+        pipe = mock_redis.pipeline.return_value
+        for i in range(3):
+            await messenger.send_message("frontend", "status_update", {"i": i})
+        await messenger.send_message("qa", "request_assistance", {}, priority=1, use_queue=True)
+        mock_redis.pipeline.assert_not_called()
+
+        await messenger._tx_flusher
+
+        mock_redis.pipeline.assert_called_once_with(transaction=False)
+        pipe.execute.assert_called_once()
+        assert pipe.publish.call_count == 3
+        enqueue = mock_redis.register_script.return_value
+        enqueue.assert_awaited_once()
+        kwargs = enqueue.call_args.kwargs
+        assert kwargs["keys"] == ["queue:agent:qa"]
+        assert kwargs["args"][1:] == [1, QUEUE_MAX_LEN]
+        assert AgentMessage.from_bytes(kwargs["args"][0]).message_type == "request_assistance"
+        assert kwargs["client"] is pipe
+
+    @pytest.mark.asyncio
+    async def test_full_batch_sent_without_waiting_for_window(self, messenger, mock_redis):
+        with patch("agents.messaging.SEND_BATCH_MAX", 2), \
+             patch("agents.messaging.SEND_BATCH_WINDOW", 10):
+            await messenger.send_message("frontend", "a", {})
+            await messenger.send_message("frontend", "b", {})
+            await asyncio.wait_for(messenger._tx_flusher, timeout=1)
+        assert mock_redis.pipeline.return_value.publish.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_send_failure_logged_not_raised(self, messenger, mock_redis):
+        mock_redis.pipeline.return_value.execute.side_effect = ConnectionError("down")
+        await messenger.send_message("frontend", "a", {})
+        await messenger.flush()
+        assert messenger._tx_queue == []
+
+    @pytest.mark.asyncio
+    async def test_queued_message_popped_atomically(self, messenger, mock_redis):
+        raw = _message().to_bytes()
+        mock_redis.zpopmin.return_value = [(raw, 2.0)]
+        message = await messenger.get_queued_message()
+        assert message.content == {"n": 1}
+        mock_redis.zpopmin.assert_called_once_with("queue:agent:backend:b1")
+
+
+class TestRecipientKeys:
+
+    @pytest.mark.parametrize("recipient,use_queue,key", [
+        ("qa", True, "queue:agent:qa"),
+        ("broadcast", False, "agent:broadcast"),
+        ("frontend:f1", False, "agent:frontend:f1"),
+    ])
+    def test_routes(self, recipient, use_queue, key):
+        assert _recipient_key(recipient, use_queue) == key
+
+    @pytest.mark.asyncio
+    async def test_own_keys_built_once(self, messenger, mock_redis):
+        assert messenger.queue_key == "queue:agent:backend:b1"
+        await messenger.get_pending_message_count()
+        await messenger.clear_queue()
+        mock_redis.zcard.assert_awaited_once_with("queue:agent:backend:b1")
+        mock_redis.delete.assert_awaited_once_with("queue:agent:backend:b1")
+
+
+class TestListening:
+
+    @staticmethod
+    def _feed(items):
+        """Blocking-read stand-in: yields `items`, then idles like an empty read."""
+        pending = list(items)
+
+        async def read(*args, **kwargs):
+            if pending:
+                return pending.pop(0)
+            await asyncio.sleep(0.01)
+            return None
+        return read
+
+    @pytest.mark.asyncio
+    async def test_pubsub_and_queue_messages_dispatched(self, messenger, mock_redis):
+        messenger.pubsub.get_message.side_effect = self._feed([
+            {"type": "message", "data": _message(message_type="status_update").to_bytes()},
+        ])
+        mock_redis.bzpopmin.side_effect = self._feed([
+            (b"queue:agent:backend:b1", _message(message_type="task_assignment").to_bytes(), 1.0),
+        ])
+        seen = []
+
+        async def handle(message):
+            seen.append(message.message_type)
+            if len(seen) == 2:
+                messenger.stop_listening()
+
+        messenger.register_handler("status_update", handle)
+        messenger.register_handler("task_assignment", handle)
+        await asyncio.wait_for(messenger.start_listening(), timeout=2)
+
+        assert sorted(seen) == ["status_update", "task_assignment"]
+        assert mock_redis.bzpopmin.call_args.args == ("queue:agent:backend:b1",)
+        messenger.pubsub.unsubscribe.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_stop_wakes_idle_listener(self, messenger, mock_redis):
+        messenger.pubsub.get_message.side_effect = self._feed([])
+        mock_redis.bzpopmin.side_effect = self._feed([])
+        listener = asyncio.create_task(messenger.start_listening())
+        await asyncio.sleep(0.05)
+
+        messenger.stop_listening()
+        await asyncio.wait_for(listener, timeout=1)
+
+        assert messenger.running is False
+        messenger.pubsub.unsubscribe.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_bad_payload_skipped(self, messenger, mock_redis):
+        messenger.pubsub.get_message.side_effect = self._feed([
+            {"type": "message", "data": b"not a message"},
+            {"type": "message", "data": _message().to_bytes()},
+        ])
+        mock_redis.bzpopmin.side_effect = self._feed([])
+
+        async def handle(message):
+            messenger.stop_listening()
+
+        messenger.register_handler("task_assignment", handle)
+        await asyncio.wait_for(messenger.start_listening(), timeout=2)
+
+
+# ==========================================
+# MESSAGE BUS
+# ==========================================
+
+class TestMessageBus:
+
+    @staticmethod
+    def _scan(mock_redis, keys):
+        async def scan_iter(**kwargs):
+            for key in keys:
+                yield key
+        mock_redis.scan_iter = MagicMock(side_effect=scan_iter)
+
+    @pytest.mark.asyncio
+    async def test_queue_stats_keys_are_text(self, bus, mock_redis):
+        self._scan(mock_redis, [b"queue:agent:backend:b1"])
+        mock_redis.pipeline.return_value.execute.return_value = [3]
+        assert await bus.get_queue_stats() == {"queue:agent:backend:b1": 3}
+        mock_redis.keys.assert_not_called()
+        assert mock_redis.scan_iter.call_args.kwargs["match"] == "queue:agent:*"
+
+    @pytest.mark.asyncio
+    async def test_queue_stats_one_pipeline_per_batch(self, bus, mock_redis):
+        keys = [f"queue:agent:a{i}".encode() for i in range(5)]
+        self._scan(mock_redis, keys)
+        pipe = mock_redis.pipeline.return_value
+        pipe.execute.side_effect = [[1, 2], [3, 4], [5]]
+        with patch("agents.messaging.QUEUE_SCAN_BATCH", 2):
+            stats = await bus.get_queue_stats()
+        assert list(stats.values()) == [1, 2, 3, 4, 5]
+        assert pipe.execute.await_count == 3
+        assert pipe.zcard.call_count == 5
+        mock_redis.zcard.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_clear_all_queues_deletes_in_batches(self, bus, mock_redis):
+        keys = [f"queue:agent:a{i}".encode() for i in range(3)]
+        self._scan(mock_redis, keys)
+        with patch("agents.messaging.QUEUE_SCAN_BATCH", 2):
+            await bus.clear_all_queues()
+        assert [c.args for c in mock_redis.delete.await_args_list] == [tuple(keys[:2]), (keys[2],)]
+
+    @pytest.mark.asyncio
+    async def test_monitor_blocks_for_remaining_time(self, bus, capsys):
+        pubsub = bus.pubsub
+        delivered = [{"type": "message", "data": _message(message_type="status_update").to_bytes()}]
+        timeouts = []
+
+        async def get_message(ignore_subscribe_messages, timeout):
+            timeouts.append(timeout)
+            if delivered:
+                return delivered.pop()
+            await asyncio.sleep(timeout)
+            return None
+
+        pubsub.get_message.side_effect = get_message
+        await asyncio.wait_for(bus.monitor_messages(duration=0.1), timeout=1)
+
+        assert "[status_update] qa:q1 → backend" in capsys.readouterr().out
+        # One read returns the message, the next blocks out the remaining time
+        assert len(timeouts) == 2 and 0 < timeouts[1] <= timeouts[0] <= 0.1
+        pubsub.unsubscribe.assert_awaited_once_with("agent:broadcast")
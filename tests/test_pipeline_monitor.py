@@ -15,15 +15,19 @@ from agents.pipeline_monitor import PipelineMonitor, WORKER_STALL_MINUTES
 # FIXTURES
 # ==========================================
 
+PROJECT = "test-project"
+
+
 def _make_master(repo_name="test-repo", project_path="/tmp/project"):
     """Build a minimal MasterAgent mock."""
     master = MagicMock()
-    master.current_project = {
+    master._projects = {PROJECT: {
+        "name": PROJECT,
         "repo_name": repo_name,
         "path": project_path,
         "repo_url": f"https://github.com/user/{repo_name}",
-    }
-    master._notify_channel = None
+    }}
+    master._notify = AsyncMock()
     master._worker_daemon = None
     master.call_claude_code = AsyncMock(return_value={"success": True, "stdout": "fixed", "stderr": ""})
     return master
@@ -48,7 +52,9 @@ def github():
 
 @pytest.fixture
 def monitor(master, github):
-    return PipelineMonitor(master=master, github=github)
+    monitor = PipelineMonitor(master=master, github=github)
+    monitor.projects.add(PROJECT)
+    return monitor
 
 
 # ==========================================
@@ -66,11 +72,26 @@ class TestInit:
     def test_handled_runs_empty(self, monitor):
         assert len(monitor._handled_runs) == 0
 
+    def test_handled_runs_bounded_oldest_first(self, monitor):
+        with patch("agents.pipeline_monitor.HANDLED_RUNS_MAX", 3):
+            monitor._remember_handled([1, 2, 3])
+            monitor._remember_handled([1])      # refreshed, so 2 is now oldest
+            monitor._remember_handled([4])
+        assert list(monitor._handled_runs) == [3, 1, 4]
+        assert monitor.get_status()["handled_runs"] == 3
+
+    def test_fix_attempts_bounded(self, monitor):
+        with patch("agents.pipeline_monitor.FIX_ATTEMPTS_MAX", 2):
+            assert monitor._count_fix_attempt(1) == 1
+            monitor._count_fix_attempt(2)
+            assert monitor._count_fix_attempt(1) == 2
+            monitor._count_fix_attempt(3)
+        assert dict(monitor._fix_attempts) == {1: 2, 3: 1}
+
     def test_get_status_returns_dict(self, monitor):
         status = monitor.get_status()
         assert "running" in status
-        assert "repo" in status
-        assert status["repo"] == "test-repo"
+        assert status["repos"] == ["test-repo"]
 
 
 # ==========================================
@@ -106,6 +127,67 @@ class TestStartStop:
         """stop() before start() should not raise."""
         await monitor.stop()  # Should not raise
 
+    @pytest.mark.asyncio
+    async def test_resume_from_seeds_handled_runs(self, monitor):
+        await monitor.start(resume_from=[3, 1, 2])
+        assert monitor.handled_run_ids() == [1, 2, 3]
+        await monitor.stop()
+
+    @pytest.mark.asyncio
+    async def test_watch_shares_one_loop(self, master, github):
+        master._projects["other"] = {"name": "other", "repo_name": "other-repo", "path": "/tmp/other"}
+        monitor = PipelineMonitor(master=master, github=github)
+        await monitor.watch(PROJECT)
+        task = monitor._task
+        await monitor.watch("other", resume_from=[9])
+        assert monitor._task is task
+        assert monitor.is_watching(PROJECT) and monitor.is_watching("other")
+        assert 9 in monitor._handled_runs
+        await monitor.stop()
+
+    @pytest.mark.asyncio
+    async def test_unwatch_last_project_stops_loop(self, monitor):
+        await monitor.start()
+        await monitor.unwatch(PROJECT)
+        assert monitor.is_running() is False
+
+
+class TestMonitorLoop:
+
+    @pytest.mark.asyncio
+    async def test_ci_and_worker_checks_run_concurrently(self, monitor):
+        started, finished = [], []
+        both_started = asyncio.Event()
+
+        async def check(name):
+            # Run one after the other, the first check times out here
+            monitor._running = False
+            started.append(name)
+            if len(started) == 2:
+                both_started.set()
+            await asyncio.wait_for(both_started.wait(), timeout=0.5)
+            finished.append(name)
+
+        monitor._check_ci_status = lambda: check("ci")
+        monitor._check_worker_health = lambda: check("workers")
+        monitor._running = True
+        with patch("agents.pipeline_monitor.MONITOR_POLL_INTERVAL", 0):
+            await asyncio.wait_for(monitor._monitor_loop(), timeout=2)
+        assert sorted(finished) == ["ci", "workers"]
+
+    @pytest.mark.asyncio
+    async def test_failing_check_does_not_skip_the_other(self, monitor):
+        monitor._check_ci_status = AsyncMock(side_effect=RuntimeError("github down"))
+
+        async def workers():
+            monitor._running = False
+
+        monitor._check_worker_health = AsyncMock(side_effect=workers)
+        monitor._running = True
+        with patch("agents.pipeline_monitor.MONITOR_POLL_INTERVAL", 0):
+            await asyncio.wait_for(monitor._monitor_loop(), timeout=2)
+        monitor._check_worker_health.assert_awaited_once()
+
 
 # ==========================================
 # CI STATUS CHECKING
@@ -115,14 +197,23 @@ class TestCheckCIStatus:
 
     @pytest.mark.asyncio
     async def test_no_project_returns_early(self, monitor, master):
-        master.current_project = None
+        monitor.projects.clear()
         # Should return without calling GitHub
         await monitor._check_ci_status()
         monitor.github.get_workflow_runs.assert_not_called()
 
+    @pytest.mark.asyncio
+    async def test_removed_project_is_dropped(self, monitor, master):
+        monitor._running = True
+        master._projects.pop(PROJECT)
+        await monitor._check_ci_status()
+        assert monitor.projects == set()
+        assert monitor._running is False
+        monitor.github.get_workflow_runs.assert_not_called()
+
     @pytest.mark.asyncio
     async def test_no_repo_name_returns_early(self, monitor, master):
-        master.current_project = {"repo_name": "", "path": "/tmp"}
+        master._projects[PROJECT] = {"repo_name": "", "path": "/tmp"}
         await monitor._check_ci_status()
         monitor.github.get_workflow_runs.assert_not_called()
 
@@ -141,20 +232,40 @@ class TestCheckCIStatus:
         await monitor._check_ci_status()
         assert 100 in monitor._handled_runs
 
+    @pytest.mark.asyncio
+    async def test_handled_run_triggers_persist_callback(self, master, github):
+        on_handled = AsyncMock()
+        monitor = PipelineMonitor(master=master, github=github, on_handled=on_handled)
+        monitor.projects.add(PROJECT)
+        github.get_workflow_runs = AsyncMock(return_value=[
+            {"id": 100, "status": "completed", "conclusion": "success", "name": "CI"}
+        ])
+        await monitor._check_ci_status()
+        on_handled.assert_awaited_once_with(PROJECT)
+
+    @pytest.mark.asyncio
+    async def test_persist_callback_error_is_swallowed(self, master, github):
+        monitor = PipelineMonitor(
+            master=master, github=github, on_handled=AsyncMock(side_effect=ConnectionError("down"))
+        )
+        monitor.projects.add(PROJECT)
+        github.get_workflow_runs = AsyncMock(return_value=[
+            {"id": 100, "status": "completed", "conclusion": "success", "name": "CI"}
+        ])
+        await monitor._check_ci_status()
+        assert 100 in monitor._handled_runs
+
     @pytest.mark.asyncio
     async def test_successful_run_after_fix_notifies(self, monitor, github):
         """If we attempted a fix for this run_id, notify on success."""
         monitor._fix_attempts[100] = 1  # We previously attempted a fix
 
-        channel = AsyncMock()
-        monitor.master._notify_channel = channel
-
         github.get_workflow_runs = AsyncMock(return_value=[
             {"id": 100, "status": "completed", "conclusion": "success", "name": "CI"}
         ])
         await monitor._check_ci_status()
-        channel.send.assert_called_once()
-        assert "✅" in channel.send.call_args[0][0]
+        monitor.master._notify.assert_called_once()
+        assert "✅" in monitor.master._notify.call_args[0][0]
 
     @pytest.mark.asyncio
     async def test_failed_run_triggers_handle_ci_failure(self, monitor, github):
@@ -167,7 +278,7 @@ class TestCheckCIStatus:
 
     @pytest.mark.asyncio
     async def test_already_handled_run_skipped(self, monitor, github):
-        monitor._handled_runs.add(300)
+        monitor._remember_handled([300])
         github.get_workflow_runs = AsyncMock(return_value=[
             {"id": 300, "status": "completed", "conclusion": "failure", "name": "CI"}
         ])
@@ -190,9 +301,6 @@ class TestCheckCIStatus:
         run_id = 500
         monitor._fix_attempts[run_id] = 3  # Already at max
 
-        channel = AsyncMock()
-        monitor.master._notify_channel = channel
-
         github.get_workflow_runs = AsyncMock(return_value=[
             {"id": run_id, "status": "completed", "conclusion": "failure", "name": "CI"}
         ])
@@ -201,10 +309,18 @@ class TestCheckCIStatus:
         await monitor._check_ci_status()
 
         monitor._handle_ci_failure.assert_not_called()
-        channel.send.assert_called_once()
-        assert "❌" in channel.send.call_args[0][0]
+        monitor.master._notify.assert_called_once()
+        assert "❌" in monitor.master._notify.call_args[0][0]
         assert run_id in monitor._handled_runs
 
+    @pytest.mark.asyncio
+    async def test_polls_every_watched_repo(self, monitor, master, github):
+        master._projects["other"] = {"name": "other", "repo_name": "other-repo", "path": "/tmp/other"}
+        monitor.projects.add("other")
+        await monitor._check_ci_status()
+        polled = sorted(c.args[0] for c in github.get_workflow_runs.call_args_list)
+        assert polled == ["other-repo", "test-repo"]
+
     @pytest.mark.asyncio
     async def test_github_error_is_swallowed(self, monitor, github):
         """GitHub API errors must not crash the monitor."""
@@ -224,7 +340,7 @@ class TestHandleCIFailure:
         run = {"id": 10, "name": "Tests"}
         master.call_claude_code = AsyncMock(return_value={"success": False, "stderr": "no"})
         with patch.dict("os.environ", {"GITHUB_TOKEN": "", "GITHUB_USERNAME": ""}):
-            await monitor._handle_ci_failure(run)
+            await monitor._handle_ci_failure(run, PROJECT)
         assert monitor._fix_attempts[10] == 1
 
     @pytest.mark.asyncio
@@ -235,7 +351,7 @@ class TestHandleCIFailure:
 
         with patch("agents.github_pusher.push_project_to_github", AsyncMock(return_value=True)), \
              patch.dict("os.environ", {"GITHUB_TOKEN": "tok", "GITHUB_USERNAME": "user"}):
-            await monitor._handle_ci_failure(run)
+            await monitor._handle_ci_failure(run, PROJECT)
 
         master.call_claude_code.assert_called_once()
         prompt = master.call_claude_code.call_args[1]["prompt"]
@@ -249,7 +365,7 @@ class TestHandleCIFailure:
 
         with patch("agents.github_pusher.push_project_to_github", AsyncMock(return_value=True)) as mock_push, \
              patch.dict("os.environ", {"GITHUB_TOKEN": "tok", "GITHUB_USERNAME": "user"}):
-            await monitor._handle_ci_failure(run)
+            await monitor._handle_ci_failure(run, PROJECT)
 
         mock_push.assert_called_once()
 
@@ -261,7 +377,7 @@ class TestHandleCIFailure:
 
         with patch("agents.github_pusher.push_project_to_github", AsyncMock(return_value=True)), \
              patch.dict("os.environ", {"GITHUB_TOKEN": "tok", "GITHUB_USERNAME": "user"}):
-            await monitor._handle_ci_failure(run)
+            await monitor._handle_ci_failure(run, PROJECT)
 
         assert 40 in monitor._handled_runs
 
@@ -271,21 +387,18 @@ class TestHandleCIFailure:
         github.get_workflow_run_logs = AsyncMock(return_value="error")
         master.call_claude_code = AsyncMock(return_value={"success": True, "stdout": "fix"})
 
-        channel = AsyncMock()
-        monitor.master._notify_channel = channel
-
         with patch("agents.github_pusher.push_project_to_github", AsyncMock()) as mock_push, \
              patch.dict("os.environ", {"GITHUB_TOKEN": "", "GITHUB_USERNAME": ""}):
-            await monitor._handle_ci_failure(run)
+            await monitor._handle_ci_failure(run, PROJECT)
 
         mock_push.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_no_project_returns_early(self, monitor, master):
-        master.current_project = None
+        master._projects.clear()
         run = {"id": 60, "name": "CI"}
         master.call_claude_code = AsyncMock()
-        await monitor._handle_ci_failure(run)
+        await monitor._handle_ci_failure(run, PROJECT)
         master.call_claude_code.assert_not_called()
 
 
@@ -310,11 +423,8 @@ class TestCheckWorkerHealth:
         })
         master._worker_daemon = daemon
 
-        channel = AsyncMock()
-        monitor.master._notify_channel = channel
-
         await monitor._check_worker_health()
-        channel.send.assert_not_called()
+        monitor.master._notify.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_fresh_working_worker_not_flagged(self, monitor, master):
@@ -329,11 +439,8 @@ class TestCheckWorkerHealth:
         daemon._task_start_times = {"backend": recent}
         master._worker_daemon = daemon
 
-        channel = AsyncMock()
-        monitor.master._notify_channel = channel
-
         await monitor._check_worker_health()
-        channel.send.assert_not_called()
+        monitor.master._notify.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_stalled_worker_triggers_notify(self, monitor, master):
@@ -350,14 +457,11 @@ class TestCheckWorkerHealth:
         daemon._task_start_times = {"backend": old_start}
         master._worker_daemon = daemon
 
-        channel = AsyncMock()
-        monitor.master._notify_channel = channel
-
         await monitor._check_worker_health()
 
-        channel.send.assert_called_once()
-        assert "⚠️" in channel.send.call_args[0][0]
-        assert "backend" in channel.send.call_args[0][0]
+        monitor.master._notify.assert_called_once()
+        assert "⚠️" in monitor.master._notify.call_args[0][0]
+        assert "backend" in monitor.master._notify.call_args[0][0]
 
     @pytest.mark.asyncio
     async def test_stalled_worker_state_reset_to_idle(self, monitor, master):
@@ -374,7 +478,6 @@ class TestCheckWorkerHealth:
         daemon._task_start_times = {"frontend": old_start}
         master._worker_daemon = daemon
 
-        monitor.master._notify_channel = AsyncMock()
         await monitor._check_worker_health()
 
         assert daemon._worker_states["frontend"] == "idle"
@@ -388,12 +491,10 @@ class TestCheckWorkerHealth:
             "task_start_times": {"backend": "not-a-timestamp"},
         })
         master._worker_daemon = daemon
-        channel = AsyncMock()
-        monitor.master._notify_channel = channel
 
         # Should not raise
         await monitor._check_worker_health()
-        channel.send.assert_not_called()
+        monitor.master._notify.assert_not_called()
 
 
 # ==========================================
@@ -403,29 +504,6 @@ class TestCheckWorkerHealth:
 class TestNotify:
 
     @pytest.mark.asyncio
-    async def test_notify_sends_to_channel(self, monitor, master):
-        channel = AsyncMock()
-        master._notify_channel = channel
+    async def test_notify_goes_through_master_queue(self, monitor, master):
         await monitor._notify("Hello from monitor")
-        channel.send.assert_called_once_with("Hello from monitor")
-
-    @pytest.mark.asyncio
-    async def test_notify_no_channel_does_not_raise(self, monitor, master):
-        master._notify_channel = None
-        await monitor._notify("message")  # Should not raise
-
-    @pytest.mark.asyncio
-    async def test_notify_truncates_long_messages(self, monitor, master):
-        channel = AsyncMock()
-        master._notify_channel = channel
-        long_msg = "x" * 3000
-        await monitor._notify(long_msg)
-        sent = channel.send.call_args[0][0]
-        assert len(sent) <= 2000
-
-    @pytest.mark.asyncio
-    async def test_notify_swallows_send_errors(self, monitor, master):
-        channel = AsyncMock()
-        channel.send = AsyncMock(side_effect=Exception("Discord down"))
-        master._notify_channel = channel
-        await monitor._notify("test")  # Should not raise
+        master._notify.assert_awaited_once_with("Hello from monitor")
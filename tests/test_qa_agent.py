@@ -25,7 +25,7 @@ def mock_redis():
 @pytest.fixture
 def qa_agent(mock_redis):
     mock_gh = AsyncMock()
-    with patch("agents.messaging.redis.Redis", return_value=mock_redis), \
+    with patch("agents.messaging.Redis", return_value=mock_redis), \
          patch("agents.qa_agent.create_github_client", return_value=mock_gh):
         agent = QAAgent(agent_id="qa_test")
         agent.github = mock_gh
@@ -0,0 +1,38 @@
+"""
+Tests for utils/structured_logger.py
+"""
+
+import json
+import logging
+
+from utils import structured_logger
+from utils.structured_logger import CustomJsonFormatter, parse_log_file
+
+
+def _record(**extra) -> logging.LogRecord:
+    record = logging.LogRecord("agent", logging.INFO, __file__, 1, "hello %s", ("world",), None)
+    record.__dict__.update(extra)
+    return record
+
+
+class TestJsonFormatter:
+
+    def test_line_is_json_with_extras(self):
+        line = CustomJsonFormatter().format(_record(action="build", details={1: "int key"}, pid=7))
+        data = json.loads(line)
+        assert data["message"] == "hello world"
+        assert data["action"] == "build"
+        assert data["details"] == {"1": "int key"}
+        assert data["pid"] == 7
+
+    def test_stdlib_fallback_matches(self, monkeypatch):
+        record = _record(status="ok", details={"n": 1}, timestamp="2026-01-01T00:00:00")
+        fast = json.loads(CustomJsonFormatter().format(record))
+        monkeypatch.setattr(structured_logger, "orjson", None)
+        assert json.loads(CustomJsonFormatter().format(record)) == fast
+
+    def test_parse_log_file_skips_bad_lines(self, tmp_path):
+        log_file = tmp_path / "agent.log"
+        log_file.write_text(CustomJsonFormatter().format(_record()) + "\nnot json\n")
+        entries = parse_log_file(log_file)
+        assert [e["message"] for e in entries] == ["hello world"]
@@ -0,0 +1,125 @@
+"""
+Tests for agents/vector_memory.py (sqlite-vec memory backend).
+The vec0 extension itself is not required — only quantization, the
+empty-index path and the Chroma fallback are exercised here.
+"""
+
+import sqlite3
+import numpy as np
+import pytest
+from unittest.mock import MagicMock, patch
+
+from agents.vector_memory import (
+    SqliteVecMemory,
+    index_scale,
+    open_sqlite_vec_memory,
+    quantize_i8,
+)
+
+
+# ==========================================
+# quantize_i8
+# ==========================================
+
+class TestQuantize:
+
+    def test_unit_vector_maps_to_full_range(self):
+        q = quantize_i8([1.0, 0.0, -1.0, 0.0])
+        # normalised to [0.707, 0, -0.707, 0]
+        assert q.dtype == np.int8
+        assert q.tolist() == [90, 0, -90, 0]
+
+    def test_scale_invariant(self):
+        assert quantize_i8([3.0, 4.0]).tolist() == quantize_i8([0.3, 0.4]).tolist()
+
+    def test_zero_vector(self):
+        assert quantize_i8([0.0, 0.0]).tolist() == [0, 0]
+
+
+class TestIndexScale:
+
+    def test_high_dim_vectors_use_more_levels(self):
+        v = np.random.default_rng(0).normal(size=384)
+        scale = index_scale(384)
+        assert scale > 127
+        assert len(set(quantize_i8(v, scale).tolist())) > 3 * len(set(quantize_i8(v).tolist()))
+
+    def test_low_dim_uses_unit_scale(self):
+        assert index_scale(2) == 127.0
+        assert quantize_i8([1.0, 0.0], index_scale(2)).tolist() == [127, 0]
+
+    def test_outliers_clip(self):
+        assert quantize_i8([1.0] + [0.0] * 383, index_scale(384)).tolist()[0] == 127
+
+    def test_scale_persists_across_reopen(self, tmp_path):
+        db = tmp_path / "mem.sqlite"
+        store = SqliteVecMemory(sqlite3.connect(db))
+        with store.conn:
+            store._set_scale(64)
+        assert SqliteVecMemory(sqlite3.connect(db))._scale == pytest.approx(127 * 8 / 4)
+
+    def test_store_without_meta_uses_unit_scale(self):
+        assert SqliteVecMemory(sqlite3.connect(":memory:"))._scale == 127.0
+
+
+# ==========================================
+# SqliteVecMemory without an index
+# ==========================================
+
+class TestEmptyStore:
+
+    def test_query_before_first_add_is_empty(self):
+        store = SqliteVecMemory(sqlite3.connect(":memory:"))
+        result = store.query(query_embeddings=[[0.1, 0.2]], n_results=3)
+        assert result == {"ids": [[]], "documents": [[]], "metadatas": [[]], "distances": [[]]}
+
+    def test_add_with_no_ids_is_noop(self):
+        store = SqliteVecMemory(sqlite3.connect(":memory:"))
+        store.add(documents=[], embeddings=[], metadatas=[], ids=[])
+        assert store._has_index is False
+
+
+# ==========================================
+# open_sqlite_vec_memory fallback
+# ==========================================
+
+class TestOpen:
+
+    def test_returns_none_when_extension_cannot_load(self, tmp_path):
+        conn = MagicMock()
+        conn.enable_load_extension.side_effect = AttributeError("no extension support")
+        with patch("agents.vector_memory.sqlite3.connect", return_value=conn):
+            assert open_sqlite_vec_memory(tmp_path / "mem.sqlite") is None
+
+    def test_returns_none_when_sqlite_vec_missing(self, tmp_path):
+        with patch.dict("sys.modules", {"sqlite_vec": None}):
+            assert open_sqlite_vec_memory(tmp_path / "mem.sqlite") is None
+
+    def test_master_falls_back_to_chroma(self, tmp_path):
+        with patch("agents.master_agent.MEMORY_BACKEND", "sqlite-vec"), \
+             patch("agents.master_agent.open_sqlite_vec_memory", return_value=None), \
+             patch("agents.master_agent.chromadb.PersistentClient") as mock_chroma, \
+             patch("agents.master_agent.Redis"), \
+             patch("agents.master_agent.embedding_functions.DefaultEmbeddingFunction"), \
+             patch("agents.master_agent.ProductManagerAgent"), \
+             patch("agents.master_agent.ProjectManagerAgent"), \
+             patch("agents.master_agent.MasterAgent._restore_all_projects"):
+            from agents.master_agent import MasterAgent
+            master = MasterAgent(workspace_dir=str(tmp_path))
+        assert master.memory is mock_chroma.return_value.get_or_create_collection.return_value
+
+
+# ==========================================
+# SqliteVecMemory.get (plain chunks table)
+# ==========================================
+
+class TestGet:
+
+    def test_where_filters_on_metadata(self):
+        store = SqliteVecMemory(sqlite3.connect(":memory:"))
+        store.conn.executemany(
+            "INSERT INTO chunks (id, document, metadata) VALUES (?, ?, ?)",
+            [("a", "A", '{"category": "note"}'), ("b", "B", '{"category": "chat"}')],
+        )
+        assert store.get(where={"category": "chat"})["ids"] == ["b"]
+        assert store.get(where={"category": "none"}, limit=1)["ids"] == []
@@ -20,6 +20,21 @@ def _make_daemon(mock_redis, mock_github, master=None):
         return d
 
 
+class _Pipeline:
+    """Queues commands and replays them on the mock client at execute()."""
+
+    def __init__(self, client):
+        self._client = client
+        self._calls = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self._calls.append((name, args, kwargs))
+
+    def execute(self):
+        calls, self._calls = self._calls, []
+        return [getattr(self._client, name)(*args, **kwargs) for name, args, kwargs in calls]
+
+
 @pytest.fixture
 def mock_redis():
     r = MagicMock()
@@ -30,6 +45,7 @@ def mock_redis():
     r.hgetall = MagicMock(return_value={})
     r.delete = MagicMock(return_value=1)
     r.zpopmin = MagicMock(return_value=[])
+    r.pipeline = MagicMock(side_effect=lambda **kwargs: _Pipeline(r))
     return r
 
 
@@ -17,6 +17,21 @@ from utils.constants import AgentType
 # FIXTURES
 # ==========================================
 
+class _Pipeline:
+    """Queues commands and replays them on the mock client at execute()."""
+
+    def __init__(self, client):
+        self._client = client
+        self._calls = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self._calls.append((name, args, kwargs))
+
+    def execute(self):
+        calls, self._calls = self._calls, []
+        return [getattr(self._client, name)(*args, **kwargs) for name, args, kwargs in calls]
+
+
 @pytest.fixture
 def mock_redis():
     r = MagicMock()
@@ -27,6 +42,7 @@ def mock_redis():
     r.hgetall = MagicMock(return_value={})
     r.delete = MagicMock(return_value=1)
     r.zpopmin = MagicMock(return_value=[])
+    r.pipeline = MagicMock(side_effect=lambda **kwargs: _Pipeline(r))
     return r
 
 
@@ -93,6 +109,36 @@ class TestGetStatus:
         status = daemon.get_status()
         assert status["running"] is False
 
+    def test_queue_sizes_fetched_in_one_pipeline(self, daemon, mock_redis):
+        mock_redis.zcard = MagicMock(return_value=2)
+        status = daemon.get_status()
+        mock_redis.pipeline.assert_called_once_with(transaction=False)
+        assert status["queues"][AgentType.BACKEND] == 2
+
+    def test_queue_sizes_reused_within_ttl(self, daemon, mock_redis):
+        daemon.get_status()
+        daemon._worker_states["backend"] = "working"
+        status = daemon.get_status()
+        mock_redis.pipeline.assert_called_once()
+        assert status["worker_states"]["backend"] == "working"
+
+    def test_queue_sizes_refetched_after_ttl(self, daemon, mock_redis):
+        with patch("agents.worker_daemon.time.monotonic", side_effect=[100.0, 101.0]):
+            daemon.get_status()
+            daemon.get_status()
+        assert mock_redis.pipeline.call_count == 2
+
+    def test_status_lines_fill_counts_and_states(self, daemon):
+        queue_lines, state_lines = daemon.status_lines({
+            "queues": {"backend": 2, "custom": 1},
+            "worker_states": {"backend": "working"},
+        })
+        assert queue_lines == (
+            "  • **backend**: 2 pending tasks\n"
+            "  • **custom**: 1 pending tasks"
+        )
+        assert state_lines == "  • **backend**: working"
+
 
 # ==========================================
 # GITHUB SYNC TESTS
@@ -324,6 +370,44 @@ class TestWorkerLoop:
         )
 
 
+    @pytest.mark.asyncio
+    async def test_worker_runs_claimed_batch_concurrently(self, daemon, mock_redis):
+        tasks = [
+            {"task_type": "implement_feature", "repo_name": "my-repo", "issue_number": n, "project_path": ""}
+            for n in (1, 2)
+        ]
+        mock_redis.zpopmin.side_effect = [[(json.dumps(t), 1.0) for t in tasks], []]
+
+        both_started = asyncio.Event()
+        running = 0
+
+        async def execute(task):
+            nonlocal running
+            running += 1
+            if running == 2:
+                both_started.set()
+            await asyncio.wait_for(both_started.wait(), timeout=2)
+            return {"success": True}
+
+        mock_agent = AsyncMock()
+        mock_agent.execute_task = AsyncMock(side_effect=execute)
+        daemon._agents["backend"] = mock_agent
+        daemon._sync_github_on_complete = AsyncMock()
+        daemon.assignment_manager.fail_task = MagicMock()
+
+        async def mock_sleep(_):
+            daemon._running = False
+
+        daemon._running = True
+        with patch("agents.worker_daemon.WORKER_MAX_CONCURRENT", 2), \
+             patch("asyncio.sleep", side_effect=mock_sleep):
+            await daemon.run_worker("backend")
+
+        assert mock_agent.execute_task.await_count == 2
+        daemon.assignment_manager.fail_task.assert_not_called()
+        mock_redis.zpopmin.assert_any_call("queue:agent:backend", 2)
+
+
 # ==========================================
 # START / STOP TESTS
 # ==========================================
@@ -341,3 +425,19 @@ class TestStartStop:
         """stop() with no running tasks should not raise."""
         assert not daemon._running
         await daemon.stop()  # Should not raise
+
+    @pytest.mark.asyncio
+    async def test_cancelled_start_leaves_nothing_running(self, daemon):
+        async def run_forever(agent_type):
+            await asyncio.sleep(60)
+
+        daemon.agent_types = ["backend"]
+        daemon.run_worker = run_forever
+        task = asyncio.create_task(daemon.start())
+        await asyncio.sleep(0.01)
+        assert daemon._running is True
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        await asyncio.sleep(0)
+        assert daemon._running is False
+        assert all(t.done() for t in daemon._worker_tasks)
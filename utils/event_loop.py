@@ -0,0 +1,25 @@
+"""
+Event Loop Utilities for AI Development Pipeline
+Selects uvloop as the asyncio event loop when it is available
+"""
+
+import asyncio
+import sys
+
+
+def install_uvloop() -> bool:
+    """
+    Make uvloop the event loop for every subsequent asyncio.run().
+
+    Call from process entry points only (never at import time) so library
+    users and the test suite keep the default loop. Returns True when
+    uvloop was installed.
+    """
+    if sys.platform == "win32":
+        return False
+    try:
+        import uvloop
+    except ImportError:
+        return False
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return True
@@ -3,8 +3,11 @@ Structured Logging System for AI Development Pipeline
 Provides JSON-formatted logging for easier parsing and analysis
 """
 
+import atexit
 import logging
+import logging.handlers
 import json
+import queue
 import sys
 import os
 from datetime import datetime
@@ -12,6 +15,11 @@ from pathlib import Path
 from typing import Any, Dict, Optional
 import traceback
 
+try:
+    import orjson
+except ImportError:  # stdlib json encodes the same records, just slower
+    orjson = None
+
 
 class StructuredLogger:
     """
@@ -24,7 +32,8 @@ class StructuredLogger:
         name: str,
         log_file: Optional[Path] = None,
         level: str = "INFO",
-        include_console: bool = True
+        include_console: bool = True,
+        queued: bool = False
     ):
         """
         Initialize structured logger
@@ -34,25 +43,39 @@ class StructuredLogger:
             log_file: Path to log file (optional)
             level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
             include_console: Whether to also log to console
+            queued: Hand records to a background thread for formatting and
+                writing, so callers on the event loop never block on I/O
         """
         self.logger = logging.getLogger(name)
         self.logger.setLevel(getattr(logging, level.upper()))
         self.logger.handlers.clear()  # Clear any existing handlers
+        self.listener: Optional[logging.handlers.QueueListener] = None
         
         # Create formatter
         self.formatter = CustomJsonFormatter()
+        handlers = []
         
         # Add file handler if log file specified
         if log_file:
             file_handler = logging.FileHandler(log_file)
             file_handler.setFormatter(self.formatter)
-            self.logger.addHandler(file_handler)
+            handlers.append(file_handler)
         
         # Add console handler if requested
         if include_console:
             console_handler = logging.StreamHandler(sys.stdout)
             console_handler.setFormatter(self.formatter)
-            self.logger.addHandler(console_handler)
+            handlers.append(console_handler)
+        
+        if queued and handlers:
+            records = queue.SimpleQueue()
+            self.logger.addHandler(logging.handlers.QueueHandler(records))
+            self.listener = logging.handlers.QueueListener(records, *handlers)
+            self.listener.start()
+            atexit.register(self.listener.stop)  # drain what is still queued
+        else:
+            for handler in handlers:
+                self.logger.addHandler(handler)
     
     def _add_context(self, extra: Optional[Dict] = None) -> Dict:
         """Add default context to log entries"""
@@ -231,7 +254,18 @@ class CustomJsonFormatter(logging.Formatter):
         if hasattr(record, 'pid'):
             log_data['pid'] = record.pid
         
-        return json.dumps(log_data)
+        return _dumps_record(log_data)
+
+
+def _dumps_record(log_data: Dict) -> str:
+    """Serialize one log record to a JSON line (orjson when installed)."""
+    if orjson is not None:
+        return orjson.dumps(log_data, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    return json.dumps(log_data)
+
+
+def _loads_record(line: str) -> Dict:
+    return orjson.loads(line) if orjson is not None else json.loads(line)
 
 
 # ==========================================
@@ -245,7 +279,8 @@ def get_logger(
     name: str,
     agent_type: Optional[str] = None,
     log_to_file: bool = True,
-    log_level: str = "INFO"
+    log_level: str = "INFO",
+    queued: bool = False
 ) -> StructuredLogger:
     """
     Get or create a structured logger
@@ -255,6 +290,7 @@ def get_logger(
         agent_type: Agent type (for file naming)
         log_to_file: Whether to log to file
         log_level: Logging level
+        queued: Write from a background thread (see StructuredLogger)
     
     Returns:
         StructuredLogger instance
@@ -284,7 +320,8 @@ def get_logger(
         name=name,
         log_file=log_file,
         level=log_level,
-        include_console=True
+        include_console=True,
+        queued=queued
     )
     
     # Cache it
@@ -340,9 +377,9 @@ def parse_log_file(log_file: Path) -> list:
     with open(log_file, 'r') as f:
         for line in f:
             try:
-                entry = json.loads(line.strip())
+                entry = _loads_record(line.strip())
                 entries.append(entry)
-            except json.JSONDecodeError:
+            except ValueError:  # orjson and json decode errors both subclass it
                 continue
     
     return entries